@@ -1,47 +1,74 @@
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 from werkzeug.middleware.proxy_fix import ProxyFix
-import logging
-from logging.handlers import RotatingFileHandler
 import os
 from app.utils.email_service import EmailService
+from app.utils.logging_pipeline import configure_logging
+from app.utils.json_provider import make_json_provider
+from app.utils.compression import configure_compression
+from app.utils.admission import configure_admission
+from app.utils.batch_scheduler import SchedulerOverloaded
+from app.utils.reanalysis import reanalyze_command
+from app.utils.taxonomy import compile_taxonomy_command
+from app.startup import StartupReport, preload
 
-def create_app():
+def create_app(preload_caches=None):
+    report = StartupReport()
     app = Flask(__name__)
-    app.wsgi_app = ProxyFix(app.wsgi_app)
+    # X-Forwarded-For/-Proto are only honoured from this many proxies in front of the app;
+    # without one, any client could pick its own address and dodge the per-client limits
+    proxy_hops = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_hops, x_proto=proxy_hops)
+    app.json = make_json_provider(app)
     
     # Configure CORS
     CORS(app, resources={r"/*": {"origins": "*"}})
     
-    # Configure logging
-    if not os.path.exists('logs'):
-        os.mkdir('logs')
-    file_handler = RotatingFileHandler('logs/app.log', maxBytes=10240, backupCount=10)
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-    ))
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.setLevel(logging.INFO)
+    # Configure logging: request threads enqueue, a background thread writes
+    with report.phase('logging'):
+        configure_logging(app)
     app.logger.info('Application startup')
     
-    # Create data directory if it doesn't exist
-    if not os.path.exists(os.path.join(app.root_path, 'data')):
-        os.mkdir(os.path.join(app.root_path, 'data'))
-    
-    # Create templates directory for emails if it doesn't exist
-    if not os.path.exists(os.path.join(app.root_path, 'templates', 'emails')):
-        os.makedirs(os.path.join(app.root_path, 'templates', 'emails'))
+    with report.phase('directories'):
+        # Create data directory if it doesn't exist
+        os.makedirs(os.path.join(app.root_path, 'data'), exist_ok=True)
+        
+        # Create templates directory for emails if it doesn't exist
+        os.makedirs(os.path.join(app.root_path, 'templates', 'emails'), exist_ok=True)
     
     # Initialize email service
-    email_service = EmailService(app)
-    app.email_service = email_service
+    with report.phase('email_service'):
+        email_service = EmailService(app)
+        app.email_service = email_service
     
     # Register blueprints
-    from app.routes import resume_routes, analysis_routes, candidate_routes
-    app.register_blueprint(resume_routes.bp)
-    app.register_blueprint(analysis_routes.bp)
-    app.register_blueprint(candidate_routes.bp)
+    with report.phase('import_routes'):
+        from app.routes import resume_routes, analysis_routes, candidate_routes, metrics_routes, debug_routes
+    with report.phase('register_blueprints'):
+        app.register_blueprint(resume_routes.bp)
+        app.register_blueprint(analysis_routes.bp)
+        app.register_blueprint(candidate_routes.bp)
+        app.register_blueprint(metrics_routes.bp)
+        app.register_blueprint(debug_routes.bp)
+    
+    # Per-client rate limits and host-wide concurrency caps on the expensive endpoints
+    with report.phase('admission'):
+        configure_admission(app)
+    
+    # `flask reanalyze-skills`: bring stored skills up to date after a vocabulary change
+    app.cli.add_command(reanalyze_command)
+    # `flask compile-taxonomy`: rebuild the skills taxonomy artifact ahead of deployment
+    app.cli.add_command(compile_taxonomy_command)
+    
+    # Negotiated gzip/brotli; registered last so it runs before the metrics and access-log hooks
+    configure_compression(app)
+    
+    # Warm read-only caches so preforked workers share them (APP_PRELOAD=0 to skip)
+    if preload_caches is None:
+        preload_caches = os.environ.get('APP_PRELOAD', '1') != '0'
+    if preload_caches:
+        preload(app, report)
     
     # Error handlers
     @app.errorhandler(404)
@@ -53,9 +80,21 @@ def create_app():
         app.logger.error('Server Error: %s', error)
         return {'error': 'Internal server error'}, 500
     
+    @app.errorhandler(SchedulerOverloaded)
+    def scheduler_overloaded(e):
+        app.logger.warning('Analysis queue full: %s', e)
+        return ({'error': 'Analysis service is busy, retry shortly', 'retryAfter': e.retry_after}, 503,
+                {'Retry-After': str(e.retry_after)})
+    
     @app.errorhandler(Exception)
     def unhandled_exception(e):
+        if isinstance(e, HTTPException):
+            # 404, 405, 413 and friends keep their status (and any handler registered for it)
+            return e
         app.logger.error('Unhandled Exception: %s', e)
         return {'error': 'Internal server error'}, 500
     
-    return app
\ No newline at end of file
+    app.startup_report = report
+    app.logger.info('Application ready in %.1f ms', report.total_ms, extra={'startup_phases': report.to_dict()})
+    
+    return app
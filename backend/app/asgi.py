@@ -0,0 +1,146 @@
+"""ASGI entry point.
+
+    uvicorn app.asgi:application --workers 2
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker app.asgi:application
+
+The server's event loop reads request bodies and writes responses, so slow
+clients hold a socket rather than a thread. Only the Flask handler itself
+runs on a thread, and async views await file, SMTP and analysis work from
+there.
+"""
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from asgiref.sync import AsyncToSync, sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+
+from app import create_app
+
+
+class _PooledInstance(WsgiToAsgiInstance):
+    """One request, run on ``executor``.
+
+    Only asgiref's public pieces are used (``build_environ``, ``AsyncToSync``
+    and ``sync_to_async``); reading the body and streaming the response are
+    done here, so a change to asgiref's internals cannot break them.
+    """
+
+    def __init__(self, wsgi_application, executor: ThreadPoolExecutor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError('WSGI adapter received a non-HTTP scope')
+        self.scope = scope
+        with SpooledTemporaryFile(max_size=65536) as body:
+            while True:
+                message = await receive()
+                if message['type'] != 'http.request':
+                    # e.g. http.disconnect before the body arrived
+                    return
+                body.write(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            body.seek(0)
+            # Called from the pool thread
+            self.sync_send = AsyncToSync(send)
+            await self.run_wsgi_app(body)
+
+    def build_environ(self, scope, body):
+        environ = super().build_environ(scope, body)
+        # asgiref uses a BytesIO here; text written to wsgi.errors goes to stderr instead
+        environ['wsgi.errors'] = sys.stderr
+        return environ
+
+    async def run_wsgi_app(self, body):
+        await sync_to_async(self._run, thread_sensitive=False, executor=self.executor)(body)
+
+    def _run(self, body):
+        """Call the app and stream its response, on the thread start_response is called on"""
+        self._response_start = None
+        self._content_length = None
+        self._headers_sent = False
+        environ = self.build_environ(self.scope, body)
+        sent = 0
+        response = self.wsgi_application(environ, self._start_response)
+        try:
+            for output in response:
+                self._send_headers()
+                if self._content_length is not None:
+                    # Never send more than the declared Content-Length
+                    output = output[:self._content_length - sent]
+                self.sync_send({'type': 'http.response.body', 'body': output, 'more_body': True})
+                sent += len(output)
+                if sent == self._content_length:
+                    break
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        self._send_headers()
+        self.sync_send({'type': 'http.response.body'})
+
+    def _send_headers(self):
+        if not self._headers_sent:
+            self._headers_sent = True
+            self.sync_send(self._response_start)
+
+    def _start_response(self, status, response_headers, exc_info=None):
+        """WSGI start_response; the headers go out with the first body chunk"""
+        if exc_info is not None:
+            if self._headers_sent:
+                raise exc_info[1].with_traceback(exc_info[2])
+        elif self._response_start is not None:
+            raise ValueError('start_response called a second time without exc_info')
+        self._response_start = {
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(name.lower().encode('ascii'), value.encode('ascii')) for name, value in response_headers]
+        }
+        self._content_length = next(
+            (int(value) for name, value in response_headers if name.lower() == 'content-length'), None)
+
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi that runs requests on a bounded thread pool.
+
+    asgiref's adapter runs every request on one shared thread, which would
+    serialize the whole app. The pool is created lazily per process so it
+    is safe with preloaded, forked workers.
+    """
+
+    def __init__(self, wsgi_application, max_threads: int = 32):
+        super().__init__(wsgi_application)
+        self.max_threads = max_threads
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def executor(self) -> ThreadPoolExecutor:
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix='asgi-request')
+                    self._pid = os.getpid()
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        await _PooledInstance(self.wsgi_application, self.executor())(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = PooledWsgiToAsgi(create_app(), max_threads=int(os.environ.get('ASGI_THREADS', 32)))
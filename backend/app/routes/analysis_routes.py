@@ -0,0 +1,166 @@
+from flask import Blueprint, request, jsonify, current_app
+import threading
+import numpy as np
+from app.utils.batch_scheduler import get_scheduler
+from app.utils.bias_detector import BiasDetector
+from app.utils.question_bank import QuestionBank
+
+bp = Blueprint('analysis', __name__, url_prefix='/api')
+bias_detector = BiasDetector()
+
+_question_bank = None
+_question_bank_lock = threading.Lock()
+
+def get_question_bank():
+    """The question bank, built on first use; it loads the skills taxonomy"""
+    global _question_bank
+    if _question_bank is None:
+        with _question_bank_lock:
+            if _question_bank is None:
+                _question_bank = QuestionBank()
+    return _question_bank
+
+def _skills_error(skills, role):
+    """Why a skill list and role cannot get a question pack, or None if they can"""
+    if not isinstance(skills, (str, list)) or not all(isinstance(skill, str) for skill in skills):
+        return 'skills must be a list of skill names'
+    if not isinstance(role, str):
+        return 'role must be a string'
+    return None
+
+def _profile_error(profile):
+    """Why a candidate profile cannot get a question pack, or None if it can"""
+    if not isinstance(profile, dict):
+        return 'Each candidate must be an object'
+    candidate_id = profile.get('id')
+    if isinstance(candidate_id, bool) or not isinstance(candidate_id, (str, int)) or candidate_id == '':
+        return 'Each candidate needs an id'
+    return _skills_error(profile.get('skills', []), profile.get('role', ''))
+
+@bp.route('/detect-bias', methods=['POST'])
+def detect_bias():
+    """Run adverse-impact analysis over a shortlist or the whole candidate pool"""
+    try:
+        data = request.get_json(silent=True) or {}
+        group_key = data.get('groupBy', 'role')
+        score_key = data.get('scoreKey', 'matchScore')
+        threshold = float(data.get('threshold', 75))
+
+        if 'candidates' in data:
+            candidates = data['candidates']
+            if not isinstance(candidates, list):
+                return jsonify({'error': 'candidates must be a list'}), 400
+            if not all(isinstance(candidate, dict) for candidate in candidates):
+                return jsonify({'error': 'Each candidate must be an object'}), 400
+        else:
+            from app.routes.candidate_routes import (
+                candidate_ids_error, get_all_candidates, get_candidates_by_ids, get_snapshot
+            )
+            if data.get('candidateIds'):
+                error = candidate_ids_error(data['candidateIds'])
+                if error:
+                    return jsonify({'error': error}), 400
+                candidates = get_candidates_by_ids(data['candidateIds'])
+            else:
+                snapshot = get_snapshot()
+                columnar = not snapshot.raw_records and 'selected' not in snapshot.extra_fields
+                if columnar and group_key == 'role' and score_key == 'matchScore':
+                    # Whole pool on the snapshot's own columns, without building a dict per candidate
+                    scores = np.nan_to_num(snapshot.score, nan=0.0)
+                    report = bias_detector.analyze_coded(snapshot.roles, snapshot.role_codes, scores, threshold)
+                    return jsonify(report), 200
+                candidates = get_all_candidates()
+
+        report = bias_detector.analyze_candidates(
+            candidates, group_key=group_key, score_key=score_key, threshold=threshold
+        )
+
+        return jsonify(report), 200
+
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': f'Invalid request: {str(e)}'}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error detecting bias: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/generate-questions', methods=['POST'])
+def generate_questions():
+    """Generate interview questions for a candidate and job"""
+    try:
+        data = request.get_json(silent=True) or {}
+        candidate_id = data.get('candidateId')
+        job_id = data.get('jobId', '')
+        if candidate_id is not None and not isinstance(candidate_id, str):
+            return jsonify({'error': 'candidateId must be a string'}), 400
+
+        if 'skills' in data:
+            error = _skills_error(data['skills'], data.get('role', ''))
+            if error:
+                return jsonify({'error': error}), 400
+            skills = data['skills']
+            role = data.get('role', '')
+        else:
+            if not candidate_id:
+                return jsonify({'error': 'candidateId or skills is required'}), 400
+            from app.routes.candidate_routes import get_candidate
+            candidate = get_candidate(candidate_id)
+            if not candidate:
+                return jsonify({'error': 'Candidate not found'}), 404
+            skills = candidate.get('skills', [])
+            role = candidate.get('role', '')
+
+        question_bank = get_question_bank()
+        questions = question_bank.generate(
+            skills, role=role, seed=question_bank.seed_for(candidate_id or '', job_id)
+        )
+
+        return jsonify(questions), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error generating questions: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/generate-questions/batch', methods=['POST'])
+def generate_questions_batch():
+    """Generate interview question packs for a shortlist of candidates"""
+    try:
+        data = request.get_json(silent=True) or {}
+        job_id = data.get('jobId', '')
+
+        if 'candidates' in data:
+            profiles = data['candidates']
+            if not isinstance(profiles, list):
+                return jsonify({'error': 'candidates must be a list'}), 400
+            for profile in profiles:
+                error = _profile_error(profile)
+                if error:
+                    return jsonify({'error': error}), 400
+        else:
+            if not data.get('candidateIds'):
+                return jsonify({'error': 'No candidates selected'}), 400
+            from app.routes.candidate_routes import candidate_ids_error, get_candidates_by_ids
+            error = candidate_ids_error(data['candidateIds'])
+            if error:
+                return jsonify({'error': error}), 400
+            profiles = get_candidates_by_ids(data['candidateIds'])
+
+        if not profiles:
+            return jsonify({'error': 'No valid candidates found'}), 400
+
+        return jsonify({
+            'jobId': job_id,
+            'questions': get_question_bank().generate_batch(profiles, job_id=job_id)
+        }), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error generating question batch: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/scheduler/stats', methods=['GET'])
+def scheduler_stats():
+    """Batch size, queue depth and wait-time metrics of the analysis scheduler"""
+    try:
+        return jsonify(get_scheduler().stats()), 200
+    except Exception as e:
+        current_app.logger.error(f"Error getting scheduler stats: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
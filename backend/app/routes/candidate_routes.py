@@ -1,49 +1,104 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 import os
+import io
+import csv
 import json
+import threading
 from datetime import datetime
-from app.utils.mock_ai import MockAIModel
+from app.utils.batch_scheduler import SchedulerOverloaded, get_scheduler
+from app.utils.candidate_query import CandidateQuery, cursor_value
+from app.utils.candidate_snapshot import CandidateSnapshot, CandidateSnapshotStore
 
 bp = Blueprint('candidate', __name__, url_prefix='/api/candidates')
-mock_ai = MockAIModel()
 
 # Mock database - in a real application, this would be a database connection
-CANDIDATES_FILE = os.path.join(current_app.root_path, 'data', 'candidates.json')
+CANDIDATES_FILE = os.environ.get('CANDIDATES_FILE')
+# Columnar snapshot of CANDIDATES_FILE that every worker maps; defaults to a sibling .snapshot file
+CANDIDATES_SNAPSHOT = os.environ.get('CANDIDATES_SNAPSHOT')
+
+_snapshot_store = None
+_snapshot_store_lock = threading.Lock()
+
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_CSV_FIELDS = ['id', 'name', 'email', 'role', 'matchScore', 'skills', 'topSkill', 'resumeId', 'appliedDate']
+EXPORT_CHUNK_SIZE = 500
+
+@bp.record_once
+def init_candidate_store(state):
+    """Resolve the data file once the blueprint is registered on an app"""
+    global CANDIDATES_FILE
+    if not CANDIDATES_FILE:
+        CANDIDATES_FILE = os.path.join(state.app.root_path, 'data', 'candidates.json')
 
 def get_all_candidates():
     """Get all candidates from the mock database"""
+    # Materialized per call; callers may sort and modify the list
+    return get_snapshot().rows()
+
+def get_candidate(candidate_id):
+    """A single candidate by id, or None"""
+    snapshot = get_snapshot()
+    row = snapshot.find(candidate_id)
+    return None if row is None else snapshot.row(row)
+
+def get_candidates_by_ids(candidate_ids):
+    """Candidates with any of ``candidate_ids``, in file order"""
+    snapshot = get_snapshot()
+    rows = {snapshot.find(candidate_id) for candidate_id in set(candidate_ids)}
+    return snapshot.rows(sorted(row for row in rows if row is not None))
+
+def candidate_ids_error(candidate_ids):
+    """Why ``candidateIds`` from a request body is unusable, or None if it is a list of ids"""
+    if not isinstance(candidate_ids, list) or not all(isinstance(c, str) for c in candidate_ids):
+        return 'candidateIds must be a list of candidate ids'
+    return None
+
+def get_snapshot():
+    """Memory-mapped columnar snapshot of the candidates file, rebuilt when the file changes"""
     try:
-        if os.path.exists(CANDIDATES_FILE):
-            with open(CANDIDATES_FILE, 'r') as f:
-                return json.load(f)
-        else:
-            # Create mock data if file doesn't exist
-            candidates = [
-                {
-                    "id": f"c{i}",
-                    "name": f"Candidate {i}",
-                    "email": f"candidate{i}@example.com",
-                    "role": "Software Developer" if i % 3 == 0 else "UX Designer" if i % 3 == 1 else "Product Manager",
-                    "matchScore": 90 - (i % 20),
-                    "skills": ["JavaScript", "React", "Node.js"] if i % 3 == 0 else ["Figma", "UI/UX", "Wireframing"] if i % 3 == 1 else ["Agile", "Product Strategy", "User Research"],
-                    "topSkill": "JavaScript (4 years)" if i % 3 == 0 else "Figma (3 years)" if i % 3 == 1 else "Agile (5 years)",
-                    "resumeId": f"resume{i}",
-                    "appliedDate": (datetime.now().isoformat())
-                }
-                for i in range(1, 31)  # Create 30 mock candidates
-            ]
-            
-            # Ensure the data directory exists
-            os.makedirs(os.path.dirname(CANDIDATES_FILE), exist_ok=True)
-            
-            # Save mock data
-            with open(CANDIDATES_FILE, 'w') as f:
-                json.dump(candidates, f)
-            
-            return candidates
+        if not os.path.exists(CANDIDATES_FILE):
+            _create_mock_candidates()
+        return _current_store().current()
     except Exception as e:
         current_app.logger.error(f"Error getting candidates: {str(e)}")
-        return []
+        return CandidateSnapshot.from_candidates([])
+
+def _current_store():
+    global _snapshot_store
+    store = _snapshot_store
+    if store is None or store.source_path != CANDIDATES_FILE:
+        with _snapshot_store_lock:
+            if _snapshot_store is None or _snapshot_store.source_path != CANDIDATES_FILE:
+                snapshot_path = CANDIDATES_SNAPSHOT or os.path.splitext(CANDIDATES_FILE)[0] + '.snapshot'
+                _snapshot_store = CandidateSnapshotStore(CANDIDATES_FILE, snapshot_path)
+            store = _snapshot_store
+    return store
+
+def _create_mock_candidates():
+    """Create mock data if the file doesn't exist"""
+    candidates = [
+        {
+            "id": f"c{i}",
+            "name": f"Candidate {i}",
+            "email": f"candidate{i}@example.com",
+            "role": "Software Developer" if i % 3 == 0 else "UX Designer" if i % 3 == 1 else "Product Manager",
+            "matchScore": 90 - (i % 20),
+            "skills": ["JavaScript", "React", "Node.js"] if i % 3 == 0 else ["Figma", "UI/UX", "Wireframing"] if i % 3 == 1 else ["Agile", "Product Strategy", "User Research"],
+            "topSkill": "JavaScript (4 years)" if i % 3 == 0 else "Figma (3 years)" if i % 3 == 1 else "Agile (5 years)",
+            "resumeId": f"resume{i}",
+            "appliedDate": (datetime.now().isoformat())
+        }
+        for i in range(1, 31)  # Create 30 mock candidates
+    ]
+    
+    # Ensure the data directory exists
+    os.makedirs(os.path.dirname(CANDIDATES_FILE), exist_ok=True)
+    
+    # Save mock data; written aside and renamed so no worker reads a partial file
+    tmp_path = f'{CANDIDATES_FILE}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(candidates, f)
+    os.replace(tmp_path, CANDIDATES_FILE)
 
 @bp.route('/', methods=['GET'])
 def get_candidates():
@@ -52,50 +107,12 @@ def get_candidates():
         # Get query parameters
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 10))
-        search = request.args.get('search', '')
-        role_filter = request.args.get('role', 'all')
-        sort_by = request.args.get('sortBy', 'matchScore')
-        sort_order = request.args.get('sortOrder', 'desc')
-        
-        # Get all candidates
-        all_candidates = get_all_candidates()
-        
-        # Filter candidates
-        filtered_candidates = all_candidates
-        
-        # Apply search filter
-        if search:
-            search = search.lower()
-            filtered_candidates = [
-                c for c in filtered_candidates if 
-                search in c['name'].lower() or 
-                search in c['email'].lower() or 
-                search in c['role'].lower() or
-                any(search in skill.lower() for skill in c['skills'])
-            ]
-        
-        # Apply role filter
-        if role_filter != 'all':
-            filtered_candidates = [
-                c for c in filtered_candidates if 
-                role_filter.lower() in c['role'].lower()
-            ]
-        
-        # Sort candidates
-        if sort_by == 'name':
-            filtered_candidates.sort(key=lambda c: c['name'], reverse=(sort_order == 'desc'))
-        elif sort_by == 'matchScore':
-            filtered_candidates.sort(key=lambda c: c['matchScore'], reverse=(sort_order == 'desc'))
-        elif sort_by == 'appliedDate':
-            filtered_candidates.sort(key=lambda c: c['appliedDate'], reverse=(sort_order == 'desc'))
-        
-        # Calculate pagination
-        total_candidates = len(filtered_candidates)
-        total_pages = (total_candidates + limit - 1) // limit
+        query = CandidateQuery.from_args(request.args)
         
-        # Apply pagination
+        # Filter, sort and paginate over the shared columnar snapshot
         offset = (page - 1) * limit
-        paginated_candidates = filtered_candidates[offset:offset + limit]
+        total_candidates, paginated_candidates = query.page(get_snapshot(), offset, limit)
+        total_pages = (total_candidates + limit - 1) // limit
         
         # Return paginated results
         return jsonify({
@@ -108,16 +125,86 @@ def get_candidates():
             }
         }), 200
         
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {str(e)}'}), 400
     except Exception as e:
         current_app.logger.error(f"Error getting candidates: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@bp.route('/export', methods=['GET'])
+def export_candidates():
+    """Stream every matching candidate as NDJSON or CSV; ``after=<id>`` resumes an export"""
+    try:
+        export_format = request.args.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+        
+        query = CandidateQuery.from_args(request.args)
+        # One snapshot for the whole stream, even if the file is replaced meanwhile
+        snapshot = get_snapshot()
+        
+        # Keyset resume: continue just past the last candidate the client received. With
+        # that candidate's sort value as well, this works even if it was since removed or changed
+        after = request.args.get('after')
+        start = 0
+        if after:
+            if 'afterValue' in request.args:
+                value = cursor_value(query.sort_by, request.args['afterValue'])
+                start = query.position_after(snapshot, after, value)
+            else:
+                start = query.position_after(snapshot, after)
+            if start is None:
+                return jsonify({'error': f'Candidate {after} not found; restart the export'}), 400
+        
+        rows = query.iter_matches(snapshot, start)
+        if export_format == 'csv':
+            body = _csv_chunks(rows, header=not after)
+        else:
+            body = _ndjson_chunks(rows, current_app.json.dumps)
+        
+        response = Response(body, mimetype=EXPORT_FORMATS[export_format])
+        response.headers['Content-Disposition'] = f'attachment; filename=candidates.{export_format}'
+        return response
+        
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query: {str(e)}'}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error exporting candidates: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+def _ndjson_chunks(rows, dumps):
+    """One JSON object per line, yielded EXPORT_CHUNK_SIZE candidates at a time"""
+    chunk = []
+    for candidate in rows:
+        chunk.append(dumps(candidate))
+        if len(chunk) >= EXPORT_CHUNK_SIZE:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+def _csv_chunks(rows, header=True):
+    """CSV rows with skills joined by ';', yielded EXPORT_CHUNK_SIZE candidates at a time"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS, extrasaction='ignore')
+    if header:
+        writer.writeheader()
+    count = 0
+    for candidate in rows:
+        writer.writerow({**candidate, 'skills': ';'.join(candidate.get('skills', []))})
+        count += 1
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
 @bp.route('/<candidate_id>', methods=['GET'])
 def get_candidate_details(candidate_id):
     """Get detailed information about a specific candidate"""
     try:
-        all_candidates = get_all_candidates()
-        candidate = next((c for c in all_candidates if c['id'] == candidate_id), None)
+        candidate = get_candidate(candidate_id)
         
         if not candidate:
             return jsonify({'error': 'Candidate not found'}), 404
@@ -135,11 +222,17 @@ def get_candidate_details(candidate_id):
         resume_text += "- Frameworks: React, Node.js, Express, Django\n"
         resume_text += "- Tools: Git, Docker, AWS, Kubernetes\n"
         
-        # Extract skills using mock AI
-        skills = mock_ai.extract_skills(resume_text)
+        # Extract skills and sentiment in the same scheduler batch
+        skills_future = get_scheduler().submit('extract_skills', resume_text)
+        try:
+            sentiment_future = get_scheduler().submit('analyze_sentiment', resume_text)
+        except SchedulerOverloaded:
+            skills_future.cancel()
+            raise
+        skills = skills_future.result()
         
         # Analyze sentiment
-        sentiment = mock_ai.analyze_sentiment(resume_text)
+        sentiment = sentiment_future.result()
         
         # Mock education data
         education = [
@@ -201,12 +294,14 @@ def get_candidate_details(candidate_id):
             }
         }), 200
         
+    except SchedulerOverloaded:
+        raise
     except Exception as e:
         current_app.logger.error(f"Error getting candidate details: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
 @bp.route('/send-email', methods=['POST'])
-def send_email_to_candidates():
+async def send_email_to_candidates():
     """Send emails to selected candidates"""
     try:
         data = request.get_json()
@@ -221,24 +316,38 @@ def send_email_to_candidates():
             return jsonify({'error': 'Email message is required'}), 400
         
         candidate_ids = data['candidateIds']
+        error = candidate_ids_error(candidate_ids)
+        if error:
+            return jsonify({'error': error}), 400
         subject = data['subject']
         message = data['message']
         
-        # Get all candidates
-        all_candidates = get_all_candidates()
-        
-        # Filter selected candidates
-        selected_candidates = [c for c in all_candidates if c['id'] in candidate_ids]
+        # Look up the selected candidates
+        selected_candidates = get_candidates_by_ids(candidate_ids)
         
         if not selected_candidates:
             return jsonify({'error': 'No valid candidates found'}), 400
         
-        # In a real application, this would send actual emails
-        # For this mock implementation, we'll just return success
+        if not current_app.email_service.delivery_enabled:
+            # In a real application, this would send actual emails
+            # For this mock implementation, we'll just return success
+            return jsonify({
+                'message': f'Emails sent successfully to {len(selected_candidates)} candidates',
+                'sentTo': [{'id': c['id'], 'name': c['name'], 'email': c['email']} for c in selected_candidates]
+            }), 200
+        
+        # EMAIL_DELIVERY_ENABLED=1: send through the configured SMTP server, several sessions at a time
+        results = await current_app.email_service.send_bulk_emails_async(
+            [{'email': c['email'], 'name': c['name']} for c in selected_candidates],
+            subject,
+            message
+        )
+        sent = set(results['success'])
         
         return jsonify({
-            'message': f'Emails sent successfully to {len(selected_candidates)} candidates',
-            'sentTo': [{'id': c['id'], 'name': c['name'], 'email': c['email']} for c in selected_candidates]
+            'message': f'Emails sent successfully to {len(sent)} candidates',
+            'sentTo': [{'id': c['id'], 'name': c['name'], 'email': c['email']} for c in selected_candidates if c['email'] in sent],
+            'failed': results['failed']
         }), 200
         
     except Exception as e:
@@ -0,0 +1,161 @@
+from flask import Blueprint, Response, request, jsonify, current_app, g, abort
+import hmac
+import math
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from app.utils.batch_scheduler import WORKER_THREAD_NAME
+from app.utils.profiler import SamplingProfiler, ThreadRegistry, DEFAULT_HZ
+
+bp = Blueprint('debug', __name__, url_prefix='/debug')
+
+MAX_PROFILE_SECONDS = 60
+MAX_STORED_PROFILES = 50
+
+request_threads = ThreadRegistry()
+_profile_lock = threading.Lock()
+_request_profiles = OrderedDict()
+_request_profiles_lock = threading.Lock()
+
+@bp.record_once
+def track_async_views(state):
+    """Register the event-loop thread an async view runs on as a helper of its request thread"""
+    app = state.app
+    convert = app.async_to_sync
+
+    def async_to_sync(func):
+        def run(*args, **kwargs):
+            owner = threading.get_ident()
+            if owner not in request_threads.snapshot():
+                return convert(func)(*args, **kwargs)
+
+            async def tracked():
+                ident = threading.get_ident()
+                request_threads.add_helper(ident, owner, 'event-loop')
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    request_threads.discard_helper(ident)
+            return convert(tracked)()
+        return run
+
+    app.async_to_sync = async_to_sync
+
+def _profiler_token():
+    return current_app.config.get('PROFILER_TOKEN') or os.environ.get('PROFILER_TOKEN')
+
+def _helper_threads(owner=None):
+    """Event loops running async views (for ``owner`` if given) and the analysis batcher"""
+    helpers = request_threads.helpers(owner)
+    for thread in threading.enumerate():
+        if thread.name == WORKER_THREAD_NAME and thread.ident is not None:
+            helpers[thread.ident] = WORKER_THREAD_NAME
+    return helpers
+
+def _authorized():
+    """Profiling is disabled unless a token is configured and presented"""
+    token = _profiler_token()
+    if not token:
+        return False
+    presented = request.headers.get('X-Debug-Token', '')
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer '):
+        presented = auth[len('Bearer '):]
+    return hmac.compare_digest(presented.encode('utf-8'), token.encode('utf-8'))
+
+@bp.before_app_request
+def track_request_thread():
+    if not _profiler_token():
+        return
+    request_threads.add(threading.get_ident())
+    g.profiler_tracked = True
+
+    if request.headers.get('X-Profile') and _authorized():
+        caller = threading.get_ident()
+        try:
+            hz = float(request.headers.get('X-Profile-Hz', DEFAULT_HZ))
+        except ValueError:
+            hz = DEFAULT_HZ
+        g.request_profiler = SamplingProfiler(
+            lambda: (caller,), hz=hz, helpers=lambda: _helper_threads(caller)
+        ).start()
+
+@bp.after_app_request
+def attach_request_profile(response):
+    profiler = g.pop('request_profiler', None)
+    if profiler is None:
+        return response
+
+    profile = profiler.stop()
+    profile_id = uuid.uuid4().hex
+    with _request_profiles_lock:
+        _request_profiles[profile_id] = {'path': request.path, 'method': request.method, **profile.to_dict()}
+        while len(_request_profiles) > MAX_STORED_PROFILES:
+            _request_profiles.popitem(last=False)
+
+    response.headers['X-Profile-Id'] = profile_id
+    response.headers['X-Profile-Samples'] = str(profile.samples)
+    top = profile.top(1)
+    if top:
+        response.headers['X-Profile-Top'] = top[0]['function'][:200]
+    return response
+
+@bp.teardown_app_request
+def untrack_request_thread(exc):
+    profiler = g.pop('request_profiler', None)
+    if profiler is not None:
+        profiler.stop()
+    if g.pop('profiler_tracked', False):
+        request_threads.discard(threading.get_ident())
+
+@bp.route('/profile', methods=['GET'])
+def profile_workers():
+    """Sample the stacks of all request threads, and the threads working for them, for ?seconds=N"""
+    if not _authorized():
+        abort(404)
+
+    try:
+        seconds = float(request.args.get('seconds', 5))
+        hz = float(request.args.get('hz', DEFAULT_HZ))
+        limit = int(request.args.get('top', 20))
+    except ValueError:
+        return jsonify({'error': 'seconds, hz and top must be numbers'}), 400
+    if not (math.isfinite(seconds) and math.isfinite(hz)):
+        return jsonify({'error': 'seconds and hz must be finite'}), 400
+    if seconds <= 0:
+        return jsonify({'error': 'seconds must be positive'}), 400
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+
+    if not _profile_lock.acquire(blocking=False):
+        return jsonify({'error': 'A profile is already running in this worker'}), 409
+    try:
+        caller = threading.get_ident()
+        profiler = SamplingProfiler(
+            lambda: [ident for ident in request_threads.snapshot() if ident != caller], hz=hz,
+            helpers=_helper_threads
+        )
+        profile = profiler.run_for(seconds)
+    finally:
+        _profile_lock.release()
+
+    current_app.logger.info(f"Collected {profile.samples} profile samples over {seconds}s")
+
+    if request.args.get('format') == 'collapsed':
+        return Response(profile.collapsed(), mimetype='text/plain')
+    return jsonify({'pid': os.getpid(), **profile.to_dict(limit)}), 200
+
+@bp.route('/profile/<profile_id>', methods=['GET'])
+def get_request_profile(profile_id):
+    """Fetch the profile recorded for a request sent with an X-Profile header"""
+    if not _authorized():
+        abort(404)
+
+    with _request_profiles_lock:
+        profile = _request_profiles.get(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+
+    if request.args.get('format') == 'collapsed':
+        return Response(profile['collapsed'], mimetype='text/plain')
+    return jsonify(profile), 200
@@ -0,0 +1,58 @@
+from flask import Blueprint, Response, request, g
+import time
+from app.utils.batch_scheduler import current_scheduler
+from app.utils.metrics import registry, REQUEST_LATENCY, REQUESTS_IN_FLIGHT, RESPONSE_SIZE
+
+bp = Blueprint('metrics', __name__)
+
+SCHEDULER_QUEUE_DEPTH = registry.gauge(
+    'analysis_scheduler_queue_depth', 'Analysis calls waiting for a batch')
+SCHEDULER_AVG_BATCH_SIZE = registry.gauge(
+    'analysis_scheduler_avg_batch_size', 'Average analysis batch size since startup')
+SCHEDULER_AVG_WAIT = registry.gauge(
+    'analysis_scheduler_avg_wait_seconds', 'Average time an analysis call waits for its batch')
+
+def _refresh_scheduler_gauges():
+    # A scrape reports the scheduler without being the thing that loads the backend
+    scheduler = current_scheduler()
+    if scheduler is None:
+        return
+    stats = scheduler.stats()
+    SCHEDULER_QUEUE_DEPTH.set(stats['queueDepth'])
+    SCHEDULER_AVG_BATCH_SIZE.set(stats['avgBatchSize'])
+    SCHEDULER_AVG_WAIT.set(stats['avgWaitMs'] / 1000.0)
+
+registry.add_collect_hook(_refresh_scheduler_gauges)
+
+def _endpoint_label():
+    """Route template rather than raw path, to keep label cardinality bounded"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@bp.before_app_request
+def start_request_timer():
+    g.metrics_start = time.perf_counter()
+    g.metrics_endpoint = _endpoint_label()
+    REQUESTS_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+@bp.after_app_request
+def record_request_metrics(response):
+    start = g.get('metrics_start')
+    if start is not None:
+        endpoint = g.metrics_endpoint
+        REQUEST_LATENCY.observe(time.perf_counter() - start, method=request.method,
+                                endpoint=endpoint, status=response.status_code)
+        if response.content_length is not None:
+            RESPONSE_SIZE.observe(response.content_length, method=request.method, endpoint=endpoint)
+    return response
+
+@bp.teardown_app_request
+def finish_request(exc):
+    # Runs even when the view raised, so the in-flight gauge never leaks
+    endpoint = g.pop('metrics_endpoint', None)
+    if endpoint is not None:
+        REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose metrics in the Prometheus text format"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -1,15 +1,95 @@
 from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
+import asyncio
+import math
 import os
 from app.utils.file_processor import FileProcessor
-from app.utils.mock_ai import MockAIModel
+from app.utils.chunked_upload import ChunkedUploadStore, UploadError
+from app.utils.batch_scheduler import SchedulerOverloaded, get_scheduler
+from app.utils.batch_jobs import BatchJobStore
+from app.utils.executors import run_blocking
+from app.utils.reanalysis import SkillReanalysis, VocabularyStore
 
 bp = Blueprint('resume', __name__, url_prefix='/api/resume')
-file_processor = FileProcessor(os.path.join(current_app.root_path, 'uploads'))
-mock_ai = MockAIModel()
+file_processor = None
+upload_sessions = None
+vocabularies = None
+batch_jobs = BatchJobStore()
+
+BATCH_METHODS = ('analyze_resume', 'extract_skills', 'analyze_sentiment')
+# A long-poll holds its request thread (Flask runs async views on it), so it stays short
+MAX_BATCH_WAIT_SECONDS = float(os.environ.get('BATCH_JOB_MAX_WAIT', 5))
+MAX_SENTIMENT_BATCH_SIZE = int(os.environ.get('SENTIMENT_BATCH_MAX_SIZE', 256))
+# Well under the scheduler's queue depth, so one job cannot crowd out interactive requests
+MAX_BATCH_JOB_SIZE = int(os.environ.get('BATCH_JOB_MAX_SIZE', 256))
+
+@bp.record_once
+def init_resume_routes(state):
+    """Create the upload folder once the blueprint is registered on an app"""
+    global file_processor, upload_sessions, vocabularies
+    file_processor = FileProcessor(os.path.join(state.app.root_path, 'uploads'))
+    upload_sessions = ChunkedUploadStore(
+        os.path.join(state.app.root_path, 'uploads', 'sessions'),
+        file_processor.blob_store,
+        file_processor.check_file_type,
+        max_size=int(os.environ.get('CHUNKED_UPLOAD_MAX_SIZE', 100 * 1024 * 1024)),
+        max_chunk_size=int(os.environ.get('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 8 * 1024 * 1024)),
+        ttl_seconds=float(os.environ.get('CHUNKED_UPLOAD_TTL_SECONDS', 24 * 3600))
+    )
+    batch_jobs.directory = os.path.join(state.app.root_path, 'data', 'jobs')
+    vocabularies = VocabularyStore(os.path.join(state.app.root_path, 'data', 'reanalysis', 'vocabularies'))
+
+def skill_reanalysis(workers: int = 1, batch_size: int = 64) -> SkillReanalysis:
+    """Job that updates stored upload skills to the backend's current vocabulary"""
+    return SkillReanalysis(
+        file_processor.blob_store,
+        vocabularies,
+        get_scheduler().backend,
+        os.path.join(os.path.dirname(vocabularies.directory), 'checkpoint.json'),
+        batch_size=batch_size,
+        workers=workers
+    )
+
+def _analysis_result_kind() -> str:
+    """Cache key for upload analyses, so switching backends never serves stale results"""
+    backend = type(get_scheduler().backend)
+    return f"analysis:{backend.__module__}.{backend.__qualname__}"
+
+async def _analyze_blob(blob):
+    """Analysis for stored content, reusing the result for byte-identical files; returns (data, error)"""
+    try:
+        # A byte-identical upload was analyzed before: reuse that result
+        result_kind = _analysis_result_kind()
+        skills_kind = await run_blocking(vocabularies.current_kind, get_scheduler().backend)
+        resume_data = await run_blocking(file_processor.cached_result, blob.digest, result_kind)
+        skills = await run_blocking(file_processor.cached_result, blob.digest, skills_kind)
+        if resume_data is None or skills is None:
+            # Read file content
+            success, content, error = await run_blocking(file_processor.read_file_content, blob)
+            if not success:
+                return None, error
+            
+            # Analyze resume using the configured analysis backend; skills are stored
+            # separately so a vocabulary change only reanalyzes the resumes it touches
+            pending = {}
+            if resume_data is None:
+                pending['analysis'] = get_scheduler().acall('analyze_resume', content)
+            if skills is None:
+                pending['skills'] = get_scheduler().acall('extract_skills', content)
+            results = dict(zip(pending, await asyncio.gather(*pending.values())))
+            if 'analysis' in results:
+                resume_data = results['analysis']
+                await run_blocking(file_processor.store_result, blob, result_kind, resume_data)
+            if 'skills' in results:
+                skills = results['skills']
+                await run_blocking(file_processor.store_result, blob, skills_kind, skills)
+        return {**resume_data, 'skills': skills}, None
+    finally:
+        # Release the file; it is removed once no other upload holds it
+        await run_blocking(file_processor.cleanup_file, blob)
 
 @bp.route('/upload', methods=['POST'])
-def upload_resume():
+async def upload_resume():
     """Handle resume file upload and initial processing"""
     try:
         if 'file' not in request.files:
@@ -17,30 +97,125 @@ def upload_resume():
         
         file = request.files['file']
         
-        # Save and validate file
-        success, file_path, error = file_processor.save_file(file)
+        # Store by content hash and validate file
+        success, blob, error = await run_blocking(file_processor.save_file, file)
         if not success:
             return jsonify({'error': error}), 400
         
-        # Read file content
-        success, content, error = file_processor.read_file_content(file_path)
-        if not success:
-            file_processor.cleanup_file(file_path)
+        resume_data, error = await _analyze_blob(blob)
+        if error:
             return jsonify({'error': error}), 400
         
-        # Analyze resume using mock AI
-        resume_data = mock_ai.analyze_resume(content)
+        return jsonify({
+            'message': 'Resume processed successfully',
+            'data': resume_data
+        }), 200
+        
+    except SchedulerOverloaded:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Error processing resume: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/uploads', methods=['POST'])
+def create_upload_session():
+    """Start a resumable chunked upload; returns the upload id and chunk size"""
+    try:
+        data = request.get_json()
+        if not data or not data.get('filename') or not isinstance(data.get('size'), int):
+            return jsonify({'error': 'filename and size are required'}), 400
+        
+        if not file_processor.allowed_file(data['filename']):
+            return jsonify({'error': 'File type not allowed'}), 400
         
-        # Clean up the file
-        file_processor.cleanup_file(file_path)
+        session = upload_sessions.create(secure_filename(data['filename']), data['size'], data.get('sha256'))
+        
+        return jsonify(session), 201
+        
+    except UploadError as e:
+        return jsonify({'error': e.message, **e.details}), e.status
+    except Exception as e:
+        current_app.logger.error(f"Error creating upload session: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/uploads/<upload_id>', methods=['GET'])
+def get_upload_session(upload_id):
+    """Upload progress; ``offset`` is where a resumed upload continues"""
+    try:
+        return jsonify(upload_sessions.status(upload_id)), 200
+        
+    except UploadError as e:
+        return jsonify({'error': e.message, **e.details}), e.status
+    except Exception as e:
+        current_app.logger.error(f"Error getting upload session: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """Append the request body at ``?offset=``; ``X-Chunk-SHA256`` must match it"""
+    try:
+        checksum = request.headers.get('X-Chunk-SHA256')
+        if not checksum:
+            return jsonify({'error': 'X-Chunk-SHA256 header is required'}), 400
+        
+        try:
+            offset = int(request.args.get('offset', ''))
+        except ValueError:
+            return jsonify({'error': 'offset must be a byte offset'}), 400
+        session = upload_sessions.append(upload_id, offset, request.stream, checksum)
+        
+        return jsonify(session), 200
+        
+    except UploadError as e:
+        return jsonify({'error': e.message, **e.details}), e.status
+    except Exception as e:
+        current_app.logger.error(f"Error receiving upload chunk: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/uploads/<upload_id>/complete', methods=['POST'])
+async def complete_upload_session(upload_id):
+    """Finish a chunked upload and analyze it like a regular upload"""
+    try:
+        blob, digest = await run_blocking(upload_sessions.complete, upload_id)
+        
+        if blob is None:
+            # Completed before (the client missed the reply): return the recorded result
+            resume_data = await run_blocking(file_processor.cached_result, digest, _analysis_result_kind())
+            skills_kind = await run_blocking(vocabularies.current_kind, get_scheduler().backend)
+            skills = await run_blocking(file_processor.cached_result, digest, skills_kind)
+            if resume_data is None or skills is None:
+                return jsonify({'error': 'Upload already completed'}), 410
+            resume_data = {**resume_data, 'skills': skills}
+        else:
+            resume_data, error = await _analyze_blob(blob)
+            if error:
+                return jsonify({'error': error}), 400
         
         return jsonify({
             'message': 'Resume processed successfully',
             'data': resume_data
         }), 200
         
+    except UploadError as e:
+        return jsonify({'error': e.message, **e.details}), e.status
+    except SchedulerOverloaded:
+        raise
     except Exception as e:
-        current_app.logger.error(f"Error processing resume: {str(e)}")
+        current_app.logger.error(f"Error completing upload: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload_session(upload_id):
+    """Abandon a chunked upload and discard its data"""
+    try:
+        upload_sessions.abort(upload_id)
+        
+        return jsonify({'message': 'Upload aborted'}), 200
+        
+    except UploadError as e:
+        return jsonify({'error': e.message, **e.details}), e.status
+    except Exception as e:
+        current_app.logger.error(f"Error aborting upload: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
 @bp.route('/analyze', methods=['POST'])
@@ -51,14 +226,18 @@ def analyze_resume():
         if not data or 'content' not in data:
             return jsonify({'error': 'No content provided'}), 400
         
-        # Extract skills
-        skills = mock_ai.extract_skills(data['content'])
-        
-        # Analyze sentiment
-        sentiment = mock_ai.analyze_sentiment(data['content'])
-        
-        # Analyze candidate
-        candidate_analysis = mock_ai.analyze_candidate(data)
+        # Queue skills, sentiment and candidate analysis together so they share one batching window
+        futures = []
+        try:
+            for method, payload in (('extract_skills', data['content']),
+                                    ('analyze_sentiment', data['content']),
+                                    ('analyze_candidate', data)):
+                futures.append(get_scheduler().submit(method, payload))
+        except SchedulerOverloaded:
+            for future in futures:
+                future.cancel()
+            raise
+        skills, sentiment, candidate_analysis = (future.result() for future in futures)
         
         return jsonify({
             'skills': skills,
@@ -66,6 +245,8 @@ def analyze_resume():
             'candidate_analysis': candidate_analysis
         }), 200
         
+    except SchedulerOverloaded:
+        raise
     except Exception as e:
         current_app.logger.error(f"Error analyzing resume: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
@@ -78,12 +259,14 @@ def extract_skills():
         if not data or 'content' not in data:
             return jsonify({'error': 'No content provided'}), 400
         
-        skills = mock_ai.extract_skills(data['content'])
+        skills = get_scheduler().call('extract_skills', data['content'])
         
         return jsonify({
             'skills': skills
         }), 200
         
+    except SchedulerOverloaded:
+        raise
     except Exception as e:
         current_app.logger.error(f"Error extracting skills: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
@@ -96,12 +279,91 @@ def analyze_sentiment():
         if not data or 'content' not in data:
             return jsonify({'error': 'No content provided'}), 400
         
-        sentiment = mock_ai.analyze_sentiment(data['content'])
+        sentiment = get_scheduler().call('analyze_sentiment', data['content'])
         
         return jsonify({
             'sentiment': sentiment
         }), 200
         
+    except SchedulerOverloaded:
+        raise
     except Exception as e:
         current_app.logger.error(f"Error analyzing sentiment: {str(e)}")
-        return jsonify({'error': 'Internal server error'}), 500 
\ No newline at end of file
+        return jsonify({'error': 'Internal server error'}), 500 
+@bp.route('/sentiment/batch', methods=['POST'])
+def analyze_sentiment_batch():
+    """Analyze sentiment of many resume documents in one call"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('contents'), list):
+            return jsonify({'error': 'No contents provided'}), 400
+        if not all(isinstance(content, str) for content in data['contents']):
+            return jsonify({'error': 'contents must be a list of strings'}), 400
+        if len(data['contents']) > MAX_SENTIMENT_BATCH_SIZE:
+            return jsonify({
+                'error': 'Too many contents in one batch',
+                'maxBatchSize': MAX_SENTIMENT_BATCH_SIZE
+            }), 413
+        
+        sentiments = get_scheduler().map('analyze_sentiment', data['contents'])
+        
+        return jsonify({
+            'sentiments': sentiments
+        }), 200
+        
+    except SchedulerOverloaded:
+        raise
+    except Exception as e:
+        current_app.logger.error(f"Error analyzing sentiment batch: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/batch', methods=['POST'])
+def create_batch_job():
+    """Queue many documents for analysis and return a job id to poll"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('contents'), list) or not data['contents']:
+            return jsonify({'error': 'No contents provided'}), 400
+        if not all(isinstance(content, str) for content in data['contents']):
+            return jsonify({'error': 'contents must be a list of strings'}), 400
+        if len(data['contents']) > MAX_BATCH_JOB_SIZE:
+            return jsonify({
+                'error': 'Too many contents in one batch',
+                'maxBatchSize': MAX_BATCH_JOB_SIZE
+            }), 413
+        
+        method = data.get('method', 'analyze_resume')
+        if method not in BATCH_METHODS:
+            return jsonify({'error': f"method must be one of: {', '.join(BATCH_METHODS)}"}), 400
+        
+        job = batch_jobs.submit(get_scheduler(), method, data['contents'])
+        
+        return jsonify(job.status()), 202
+        
+    except Exception as e:
+        current_app.logger.error(f"Error creating batch job: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/batch/<job_id>', methods=['GET'])
+async def get_batch_job(job_id):
+    """Batch job progress; ``?wait=<seconds>`` long-polls (briefly) until the job completes"""
+    try:
+        wait = float(request.args.get('wait', 0))
+        if not math.isfinite(wait):
+            raise ValueError(wait)
+        wait = min(max(wait, 0), MAX_BATCH_WAIT_SECONDS)
+        
+        if wait > 0:
+            await batch_jobs.wait(job_id, wait)
+        
+        status = await run_blocking(batch_jobs.status, job_id)
+        if status is None:
+            return jsonify({'error': 'Batch job not found'}), 404
+        
+        return jsonify(status), 200
+        
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error getting batch job: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
@@ -0,0 +1,275 @@
+import fcntl
+import json
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import g, jsonify, request
+
+from app.utils.metrics import registry
+
+ADMITTED = registry.counter(
+    'admission_admitted_total', 'Requests admitted by admission control', ('endpoint', 'queued'))
+REJECTED = registry.counter(
+    'admission_rejected_total', 'Requests shed by admission control', ('endpoint', 'reason'))
+IN_FLIGHT = registry.gauge(
+    'admission_in_flight', 'Admitted requests currently holding a concurrency slot', ('endpoint',))
+QUEUED = registry.gauge(
+    'admission_queue_depth', 'Requests waiting for a concurrency slot', ('endpoint',))
+LIMITS = registry.gauge(
+    'admission_limit', 'Configured admission limits (host-wide)', ('endpoint', 'limit'), mode='max')
+QUEUE_WAIT = registry.histogram(
+    'admission_queue_wait_seconds', 'Time admitted requests spent waiting for a slot', ('endpoint',))
+STORE_ERRORS = registry.counter(
+    'admission_store_errors_total', 'Rate-limit store failures (requests were admitted)', ('endpoint',))
+
+_CPUS = os.cpu_count() or 2
+# Single-document analysis is micro-batched, so those endpoints need enough
+# concurrent requests in flight to fill a batch; a CPU-sized cap starves it.
+_BATCH = int(os.environ.get('ANALYSIS_MAX_BATCH_SIZE', 32))
+
+# Endpoint -> limits. concurrency/queue are host-wide (all workers); rate/burst are per client.
+DEFAULT_POLICIES = {
+    'resume.upload_resume': {'concurrency': _BATCH, 'queue': 2 * _BATCH, 'maxWait': 2.0, 'rate': 2.0, 'burst': 20},
+    'resume.analyze_resume': {'concurrency': _BATCH, 'queue': 2 * _BATCH, 'maxWait': 2.0, 'rate': 5.0, 'burst': 50},
+    'resume.analyze_sentiment_batch': {'concurrency': _CPUS, 'queue': _CPUS, 'maxWait': 2.0, 'rate': 1.0, 'burst': 10},
+    'resume.create_batch_job': {'rate': 1.0, 'burst': 10},
+    # Chunked uploads: sessions count against the upload rate, completion runs the analysis
+    'resume.create_upload_session': {'rate': 2.0, 'burst': 20},
+    'resume.complete_upload_session': {'concurrency': _BATCH, 'queue': 2 * _BATCH, 'maxWait': 2.0}
+}
+
+
+class AdmissionPolicy:
+    """Limits for one endpoint; a limit left as None is not enforced"""
+
+    def __init__(self, endpoint: str, concurrency: Optional[int] = None, queue: int = 0,
+                 maxWait: float = 1.0, rate: Optional[float] = None, burst: Optional[float] = None,
+                 retryAfter: float = 1.0):
+        self.endpoint = endpoint
+        self.concurrency = concurrency
+        self.queue = queue
+        self.max_wait = maxWait
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.retry_after = retryAfter
+
+
+class SlotPool:
+    """Host-wide counting semaphore built from ``size`` flock'd files.
+
+    A slot is held by keeping an exclusive lock on one of the files. The
+    kernel drops the lock when the holder closes it or its process dies,
+    so a crashed worker never leaks a slot.
+    """
+
+    def __init__(self, directory: str, name: str, size: int):
+        self.paths = [os.path.join(directory, f'{name}.{i}.lock') for i in range(size)]
+
+    def try_acquire(self) -> Optional[int]:
+        """Return a held file descriptor, or None when every slot is taken"""
+        start = random.randrange(len(self.paths)) if self.paths else 0
+        for i in range(len(self.paths)):
+            fd = os.open(self.paths[(start + i) % len(self.paths)], os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    @staticmethod
+    def release(fd: int):
+        os.close(fd)
+
+
+class TokenBucketStore:
+    """Per-client token buckets in SQLite, shared by every worker on the host"""
+
+    PRUNE_EVERY = 1000
+    IDLE_SECONDS = 3600
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._calls = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # Never reuse a connection inherited across fork
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute('CREATE TABLE IF NOT EXISTS buckets '
+                         '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """Spend ``cost`` tokens; returns 0 when allowed, else seconds until it would be"""
+        with self._lock:
+            conn = self._connection()
+            now = time.time()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+                tokens = burst if row is None else min(burst, row[0] + max(now - row[1], 0.0) * rate)
+                if tokens >= cost:
+                    tokens -= cost
+                    wait = 0.0
+                else:
+                    wait = (cost - tokens) / rate
+                conn.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                             (key, tokens, now))
+                self._calls += 1
+                if self._calls % self.PRUNE_EVERY == 0:
+                    conn.execute('DELETE FROM buckets WHERE updated < ?', (now - self.IDLE_SECONDS,))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            return wait
+
+
+class AdmissionController:
+    """Rate limits, then bounds concurrency with a short wait queue, per endpoint.
+
+    Over a client's rate the request gets 429. With every slot busy it waits
+    in a bounded queue for up to ``maxWait`` seconds; a full queue or a wait
+    that runs out gets 503. Both carry Retry-After.
+    """
+
+    POLL_INTERVAL = 0.005
+    MAX_POLL_INTERVAL = 0.05
+
+    def __init__(self, directory: str, policies: Dict[str, dict]):
+        os.makedirs(directory, exist_ok=True)
+        self.policies: Dict[str, AdmissionPolicy] = {}
+        self.slots: Dict[str, SlotPool] = {}
+        self.tickets: Dict[str, SlotPool] = {}
+        for endpoint, limits in policies.items():
+            policy = AdmissionPolicy(endpoint, **limits)
+            self.policies[endpoint] = policy
+            name = endpoint.replace('.', '_')
+            if policy.concurrency:
+                self.slots[endpoint] = SlotPool(directory, f'{name}.slot', policy.concurrency)
+                self.tickets[endpoint] = SlotPool(directory, f'{name}.queue', policy.queue)
+                LIMITS.set(policy.concurrency, endpoint=endpoint, limit='concurrency')
+                LIMITS.set(policy.queue, endpoint=endpoint, limit='queue')
+            if policy.rate:
+                LIMITS.set(policy.rate, endpoint=endpoint, limit='rate')
+                LIMITS.set(policy.burst, endpoint=endpoint, limit='burst')
+        self.buckets = TokenBucketStore(os.path.join(directory, 'buckets.sqlite3'))
+
+    def admit(self, endpoint: str, client: str):
+        """Return None to admit (holding a slot in ``g``), or a rejection response"""
+        policy = self.policies.get(endpoint)
+        if policy is None:
+            return None
+
+        if policy.rate:
+            try:
+                wait = self.buckets.take(f'{endpoint}:{client}', policy.rate, policy.burst)
+            except sqlite3.Error:
+                # Fail open: a broken limiter must not take the endpoint down with it
+                STORE_ERRORS.inc(endpoint=endpoint)
+                wait = 0.0
+            if wait > 0:
+                REJECTED.inc(endpoint=endpoint, reason='rate_limited')
+                return _reject(429, 'Too many requests', wait)
+
+        pool = self.slots.get(endpoint)
+        if pool is None:
+            ADMITTED.inc(endpoint=endpoint, queued='false')
+            return None
+
+        fd = pool.try_acquire()
+        if fd is not None:
+            ADMITTED.inc(endpoint=endpoint, queued='false')
+        else:
+            fd = self._wait_for_slot(policy, pool)
+            if fd is None:
+                return _reject(503, 'Server busy', policy.retry_after)
+        g.admission_slot = (endpoint, fd)
+        IN_FLIGHT.inc(endpoint=endpoint)
+        return None
+
+    def _wait_for_slot(self, policy: AdmissionPolicy, pool: SlotPool) -> Optional[int]:
+        endpoint = policy.endpoint
+        ticket = self.tickets[endpoint].try_acquire()
+        if ticket is None:
+            REJECTED.inc(endpoint=endpoint, reason='queue_full')
+            return None
+        QUEUED.inc(endpoint=endpoint)
+        started = time.monotonic()
+        deadline = started + policy.max_wait
+        interval = self.POLL_INTERVAL
+        try:
+            while True:
+                fd = pool.try_acquire()
+                if fd is not None:
+                    QUEUE_WAIT.observe(time.monotonic() - started, endpoint=endpoint)
+                    ADMITTED.inc(endpoint=endpoint, queued='true')
+                    return fd
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    REJECTED.inc(endpoint=endpoint, reason='queue_timeout')
+                    return None
+                time.sleep(min(interval * random.uniform(0.5, 1.5), remaining))
+                interval = min(interval * 2, self.MAX_POLL_INTERVAL)
+        finally:
+            QUEUED.dec(endpoint=endpoint)
+            SlotPool.release(ticket)
+
+    def release(self):
+        held = g.pop('admission_slot', None)
+        if held is not None:
+            endpoint, fd = held
+            SlotPool.release(fd)
+            IN_FLIGHT.dec(endpoint=endpoint)
+
+
+def _reject(status: int, message: str, retry_after: float):
+    seconds = max(int(math.ceil(retry_after)), 1)
+    response = jsonify({'error': message, 'retryAfter': seconds})
+    response.status_code = status
+    response.headers['Retry-After'] = str(seconds)
+    return response
+
+
+def load_policies() -> Dict[str, dict]:
+    """DEFAULT_POLICIES with per-endpoint overrides from ``ADMISSION_POLICIES`` (JSON)"""
+    policies = {endpoint: dict(limits) for endpoint, limits in DEFAULT_POLICIES.items()}
+    overrides = json.loads(os.environ.get('ADMISSION_POLICIES', '{}'))
+    for endpoint, limits in overrides.items():
+        if limits is None:
+            policies.pop(endpoint, None)
+        else:
+            policies.setdefault(endpoint, {}).update(limits)
+    return policies
+
+
+def configure_admission(app) -> Optional[AdmissionController]:
+    """Attach admission control to the app's request hooks (ADMISSION_ENABLED=0 to skip)"""
+    if os.environ.get('ADMISSION_ENABLED', '1') == '0':
+        return None
+    directory = os.environ.get('ADMISSION_DIR') or os.path.join(app.root_path, 'data', 'admission')
+    controller = AdmissionController(directory, load_policies())
+
+    @app.before_request
+    def admit_request():
+        if request.endpoint in controller.policies:
+            return controller.admit(request.endpoint, request.remote_addr or 'unknown')
+
+    @app.teardown_request
+    def release_admission(exc):
+        controller.release()
+
+    app.admission = controller
+    return controller
@@ -0,0 +1,62 @@
+import importlib
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List
+
+DEFAULT_BACKEND = 'app.utils.mock_ai:MockAIModel'
+
+
+class AnalysisBackend(ABC):
+    """Interface every resume analysis model implements.
+
+    Backends only have to provide the single-document methods. A backend that
+    can do better than a loop (e.g. a local model taking a padded batch)
+    overrides ``<method>_batch`` and the scheduler will use it.
+    """
+
+    BATCH_METHODS = ('analyze_resume', 'extract_skills', 'analyze_sentiment', 'analyze_candidate')
+
+    @abstractmethod
+    def analyze_resume(self, text: str) -> Dict[str, Any]:
+        """Extract structured resume data"""
+
+    @abstractmethod
+    def extract_skills(self, text: str) -> List[str]:
+        """Extract skills from resume text"""
+
+    @abstractmethod
+    def analyze_sentiment(self, text: str) -> Dict[str, Any]:
+        """Analyze sentiment of resume text"""
+
+    @abstractmethod
+    def analyze_candidate(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Score a candidate from resume data"""
+
+    def skill_vocabulary(self) -> Dict[str, List[str]]:
+        """Skills ``extract_skills`` can return, by category; empty if it has no fixed list"""
+        return {}
+
+    def skill_aliases(self) -> Dict[str, str]:
+        """Other spellings ``extract_skills`` reports as a vocabulary skill, e.g. ``{"k8s": "Kubernetes"}``"""
+        return {}
+
+    def run_batch(self, method: str, payloads: List[Any]) -> List[Any]:
+        """Run ``method`` over a list of payloads, preferring a batch method"""
+        if method not in self.BATCH_METHODS:
+            raise ValueError(f"Unknown analysis method: {method}")
+        batch_method = getattr(self, f"{method}_batch", None)
+        if batch_method is not None:
+            return batch_method(payloads)
+        single = getattr(self, method)
+        return [single(payload) for payload in payloads]
+
+
+def load_backend(spec: str = None) -> AnalysisBackend:
+    """Instantiate the backend named by ``module:Class`` (or $ANALYSIS_BACKEND)"""
+    spec = spec or os.environ.get('ANALYSIS_BACKEND', DEFAULT_BACKEND)
+    module_name, _, class_name = spec.partition(':')
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    backend = backend_class()
+    if not isinstance(backend, AnalysisBackend):
+        raise TypeError(f"{spec} does not implement AnalysisBackend")
+    return backend
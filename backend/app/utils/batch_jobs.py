@@ -0,0 +1,219 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.utils.executors import get_io_executor, run_blocking
+
+
+class BatchJob:
+    """One batch of analysis calls running through the scheduler"""
+
+    def __init__(self, method: str, total: int):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.total = total
+        self.created_at = datetime.now().isoformat()
+        self.finished_at = None
+        self.results: List[Any] = [None] * total
+        self.errors: Dict[int, str] = {}
+        self.completed = 0
+        self._lock = threading.Lock()
+        self._waiters = []
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= self.total
+
+    def item_done(self, index: int, future) -> bool:
+        """Record one finished call; returns True when it was the last one"""
+        error = future.exception()
+        with self._lock:
+            if error is None:
+                self.results[index] = future.result()
+            else:
+                self.errors[index] = str(error)
+            self.completed += 1
+            if not self.done:
+                return False
+            self.finished_at = datetime.now().isoformat()
+            waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                # The waiting request gave up and its event loop is gone
+                pass
+        return True
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for the job to finish.
+
+        This frees the event loop, not the thread: Flask runs an async view
+        to completion on the request thread, so callers keep ``timeout`` short.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        entry = (loop, waiter)
+        with self._lock:
+            if self.done:
+                return True
+            self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            status = {
+                'jobId': self.id,
+                'method': self.method,
+                'status': 'completed' if self.done else 'running',
+                'total': self.total,
+                'completed': self.completed,
+                'failed': len(self.errors),
+                'createdAt': self.created_at,
+                'finishedAt': self.finished_at
+            }
+            if self.done:
+                status['results'] = list(self.results)
+                status['errors'] = [{'index': i, 'error': e} for i, e in sorted(self.errors.items())]
+        return status
+
+
+def _resolve(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class BatchJobStore:
+    """Tracks batch jobs submitted to this process.
+
+    Progress lives in memory in the worker that accepted the job. Each job's
+    status is also written to ``directory`` when it starts and when it
+    finishes, so any worker can answer a status request.
+    """
+
+    # How often a worker that did not accept a job re-reads its status file while waiting
+    POLL_INTERVAL = 0.25
+
+    def __init__(self, directory: Optional[str] = None, max_jobs: int = 256, ttl_seconds: float = 86400):
+        self.directory = directory
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self._jobs: 'OrderedDict[str, BatchJob]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, scheduler, method: str, payloads: List[Any]) -> BatchJob:
+        """Queue every payload on the scheduler and return the job tracking them"""
+        job = BatchJob(method, len(payloads))
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        self._persist(job)
+
+        def on_done(index, future):
+            if job.item_done(index, future):
+                # Runs on the scheduler thread; keep file I/O off it
+                get_io_executor().submit(self._persist, job)
+
+        for index, payload in enumerate(payloads):
+            try:
+                future = scheduler.submit(method, payload)
+            except Exception as e:
+                # e.g. SchedulerOverloaded: report the item as failed rather than lose it
+                future = Future()
+                future.set_exception(e)
+            future.add_done_callback(lambda f, index=index: on_done(index, f))
+        return job
+
+    def job(self, job_id: str) -> Optional[BatchJob]:
+        """The in-memory job, if this process accepted it"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for a job to finish; False if it is still running or unknown.
+
+        A job accepted by another worker is followed through its status file,
+        which is rewritten when the job finishes.
+        """
+        job = self.job(job_id)
+        if job is not None:
+            return await job.wait(timeout)
+        deadline = time.monotonic() + timeout
+        while True:
+            status = await run_blocking(self._file_status, job_id)
+            if status is None:
+                return False
+            if status.get('status') == 'completed':
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(self.POLL_INTERVAL, remaining))
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.job(job_id)
+        if job is not None:
+            return job.status()
+        return self._file_status(job_id)
+
+    def _file_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        path = self._path(job_id)
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _evict(self):
+        """Drop the oldest finished jobs beyond ``max_jobs`` (caller holds the lock)"""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].done:
+                del self._jobs[job_id]
+
+    def _path(self, job_id: str) -> Optional[str]:
+        # Job ids are uuid4 hex; anything else never names a file
+        if self.directory is None or len(job_id) != 32 or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        return os.path.join(self.directory, f'{job_id}.json')
+
+    def _persist(self, job: BatchJob):
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(job.status(), f)
+            os.replace(tmp_path, self._path(job.id))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        if job.done:
+            self._prune()
+
+    def _prune(self):
+        """Remove job files older than ``ttl_seconds``"""
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                pass
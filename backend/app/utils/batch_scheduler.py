@@ -0,0 +1,237 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+from app.utils.analysis_backend import AnalysisBackend, load_backend
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+WORKER_THREAD_NAME = 'analysis-batcher'
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when the scheduler queue is full; the app answers it with 503"""
+
+    # Seconds a client should back off; the queue drains within a few batch windows
+    retry_after = 1
+
+
+class _Request:
+    __slots__ = ('method', 'payload', 'future', 'enqueued_at')
+
+    def __init__(self, method: str, payload: Any):
+        self.method = method
+        self.payload = payload
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class BatchScheduler:
+    """Collects analysis calls from many request threads into micro-batches.
+
+    A single worker thread takes the first queued request, then keeps
+    collecting until ``max_batch_size`` requests are in hand or ``max_wait_ms``
+    has passed since the first one arrived. The batch is grouped by method,
+    run through ``backend.run_batch`` and the results are fanned back out to
+    the waiting futures.
+    """
+
+    def __init__(self, backend: AnalysisBackend, max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0, max_queue_depth: int = 1024):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_depth = max_queue_depth
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._worker = None
+        self._pid = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._stats = {
+            'requests': 0,
+            'rejected': 0,
+            'batches': 0,
+            'batchedRequests': 0,
+            'errors': 0,
+            'maxQueueDepth': 0,
+            'waitMsSum': 0.0,
+            'waitMsMax': 0.0,
+            'batchSizeBuckets': [0] * (len(BATCH_SIZE_BUCKETS) + 1),
+            'waitMsBuckets': [0] * (len(WAIT_MS_BUCKETS) + 1)
+        }
+
+    def _ensure_worker(self):
+        """Start the worker lazily, and again in a forked child process"""
+        if self._worker is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker is not None and self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue_depth)
+            self._pid = os.getpid()
+            self._reset_stats()
+            self._worker = threading.Thread(target=self._run, name=WORKER_THREAD_NAME, daemon=True)
+            self._worker.start()
+
+    def submit(self, method: str, payload: Any) -> Future:
+        """Queue one analysis call and return a future for its result"""
+        self._ensure_worker()
+        request = _Request(method, payload)
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise SchedulerOverloaded(f"Analysis queue is full ({self.max_queue_depth} pending)")
+        with self._lock:
+            self._stats['requests'] += 1
+            depth = self._queue.qsize()
+            if depth > self._stats['maxQueueDepth']:
+                self._stats['maxQueueDepth'] = depth
+        return request.future
+
+    def call(self, method: str, payload: Any, timeout: Optional[float] = None) -> Any:
+        """Submit one call and block until its result is available"""
+        return self.submit(method, payload).result(timeout)
+
+    def submit_all(self, method: str, payloads: List[Any]) -> List[Future]:
+        """Queue every call or none of them.
+
+        If the queue fills part-way, the calls already queued are cancelled
+        (the worker skips cancelled futures) before SchedulerOverloaded is
+        raised, so a rejected batch leaves no orphaned work behind.
+        """
+        if len(payloads) > self.max_queue_depth:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise SchedulerOverloaded(f"{len(payloads)} calls exceed the analysis queue ({self.max_queue_depth})")
+        futures = []
+        try:
+            for payload in payloads:
+                futures.append(self.submit(method, payload))
+        except SchedulerOverloaded:
+            for future in futures:
+                future.cancel()
+            raise
+        return futures
+
+    def map(self, method: str, payloads: List[Any], timeout: Optional[float] = None) -> List[Any]:
+        """Submit many calls at once and wait for all of them"""
+        futures = self.submit_all(method, payloads)
+        return [future.result(timeout) for future in futures]
+
+    async def acall(self, method: str, payload: Any) -> Any:
+        """Submit one call and await its result without holding a thread"""
+        return await asyncio.wrap_future(self.submit(method, payload))
+
+    async def amap(self, method: str, payloads: List[Any]) -> List[Any]:
+        """Submit many calls at once and await all of them"""
+        futures = [asyncio.wrap_future(future) for future in self.submit_all(method, payloads)]
+        return list(await asyncio.gather(*futures))
+
+    def _collect(self) -> List[_Request]:
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            self._record_batch(batch, started)
+
+            by_method: Dict[str, List[_Request]] = {}
+            for request in batch:
+                by_method.setdefault(request.method, []).append(request)
+
+            for method, requests in by_method.items():
+                # Skip callers that gave up while waiting
+                requests = [r for r in requests if r.future.set_running_or_notify_cancel()]
+                if not requests:
+                    continue
+                try:
+                    results = self.backend.run_batch(method, [r.payload for r in requests])
+                    if len(results) != len(requests):
+                        raise RuntimeError(f"{method} batch returned {len(results)} results for {len(requests)} inputs")
+                except Exception as e:
+                    with self._lock:
+                        self._stats['errors'] += 1
+                    for request in requests:
+                        request.future.set_exception(e)
+                    continue
+                for request, result in zip(requests, results):
+                    request.future.set_result(result)
+
+    def _record_batch(self, batch: List[_Request], started: float):
+        with self._lock:
+            stats = self._stats
+            stats['batches'] += 1
+            stats['batchedRequests'] += len(batch)
+            stats['batchSizeBuckets'][_bucket_index(BATCH_SIZE_BUCKETS, len(batch))] += 1
+            for request in batch:
+                wait_ms = (started - request.enqueued_at) * 1000.0
+                stats['waitMsSum'] += wait_ms
+                stats['waitMsMax'] = max(stats['waitMsMax'], wait_ms)
+                stats['waitMsBuckets'][_bucket_index(WAIT_MS_BUCKETS, wait_ms)] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of batch size, queue depth and wait time metrics"""
+        with self._lock:
+            stats = {key: list(value) if isinstance(value, list) else value
+                     for key, value in self._stats.items()}
+        stats['queueDepth'] = self._queue.qsize() if self._queue is not None else 0
+        stats['avgBatchSize'] = round(stats['batchedRequests'] / stats['batches'], 2) if stats['batches'] else 0
+        stats['avgWaitMs'] = round(stats['waitMsSum'] / max(stats['batchedRequests'], 1), 3)
+        stats['batchSizeBuckets'] = dict(zip([str(b) for b in BATCH_SIZE_BUCKETS] + ['+Inf'], stats['batchSizeBuckets']))
+        stats['waitMsBuckets'] = dict(zip([str(b) for b in WAIT_MS_BUCKETS] + ['+Inf'], stats['waitMsBuckets']))
+        stats['maxBatchSize'] = self.max_batch_size
+        stats['maxWaitMs'] = self.max_wait * 1000.0
+        stats['backend'] = type(self.backend).__name__
+        return stats
+
+
+def _bucket_index(bounds, value) -> int:
+    for i, bound in enumerate(bounds):
+        if value <= bound:
+            return i
+    return len(bounds)
+
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def get_scheduler() -> BatchScheduler:
+    """Process-wide scheduler over the configured analysis backend"""
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_lock:
+            if _default_scheduler is None:
+                _default_scheduler = BatchScheduler(
+                    load_backend(),
+                    max_batch_size=int(os.environ.get('ANALYSIS_MAX_BATCH_SIZE', 32)),
+                    max_wait_ms=float(os.environ.get('ANALYSIS_MAX_WAIT_MS', 5)),
+                    max_queue_depth=int(os.environ.get('ANALYSIS_MAX_QUEUE_DEPTH', 1024))
+                )
+    return _default_scheduler
+
+
+def current_scheduler() -> Optional[BatchScheduler]:
+    """The process-wide scheduler if something has already created it, else None"""
+    return _default_scheduler
@@ -0,0 +1,259 @@
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+class BiasAccumulator:
+    """Mergeable per-group sufficient statistics for adverse-impact analysis.
+
+    Everything the detector reports (selection rates, score moments and score
+    histograms) is derived from these sums, so a pool can be fed in one array
+    or in chunks of any size and produce the same result.
+    """
+
+    def __init__(self, score_range=(0.0, 100.0), bins: int = 20):
+        self.edges = np.linspace(score_range[0], score_range[1], bins + 1)
+        self.bins = bins
+        self.groups: List[str] = []
+        self._group_index: Dict[str, int] = {}
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.selected = np.zeros(0, dtype=np.int64)
+        self.score_sum = np.zeros(0, dtype=np.float64)
+        self.score_sq_sum = np.zeros(0, dtype=np.float64)
+        self.histograms = np.zeros((0, bins), dtype=np.int64)
+
+    def _codes_for(self, labels: np.ndarray) -> np.ndarray:
+        """Map group labels to stable accumulator indices, growing as needed"""
+        uniques, inverse = np.unique(labels, return_inverse=True)
+        return self._indices_for(uniques.tolist())[inverse.reshape(-1)]
+
+    def _indices_for(self, labels: List[str]) -> np.ndarray:
+        """Accumulator index of each label, registering new ones in the given order"""
+        mapping = np.empty(len(labels), dtype=np.int64)
+        for i, label in enumerate(labels):
+            index = self._group_index.get(label)
+            if index is None:
+                index = len(self.groups)
+                self._group_index[label] = index
+                self.groups.append(label)
+            mapping[i] = index
+
+        grow = len(self.groups) - len(self.counts)
+        if grow > 0:
+            self.counts = np.concatenate([self.counts, np.zeros(grow, dtype=np.int64)])
+            self.selected = np.concatenate([self.selected, np.zeros(grow, dtype=np.int64)])
+            self.score_sum = np.concatenate([self.score_sum, np.zeros(grow)])
+            self.score_sq_sum = np.concatenate([self.score_sq_sum, np.zeros(grow)])
+            self.histograms = np.vstack([self.histograms, np.zeros((grow, self.bins), dtype=np.int64)])
+
+        return mapping
+
+    def update(self, groups, scores, selected=None, threshold: Optional[float] = None):
+        """Add a chunk of candidates.
+
+        Either pass a boolean ``selected`` mask or a score ``threshold`` at or
+        above which a candidate counts as selected.
+        """
+        labels = np.asarray(groups, dtype=str)
+        scores = np.asarray(scores, dtype=np.float64)
+        if labels.shape != scores.shape:
+            raise ValueError("groups and scores must have the same length")
+        if labels.size == 0:
+            return self
+        return self._add(self._codes_for(labels), scores, selected, threshold)
+
+    def update_coded(self, labels: List[str], codes, scores, selected=None, threshold: Optional[float] = None):
+        """Like ``update`` with groups given as ``labels[codes]``, e.g. a dictionary-encoded column"""
+        codes = np.asarray(codes)
+        scores = np.asarray(scores, dtype=np.float64)
+        if codes.shape != scores.shape:
+            raise ValueError("codes and scores must have the same length")
+        if codes.size == 0:
+            return self
+        # Register the groups present in sorted order, as ``update`` does
+        present = np.flatnonzero(np.bincount(codes, minlength=len(labels)))
+        mapping = np.zeros(len(labels), dtype=np.int64)
+        ordered = sorted(present.tolist(), key=labels.__getitem__)
+        mapping[ordered] = self._indices_for([labels[i] for i in ordered])
+        return self._add(mapping[codes], scores, selected, threshold)
+
+    def _add(self, codes: np.ndarray, scores: np.ndarray, selected, threshold: Optional[float]):
+        if selected is None:
+            if threshold is None:
+                raise ValueError("Either selected or threshold is required")
+            selected = scores >= threshold
+        selected = np.asarray(selected, dtype=bool)
+
+        n_groups = len(self.groups)
+        self.counts += np.bincount(codes, minlength=n_groups)
+        self.selected += np.bincount(codes, weights=selected, minlength=n_groups).astype(np.int64)
+        self.score_sum += np.bincount(codes, weights=scores, minlength=n_groups)
+        self.score_sq_sum += np.bincount(codes, weights=scores * scores, minlength=n_groups)
+
+        bin_idx = np.clip(np.searchsorted(self.edges, scores, side='right') - 1, 0, self.bins - 1)
+        flat = np.bincount(codes * self.bins + bin_idx, minlength=n_groups * self.bins)
+        self.histograms += flat.reshape(n_groups, self.bins)
+        return self
+
+    def merge(self, other: 'BiasAccumulator'):
+        """Fold another accumulator (e.g. from a parallel chunk) into this one"""
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge accumulators with different score bins")
+        codes = self._codes_for(np.asarray(other.groups, dtype=str)) if other.groups else np.zeros(0, dtype=np.int64)
+        np.add.at(self.counts, codes, other.counts)
+        np.add.at(self.selected, codes, other.selected)
+        np.add.at(self.score_sum, codes, other.score_sum)
+        np.add.at(self.score_sq_sum, codes, other.score_sq_sum)
+        np.add.at(self.histograms, codes, other.histograms)
+        return self
+
+
+class BiasDetector:
+    """Adverse-impact and score-divergence analysis over a candidate pool"""
+
+    FOUR_FIFTHS = 0.8
+
+    def __init__(self, score_range=(0.0, 100.0), bins: int = 20,
+                 significance: float = 0.05, divergence_threshold: float = 0.2,
+                 min_group_size: int = 5):
+        self.score_range = score_range
+        self.bins = bins
+        self.significance = significance
+        self.divergence_threshold = divergence_threshold
+        self.min_group_size = min_group_size
+
+    def accumulator(self) -> BiasAccumulator:
+        """Create an empty accumulator matching this detector's binning"""
+        return BiasAccumulator(self.score_range, self.bins)
+
+    def analyze(self, groups, scores, selected=None, threshold: Optional[float] = None) -> Dict[str, Any]:
+        """Analyze a whole shortlist held in memory"""
+        acc = self.accumulator().update(groups, scores, selected=selected, threshold=threshold)
+        return self.report(acc)
+
+    def analyze_coded(self, labels: List[str], codes, scores, threshold: float) -> Dict[str, Any]:
+        """Analyze a pool whose groups are dictionary-encoded as ``labels[codes]``"""
+        acc = self.accumulator().update_coded(labels, codes, scores, threshold=threshold)
+        return self.report(acc)
+
+    def analyze_stream(self, chunks: Iterable, threshold: Optional[float] = None) -> Dict[str, Any]:
+        """Analyze a pool delivered as an iterable of chunks.
+
+        Each chunk is ``(groups, scores)`` or ``(groups, scores, selected)``.
+        Memory use is bounded by the chunk size plus the per-group statistics.
+        """
+        acc = self.accumulator()
+        for chunk in chunks:
+            if len(chunk) == 3:
+                acc.update(chunk[0], chunk[1], selected=chunk[2])
+            else:
+                acc.update(chunk[0], chunk[1], threshold=threshold)
+        return self.report(acc)
+
+    def analyze_candidates(self, candidates: List[Dict[str, Any]], group_key: str = 'role',
+                           score_key: str = 'matchScore', threshold: float = 75.0) -> Dict[str, Any]:
+        """Analyze a list of candidate dicts grouped by ``group_key``"""
+        groups = [str(c.get(group_key, 'unknown')) for c in candidates]
+        scores = [float(c.get(score_key) or 0) for c in candidates]
+        if any('selected' in c for c in candidates):
+            selected = [bool(c.get('selected')) for c in candidates]
+            return self.analyze(groups, scores, selected=selected)
+        return self.analyze(groups, scores, threshold=threshold)
+
+    def report(self, acc: BiasAccumulator) -> Dict[str, Any]:
+        """Derive the bias report from accumulated statistics"""
+        counts = acc.counts.astype(np.float64)
+        total = counts.sum()
+        if total == 0:
+            return self._empty_report()
+
+        selected = acc.selected.astype(np.float64)
+        safe_counts = np.maximum(counts, 1)
+        rates = selected / safe_counts
+        eligible = counts >= self.min_group_size
+
+        # Four-fifths rule: each group's selection rate against the highest
+        reference_rate = rates[eligible].max() if eligible.any() else rates.max()
+        impact_ratios = rates / reference_rate if reference_rate > 0 else np.ones_like(rates)
+
+        # Two-proportion z-test of each group against the rest of the pool
+        rest_counts = total - counts
+        rest_rates = (selected.sum() - selected) / np.maximum(rest_counts, 1)
+        pooled = selected.sum() / total
+        std_err = np.sqrt(pooled * (1 - pooled) * (1 / safe_counts + 1 / np.maximum(rest_counts, 1)))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = np.where(std_err > 0, (rates - rest_rates) / std_err, 0.0)
+        p_values = np.array([math.erfc(abs(z) / math.sqrt(2)) for z in z_scores])
+
+        # Score distributions: mean gap in pooled standard deviations and the
+        # Kolmogorov-Smirnov distance of each group's histogram to the rest
+        means = acc.score_sum / safe_counts
+        overall_mean = acc.score_sum.sum() / total
+        overall_var = max(acc.score_sq_sum.sum() / total - overall_mean ** 2, 0.0)
+        overall_std = math.sqrt(overall_var) or 1.0
+        standardized_gaps = (means - overall_mean) / overall_std
+
+        group_cdf = np.cumsum(acc.histograms, axis=1) / safe_counts[:, None]
+        rest_hist = acc.histograms.sum(axis=0)[None, :] - acc.histograms
+        rest_cdf = np.cumsum(rest_hist, axis=1) / np.maximum(rest_counts, 1)[:, None]
+        ks_distances = np.abs(group_cdf - rest_cdf).max(axis=1)
+
+        adverse = eligible & (impact_ratios < self.FOUR_FIFTHS) & (p_values < self.significance)
+        divergent = eligible & (rest_counts > 0) & (ks_distances > self.divergence_threshold)
+
+        groups = []
+        for i, name in enumerate(acc.groups):
+            groups.append({
+                'group': name,
+                'count': int(counts[i]),
+                'selected': int(selected[i]),
+                'selectionRate': round(float(rates[i]), 4),
+                'impactRatio': round(float(impact_ratios[i]), 4),
+                'pValue': round(float(p_values[i]), 6),
+                'meanScore': round(float(means[i]), 2),
+                'standardizedGap': round(float(standardized_gaps[i]), 4),
+                'ksDistance': round(float(ks_distances[i]), 4),
+                'adverseImpact': bool(adverse[i]),
+                'scoreDivergence': bool(divergent[i])
+            })
+
+        if adverse.any():
+            bias_type = 'adverse_impact'
+            confidence = 1 - float(p_values[adverse].min())
+        elif divergent.any():
+            bias_type = 'score_distribution'
+            confidence = float(ks_distances[divergent].max())
+        elif eligible.any():
+            # Confidence in the finding itself: one minus the strongest evidence
+            # of adverse impact, which only groups below four-fifths can show
+            bias_type = 'none'
+            short = eligible & (impact_ratios < self.FOUR_FIFTHS)
+            confidence = float(p_values[short].min()) if short.any() else 1.0
+        else:
+            # No group is large enough to tell either way
+            bias_type = 'none'
+            confidence = 0.0
+
+        return {
+            'biasDetection': {
+                'hasBias': bias_type != 'none',
+                'biasType': bias_type,
+                'confidence': round(confidence, 4)
+            },
+            'totalCandidates': int(total),
+            'totalSelected': int(selected.sum()),
+            'groups': groups
+        }
+
+    def _empty_report(self) -> Dict[str, Any]:
+        return {
+            'biasDetection': {
+                'hasBias': False,
+                'biasType': 'none',
+                'confidence': 0.0
+            },
+            'totalCandidates': 0,
+            'totalSelected': 0,
+            'groups': []
+        }
@@ -0,0 +1,403 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Set
+
+from app.utils.metrics import registry
+
+BLOB_PUTS = registry.counter(
+    'blob_store_puts_total', 'Blobs stored, by whether the content was already present', ('result',))
+DERIVED_LOOKUPS = registry.counter(
+    'blob_store_derived_lookups_total', 'Derived-value lookups by content hash', ('kind', 'result'))
+
+CHUNK_SIZE = 64 * 1024
+
+# Terms for the text index: maximal runs of ASCII letters and digits, lower-cased
+TERM_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def text_terms(text: str) -> Set[str]:
+    return set(TERM_PATTERN.findall(text.lower()))
+
+
+class BlobTooLarge(ValueError):
+    """The stream exceeded the size limit passed to ``BlobStore.put``"""
+
+
+class Blob:
+    """A reference to stored content; release it with ``BlobStore.release``"""
+
+    def __init__(self, digest: str, path: str, size: int, created: bool):
+        self.digest = digest
+        self.path = path
+        self.size = size
+        self.created = created
+
+    def open(self) -> BinaryIO:
+        return open(self.path, 'rb')
+
+
+class BlobStore:
+    """Content-addressed files keyed by SHA-256, with reference counts.
+
+    Content is hashed while it is streamed to a temporary file, then renamed
+    into ``objects/<2 hex>/<rest>``, so readers never see a partial blob and
+    identical uploads share one file. Reference counts and values derived
+    from a blob (extracted text, analysis) live in a SQLite index; every
+    change to a blob file happens inside an index write transaction, which
+    keeps concurrent workers consistent. A blob is deleted when its last
+    reference is released, but its derived values are kept (up to
+    ``max_derived`` entries, least recently used dropped first) so a later
+    upload of the same bytes can reuse them.
+    """
+
+    PRUNE_EVERY = 500
+    # Recency updates from cache hits are held in memory and written in one transaction
+    TOUCH_BATCH = 256
+    TOUCH_INTERVAL = 30.0
+    # How often a process checks for references held by processes that have died
+    REAP_INTERVAL = 300.0
+
+    def __init__(self, root: str, max_derived: int = 10000):
+        self.root = root
+        self.max_derived = max_derived
+        self.objects_dir = os.path.join(root, 'objects')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.index_path = os.path.join(root, 'index.sqlite3')
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+        self._touched: Dict[tuple, float] = {}
+        self._touched_since = 0.0
+        self._last_reap = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            # Never reuse a connection inherited across fork
+            conn = sqlite3.connect(self.index_path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS blobs '
+                         '(digest TEXT PRIMARY KEY, size INTEGER NOT NULL, refcount INTEGER NOT NULL)')
+            conn.execute('CREATE TABLE IF NOT EXISTS derived '
+                         '(digest TEXT NOT NULL, kind TEXT NOT NULL, value TEXT NOT NULL, used REAL NOT NULL, '
+                         'PRIMARY KEY (digest, kind))')
+            conn.execute('CREATE INDEX IF NOT EXISTS derived_used ON derived (used)')
+            conn.execute('CREATE TABLE IF NOT EXISTS terms '
+                         '(term TEXT NOT NULL, digest TEXT NOT NULL, PRIMARY KEY (term, digest)) WITHOUT ROWID')
+            conn.execute('CREATE INDEX IF NOT EXISTS terms_digest ON terms (digest)')
+            conn.execute('CREATE TABLE IF NOT EXISTS indexed (digest TEXT PRIMARY KEY)')
+            # References per holding process, so those of a process that died can be dropped
+            conn.execute('CREATE TABLE IF NOT EXISTS holders '
+                         '(digest TEXT NOT NULL, pid INTEGER NOT NULL, count INTEGER NOT NULL, '
+                         'PRIMARY KEY (digest, pid)) WITHOUT ROWID')
+            self._conn, self._pid = conn, os.getpid()
+            # Recency noted before a fork belongs to the parent
+            self._touched = {}
+        return self._conn
+
+    def _write(self, func):
+        """Run ``func(conn)`` in an IMMEDIATE transaction (serialized across processes).
+
+        Pending recency updates ride along, so they are on disk before any
+        write that could prune by them.
+        """
+        with self._lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                touched = self._touched
+                if touched:
+                    conn.executemany('UPDATE derived SET used = MAX(used, ?) WHERE digest = ? AND kind = ?',
+                                     [(used, digest, kind) for (digest, kind), used in touched.items()])
+                result = func(conn)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            self._touched = {}
+            return result
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def put(self, stream: BinaryIO, max_size: Optional[int] = None) -> Blob:
+        """Store ``stream`` and take a reference to it"""
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise BlobTooLarge(f'content exceeds {max_size} bytes')
+                    hasher.update(chunk)
+                    tmp.write(chunk)
+            return self.adopt(tmp_path, hasher.hexdigest(), size)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def adopt(self, source_path: str, digest: str, size: int) -> Blob:
+        """Move an already hashed file (on the same filesystem) into the store and take a reference.
+
+        The source file is consumed: renamed into place, or deleted when the
+        store already holds the same content.
+        """
+        blob_path = self.path(digest)
+
+        pid = os.getpid()
+
+        def add_reference(conn):
+            conn.execute('INSERT INTO holders (digest, pid, count) VALUES (?, ?, 1) '
+                         'ON CONFLICT (digest, pid) DO UPDATE SET count = count + 1', (digest, pid))
+            updated = conn.execute('UPDATE blobs SET refcount = refcount + 1 WHERE digest = ?',
+                                   (digest,)).rowcount
+            if updated and os.path.exists(blob_path):
+                return False
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(source_path, blob_path)
+            if not updated:
+                conn.execute('INSERT INTO blobs (digest, size, refcount) VALUES (?, ?, 1)', (digest, size))
+            return True
+
+        if time.time() - self._last_reap >= self.REAP_INTERVAL:
+            self.reap_dead_holders()
+        created = self._write(add_reference)
+        if not created:
+            os.remove(source_path)
+        BLOB_PUTS.inc(result='new' if created else 'duplicate')
+        return Blob(digest, blob_path, size, created)
+
+    def release(self, blob: Blob) -> bool:
+        """Drop a reference; returns True if that removed the blob's file"""
+        pid = os.getpid()
+
+        def drop_reference(conn):
+            conn.execute('UPDATE holders SET count = count - 1 WHERE digest = ? AND pid = ?', (blob.digest, pid))
+            conn.execute('DELETE FROM holders WHERE digest = ? AND pid = ? AND count <= 0', (blob.digest, pid))
+            conn.execute('UPDATE blobs SET refcount = refcount - 1 WHERE digest = ?', (blob.digest,))
+            return self._delete_unreferenced(conn, [blob.digest]) > 0
+
+        return self._write(drop_reference)
+
+    def _delete_unreferenced(self, conn, digests: List[str]) -> int:
+        """Delete the files and rows of ``digests`` that no longer have references"""
+        removed = 0
+        for digest in digests:
+            row = conn.execute('SELECT refcount FROM blobs WHERE digest = ?', (digest,)).fetchone()
+            if row is None or row[0] > 0:
+                continue
+            conn.execute('DELETE FROM blobs WHERE digest = ?', (digest,))
+            try:
+                os.remove(self.path(digest))
+            except FileNotFoundError:
+                pass
+            removed += 1
+        return removed
+
+    def reap_dead_holders(self) -> int:
+        """Drop references held by processes that exited without releasing them.
+
+        A worker that crashes while holding a blob would otherwise keep it
+        forever. Holders are process ids on this host, which is the only
+        host that can share the index. Returns the number of blobs removed.
+        """
+        self._last_reap = time.time()
+
+        def reap(conn):
+            dead = [pid for pid, in conn.execute('SELECT DISTINCT pid FROM holders').fetchall()
+                    if not _process_alive(pid)]
+            digests = set()
+            for pid in dead:
+                rows = conn.execute('SELECT digest, count FROM holders WHERE pid = ?', (pid,)).fetchall()
+                conn.executemany('UPDATE blobs SET refcount = refcount - ? WHERE digest = ?',
+                                 [(count, digest) for digest, count in rows])
+                conn.execute('DELETE FROM holders WHERE pid = ?', (pid,))
+                digests.update(digest for digest, _ in rows)
+            return self._delete_unreferenced(conn, sorted(digests))
+
+        return self._write(reap)
+
+    def refcount(self, digest: str) -> int:
+        with self._lock:
+            row = self._connection().execute('SELECT refcount FROM blobs WHERE digest = ?', (digest,)).fetchone()
+        return row[0] if row else 0
+
+    def get_derived(self, digest: str, kind: str) -> Optional[Any]:
+        """A value previously recorded for this content, or None"""
+        with self._lock:
+            row = self._connection().execute('SELECT value FROM derived WHERE digest = ? AND kind = ?',
+                                             (digest, kind)).fetchone()
+        DERIVED_LOOKUPS.inc(kind=kind.partition(':')[0], result='miss' if row is None else 'hit')
+        if row is None:
+            return None
+        # A hit is a read; its recency is noted here and written with the next batch
+        now = time.time()
+        with self._lock:
+            if not self._touched:
+                self._touched_since = now
+            self._touched[(digest, kind)] = now
+            due = len(self._touched) >= self.TOUCH_BATCH or now - self._touched_since >= self.TOUCH_INTERVAL
+        if due:
+            self.flush_recency()
+        return json.loads(row[0])
+
+    def flush_recency(self):
+        """Write recency noted by cache hits since the last write"""
+        try:
+            self._write(lambda conn: None)
+        except sqlite3.OperationalError:
+            # Recency is best effort; a busy index must not fail the read
+            pass
+
+    def set_derived(self, digest: str, kind: str, value: Any):
+        """Record a JSON-serializable value computed from this content"""
+        encoded = json.dumps(value)
+
+        def upsert(conn):
+            conn.execute('INSERT OR REPLACE INTO derived (digest, kind, value, used) VALUES (?, ?, ?, ?)',
+                         (digest, kind, encoded, time.time()))
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                conn.execute('DELETE FROM derived WHERE rowid IN '
+                             '(SELECT rowid FROM derived ORDER BY used DESC LIMIT -1 OFFSET ?)',
+                             (self.max_derived,))
+
+        self._write(upsert)
+
+    def derived_kinds(self, prefix: str) -> Dict[str, int]:
+        """Record count per derived kind starting with ``prefix``"""
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT kind, COUNT(*) FROM derived WHERE kind >= ? AND kind < ? GROUP BY kind',
+                (prefix, prefix + '\uffff')).fetchall()
+        return dict(rows)
+
+    def derived_digests(self, kind: str) -> Set[str]:
+        with self._lock:
+            rows = self._connection().execute('SELECT digest FROM derived WHERE kind = ?', (kind,)).fetchall()
+        return {digest for digest, in rows}
+
+    def digests_with_derived(self, digests: Iterable[str], kind: str) -> Set[str]:
+        """Those of ``digests`` that have a ``kind`` record, without reading the values"""
+        digests = list(digests)
+        present = set()
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(digests), 500):
+                batch = digests[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT digest FROM derived WHERE kind = ? AND digest IN ({','.join('?' * len(batch))})",
+                    (kind, *batch)).fetchall()
+                present.update(digest for digest, in rows)
+        return present
+
+    def get_derived_many(self, digests: Iterable[str], kind: str) -> Dict[str, Any]:
+        """Values of ``kind`` for many digests at once, without touching their recency"""
+        digests = list(digests)
+        values = {}
+        with self._lock:
+            conn = self._connection()
+            for start in range(0, len(digests), 500):
+                batch = digests[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT digest, value FROM derived WHERE kind = ? AND digest IN ({','.join('?' * len(batch))})",
+                    (kind, *batch)).fetchall()
+                values.update((digest, json.loads(value)) for digest, value in rows)
+        return values
+
+    def replace_derived(self, old_kind: str, new_kind: str, values: Dict[str, Any]):
+        """Atomically record ``new_kind`` values and drop the ``old_kind`` records they supersede"""
+        now = time.time()
+
+        def swap(conn):
+            conn.executemany('INSERT OR REPLACE INTO derived (digest, kind, value, used) VALUES (?, ?, ?, ?)',
+                             [(digest, new_kind, json.dumps(value), now) for digest, value in values.items()])
+            conn.executemany('DELETE FROM derived WHERE digest = ? AND kind = ?',
+                             [(digest, old_kind) for digest in values])
+
+        self._write(swap)
+
+    def rename_derived(self, old_kind: str, new_kind: str, digests: Iterable[str]):
+        """Re-key records from ``old_kind`` to ``new_kind`` without changing their values"""
+        self._write(lambda conn: conn.executemany(
+            'UPDATE OR REPLACE derived SET kind = ? WHERE digest = ? AND kind = ?',
+            [(new_kind, digest, old_kind) for digest in digests]))
+
+    def delete_derived(self, kind: str, digests: Iterable[str]):
+        self._write(lambda conn: conn.executemany(
+            'DELETE FROM derived WHERE digest = ? AND kind = ?', [(digest, kind) for digest in digests]))
+
+    def index_pending_texts(self, batch_size: int = 200) -> int:
+        """Add recorded texts that are not in the term index yet; returns how many were added.
+
+        Texts are indexed here rather than when they are recorded, so uploads
+        do not pay for it. Postings for texts that have since been evicted
+        are dropped on the way.
+        """
+        added = 0
+        while True:
+            with self._lock:
+                rows = self._connection().execute(
+                    "SELECT d.digest, d.value FROM derived d LEFT JOIN indexed i ON i.digest = d.digest "
+                    "WHERE d.kind = 'text' AND i.digest IS NULL LIMIT ?", (batch_size,)).fetchall()
+            if not rows:
+                break
+            postings = [(term, digest) for digest, value in rows for term in text_terms(json.loads(value))]
+
+            def insert(conn):
+                conn.executemany('INSERT OR IGNORE INTO terms (term, digest) VALUES (?, ?)', postings)
+                conn.executemany('INSERT OR IGNORE INTO indexed (digest) VALUES (?)', [(d,) for d, _ in rows])
+
+            self._write(insert)
+            added += len(rows)
+
+        def drop_evicted(conn):
+            evicted = conn.execute("SELECT digest FROM indexed WHERE digest NOT IN "
+                                   "(SELECT digest FROM derived WHERE kind = 'text')").fetchall()
+            conn.executemany('DELETE FROM terms WHERE digest = ?', evicted)
+            conn.executemany('DELETE FROM indexed WHERE digest = ?', evicted)
+
+        self._write(drop_evicted)
+        return added
+
+    def digests_with_terms(self, term_groups: List[List[str]], kind: str) -> Set[str]:
+        """Digests holding a ``kind`` record whose text contains every term of at least one group"""
+        found = set()
+        with self._lock:
+            conn = self._connection()
+            for terms in term_groups:
+                terms = sorted(set(terms))
+                if not terms:
+                    continue
+                rows = conn.execute(
+                    f"SELECT t.digest FROM terms t JOIN derived d ON d.digest = t.digest AND d.kind = ? "
+                    f"WHERE t.term IN ({','.join('?' * len(terms))}) "
+                    f"GROUP BY t.digest HAVING COUNT(*) = ?",
+                    (kind, *terms, len(terms))).fetchall()
+                found.update(digest for digest, in rows)
+        return found
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by another user
+        pass
+    return True
@@ -0,0 +1,127 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.candidate_snapshot import NO_DATE, SORT_FIELDS, CandidateSnapshot, parse_date
+
+# Rows materialized at a time while streaming matches
+ROW_CHUNK_SIZE = 500
+
+_NO_VALUE = object()
+
+
+def _number(value: Optional[str]) -> Optional[float]:
+    return None if value in (None, '') else float(value)
+
+
+def cursor_value(sort_by: str, value: str) -> Any:
+    """A sort value from a query string, as the candidate record would hold it"""
+    if sort_by == 'matchScore':
+        # Empty for a candidate without a score
+        return _number(value)
+    return value
+
+
+class CandidateQuery:
+    """Search, filters and ordering shared by the candidate list and export.
+
+    Everything runs as vectorized operations over the snapshot's columns;
+    only the rows a response returns are turned into dicts.
+    """
+
+    def __init__(self, search: str = '', role: str = 'all', sort_by: str = 'matchScore',
+                 sort_order: str = 'desc', min_score: Optional[float] = None,
+                 max_score: Optional[float] = None, applied_after: Optional[str] = None,
+                 applied_before: Optional[str] = None):
+        self.search = search.lower()
+        self.role = role.lower()
+        self.sort_by = sort_by
+        self.descending = sort_order == 'desc'
+        self.min_score = min_score
+        self.max_score = max_score
+        self.applied_after = self._date_bound(applied_after)
+        self.applied_before = self._date_bound(applied_before)
+
+    @staticmethod
+    def _date_bound(value: Optional[str]) -> Optional[int]:
+        if not value:
+            return None
+        bound = parse_date(value)
+        if bound == NO_DATE:
+            raise ValueError(f'{value!r} is not an ISO-8601 date')
+        return bound
+
+    @classmethod
+    def from_args(cls, args) -> 'CandidateQuery':
+        """Build from request args; raises ValueError for malformed scores or dates"""
+        return cls(
+            search=args.get('search', ''),
+            role=args.get('role', 'all'),
+            sort_by=args.get('sortBy', 'matchScore'),
+            sort_order=args.get('sortOrder', 'desc'),
+            min_score=_number(args.get('minScore')),
+            max_score=_number(args.get('maxScore')),
+            applied_after=args.get('appliedAfter'),
+            applied_before=args.get('appliedBefore')
+        )
+
+    def mask(self, snapshot: CandidateSnapshot) -> Optional[np.ndarray]:
+        """Rows matching every filter, or None when nothing is filtered"""
+        masks = []
+        if self.search:
+            # Substring of name, email, role or any skill
+            masks.append(snapshot.search_mask(self.search))
+        if self.role != 'all':
+            masks.append(snapshot.role_mask(self.role))
+        if self.min_score is not None:
+            masks.append(snapshot.score >= self.min_score)
+        if self.max_score is not None:
+            masks.append(snapshot.score <= self.max_score)
+        if self.applied_after is not None:
+            masks.append(snapshot.applied >= self.applied_after)
+        if self.applied_before is not None:
+            masks.append((snapshot.applied < self.applied_before) & (snapshot.applied != NO_DATE))
+        if not masks:
+            return None
+        return np.logical_and.reduce(masks) if len(masks) > 1 else masks[0]
+
+    def positions(self, snapshot: CandidateSnapshot, start: int = 0) -> np.ndarray:
+        """Matching rows in order, from rank ``start`` of the unfiltered order"""
+        order = snapshot.order(self.sort_by)
+        if self.descending:
+            order = order[::-1]
+        order = order[start:]
+        mask = self.mask(snapshot)
+        return order if mask is None else order[mask[order]]
+
+    def position_after(self, snapshot: CandidateSnapshot, candidate_id: str,
+                       value: Any = _NO_VALUE) -> Optional[int]:
+        """Rank in iteration order just past ``candidate_id``, or None if it is gone.
+
+        Given the candidate's sort ``value`` too, the position is a keyset
+        seek on (value, id): it needs no row to exist, and rows whose value
+        changed since are placed by their current value, never repeated or
+        skipped. Without it, the id is looked up and its current rank used.
+        """
+        if value is not _NO_VALUE and self.sort_by in SORT_FIELDS:
+            key = snapshot.sort_key(self.sort_by, value, candidate_id)
+            if self.descending:
+                return len(snapshot) - snapshot.seek(self.sort_by, key, inclusive=False)
+            return snapshot.seek(self.sort_by, key, inclusive=True)
+        row = snapshot.find(candidate_id)
+        if row is None:
+            return None
+        rank = snapshot.rank(self.sort_by, row)
+        return len(snapshot) - rank if self.descending else rank + 1
+
+    def iter_matches(self, snapshot: CandidateSnapshot, start: int = 0) -> Iterator[Dict[str, Any]]:
+        """Matching candidates in order, materialized ROW_CHUNK_SIZE at a time"""
+        positions = self.positions(snapshot, start)
+        for chunk in range(0, len(positions), ROW_CHUNK_SIZE):
+            yield from snapshot.rows(positions[chunk:chunk + ROW_CHUNK_SIZE])
+
+    def page(self, snapshot: CandidateSnapshot, offset: int, limit: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """(total matches, candidates in [offset, offset + limit))"""
+        positions = self.positions(snapshot)
+        offset = max(offset, 0)
+        return len(positions), snapshot.rows(positions[offset:offset + max(limit, 0)])
@@ -0,0 +1,498 @@
+import fcntl
+import io
+import json
+import math
+import mmap
+import os
+import struct
+import subprocess
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.utils.metrics import registry
+
+SNAPSHOT_BUILDS = registry.counter(
+    'candidate_snapshot_builds_total', 'Candidate snapshots rebuilt from the candidates file')
+SNAPSHOT_ROWS = registry.gauge(
+    'candidate_snapshot_rows', 'Candidates in the current snapshot', mode='max')
+SNAPSHOT_BYTES = registry.gauge(
+    'candidate_snapshot_bytes', 'Size of the current candidate snapshot file', mode='max')
+
+MAGIC = b'CANDSNAP'
+VERSION = 1
+ALIGN = 64
+PREAMBLE = struct.Struct('<8sII')
+
+# Stored as offsets into the string heap; role and skills are dictionary-encoded
+STRING_FIELDS = ('id', 'name', 'email', 'topSkill', 'resumeId', 'appliedDate')
+CORE_FIELDS = frozenset(STRING_FIELDS + ('role', 'matchScore', 'skills'))
+# Orders precomputed at build time, ties broken by id
+SORT_FIELDS = ('name', 'matchScore', 'appliedDate')
+
+# Row flags
+SCORE_IS_FLOAT = 1
+RAW_RECORD = 2
+HAS_EXTRAS = 4
+
+# Bytes of search text compared per vectorized step
+SEARCH_BLOCK = 1 << 20
+
+NO_DATE = np.iinfo(np.int64).min
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Directory holding the ``app`` package, for the build subprocess
+_IMPORT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_date(value: Any) -> int:
+    """ISO-8601 date or datetime as microseconds since the epoch (naive means UTC); NO_DATE if unparseable"""
+    if not isinstance(value, str):
+        return NO_DATE
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return NO_DATE
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    delta = parsed - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return '' if value is None else str(value)
+
+
+def _is_regular(candidate: Dict[str, Any]) -> bool:
+    """Whether the columns alone reproduce the record's core fields exactly"""
+    score = candidate.get('matchScore')
+    skills = candidate.get('skills')
+    return (all(isinstance(candidate.get(field), str) for field in STRING_FIELDS + ('role',))
+            and isinstance(score, (int, float)) and not isinstance(score, bool)
+            and math.isfinite(score) and (isinstance(score, float) or abs(score) < 2 ** 53)
+            and isinstance(skills, list) and all(isinstance(skill, str) for skill in skills))
+
+
+def _encode_strings(values: List[str]):
+    """UTF-8 bytes of ``values`` back to back, and the n + 1 offsets delimiting them"""
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+    return b''.join(encoded), offsets
+
+
+def _inverse(order: np.ndarray) -> np.ndarray:
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order), dtype=order.dtype)
+    return ranks
+
+
+def write_snapshot(candidates: List[Dict[str, Any]], out: BinaryIO, source: Optional[list] = None):
+    """Encode ``candidates`` into the columnar snapshot format.
+
+    Layout: magic, version and header length, a JSON header (row count,
+    dictionaries, section table), then 64-byte aligned sections: fixed-width
+    score, date and flag columns, role and skill codes, the string heap with
+    per-field offsets, lower-cased search text, and precomputed sort orders.
+    Records that do not fit the columns are kept verbatim as JSON.
+    """
+    n = len(candidates)
+    score = np.zeros(n, dtype=np.float64)
+    applied = np.full(n, NO_DATE, dtype=np.int64)
+    flags = np.zeros(n, dtype=np.uint8)
+    role_codes = np.zeros(n, dtype=np.uint32)
+    skill_offsets = np.zeros(n + 1, dtype=np.int64)
+    skill_codes: List[int] = []
+    roles: Dict[str, int] = {}
+    skills: Dict[str, int] = {}
+    strings: Dict[str, List[str]] = {field: [] for field in STRING_FIELDS + ('extras',)}
+    search: List[str] = []
+    extra_fields = set()
+
+    for i, candidate in enumerate(candidates):
+        extras = {key: value for key, value in candidate.items() if key not in CORE_FIELDS}
+        extra_fields.update(extras)
+        if not _is_regular(candidate):
+            flags[i] |= RAW_RECORD
+            strings['extras'].append(json.dumps(candidate))
+        elif extras:
+            flags[i] |= HAS_EXTRAS
+            strings['extras'].append(json.dumps(extras))
+        else:
+            strings['extras'].append('')
+
+        for field in STRING_FIELDS:
+            strings[field].append(_text(candidate.get(field)))
+        role = _text(candidate.get('role'))
+        role_codes[i] = roles.setdefault(role, len(roles))
+
+        value = candidate.get('matchScore')
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            score[i] = value
+            if isinstance(value, float):
+                flags[i] |= SCORE_IS_FLOAT
+        else:
+            score[i] = np.nan
+        applied[i] = parse_date(candidate.get('appliedDate'))
+
+        candidate_skills = candidate.get('skills')
+        candidate_skills = [_text(s) for s in candidate_skills] if isinstance(candidate_skills, list) else []
+        skill_codes.extend(skills.setdefault(skill, len(skills)) for skill in candidate_skills)
+        skill_offsets[i + 1] = len(skill_codes)
+        search.append('\0'.join([strings['name'][i], strings['email'][i], role, *candidate_skills]).lower())
+
+    ids = strings['id']
+    id_order = np.array(sorted(range(n), key=ids.__getitem__), dtype=np.int32)
+    id_rank = _inverse(id_order)
+    names = strings['name']
+    orders = {
+        'name': np.array(sorted(range(n), key=lambda i: (names[i], ids[i])), dtype=np.int32),
+        'matchScore': np.lexsort((id_rank, score)).astype(np.int32),
+        'appliedDate': np.lexsort((id_rank, applied)).astype(np.int32)
+    }
+
+    sections = [
+        ('score', score), ('applied', applied), ('flags', flags),
+        ('role_codes', role_codes), ('skill_offsets', skill_offsets),
+        ('skill_codes', np.asarray(skill_codes, dtype=np.uint32)),
+        ('id_order', id_order)
+    ]
+    for field in SORT_FIELDS:
+        sections.append((f'order.{field}', orders[field]))
+        sections.append((f'rank.{field}', _inverse(orders[field])))
+    heap = []
+    heap_size = 0
+    for field, values in strings.items():
+        data, offsets = _encode_strings(values)
+        sections.append((f'offsets.{field}', offsets + heap_size))
+        heap.append(data)
+        heap_size += len(data)
+    search_data, search_offsets = _encode_strings(search)
+    sections.append(('search_offsets', search_offsets))
+    sections.append(('heap', np.frombuffer(b''.join(heap), dtype=np.uint8)))
+    sections.append(('search', np.frombuffer(search_data, dtype=np.uint8)))
+
+    table = {}
+    position = 0
+    for name, array in sections:
+        table[name] = {'offset': position, 'dtype': array.dtype.str, 'length': len(array)}
+        position += -(-array.nbytes // ALIGN) * ALIGN
+    header = json.dumps({
+        'version': VERSION,
+        'count': n,
+        'source': source,
+        'roles': list(roles),
+        'skills': list(skills),
+        'extraFields': sorted(extra_fields),
+        'rawRecords': int(np.count_nonzero(flags & RAW_RECORD)),
+        'sections': table
+    }).encode('utf-8')
+
+    out.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+    out.write(header)
+    written = PREAMBLE.size + len(header)
+    data_start = -(-written // ALIGN) * ALIGN
+    out.write(b'\0' * (data_start - written))
+    for name, array in sections:
+        data = np.ascontiguousarray(array).tobytes()
+        out.write(data)
+        out.write(b'\0' * (-len(data) % ALIGN))
+
+
+class CandidateSnapshot:
+    """Read-only columnar view of the candidate pool over a snapshot buffer.
+
+    Opened from a file, the buffer is a shared read-only mmap: every worker
+    maps the same page-cache pages, and each column is a zero-copy numpy
+    view. Rows are only turned into dicts for the candidates a response
+    actually returns.
+    """
+
+    def __init__(self, buffer, path: Optional[str] = None):
+        self.path = path
+        self._buffer = buffer
+        magic, version, header_length = PREAMBLE.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path or "buffer"} is not a version {VERSION} candidate snapshot')
+        header = json.loads(bytes(buffer[PREAMBLE.size:PREAMBLE.size + header_length]))
+        self.count: int = header['count']
+        self.source = header['source']
+        self.roles: List[str] = header['roles']
+        self.skills: List[str] = header['skills']
+        self.extra_fields: List[str] = header['extraFields']
+        self.raw_records: int = header['rawRecords']
+        self.size = len(buffer)
+
+        data_start = -(-(PREAMBLE.size + header_length) // ALIGN) * ALIGN
+        self._sections = {
+            name: np.frombuffer(buffer, dtype=np.dtype(spec['dtype']), count=spec['length'],
+                                offset=data_start + spec['offset'])
+            for name, spec in header['sections'].items()
+        }
+        self.score = self._sections['score']
+        self.applied = self._sections['applied']
+        self.flags = self._sections['flags']
+        self.role_codes = self._sections['role_codes']
+        self._heap_start = data_start + header['sections']['heap']['offset']
+        self._search_start = data_start + header['sections']['search']['offset']
+        self._lower_roles = [role.lower() for role in self.roles]
+
+    @classmethod
+    def open(cls, path: str) -> 'CandidateSnapshot':
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path)
+
+    @classmethod
+    def from_candidates(cls, candidates: List[Dict[str, Any]], source: Optional[list] = None) -> 'CandidateSnapshot':
+        """In-memory snapshot, for callers with no file to map"""
+        out = io.BytesIO()
+        write_snapshot(candidates, out, source)
+        return cls(out.getvalue())
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _string(self, field: str, i: int) -> str:
+        offsets = self._sections[f'offsets.{field}']
+        start = self._heap_start + int(offsets[i])
+        return self._buffer[start:self._heap_start + int(offsets[i + 1])].decode('utf-8')
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """The candidate at row ``i`` as a new dict"""
+        return self.rows([i])[0]
+
+    def rows(self, positions: Optional[Iterable[int]] = None) -> List[Dict[str, Any]]:
+        """Candidates at ``positions`` (all rows by default) as new dicts.
+
+        Column values for the whole batch are gathered with one vectorized
+        lookup per column before any dict is built.
+        """
+        if positions is None:
+            positions = np.arange(self.count)
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1)
+        if len(positions) == 0:
+            return []
+        buffer, base = self._buffer, self._heap_start
+        columns = {}
+        for field in STRING_FIELDS:
+            offsets = self._sections[f'offsets.{field}']
+            columns[field] = [
+                buffer[base + start:base + end].decode('utf-8')
+                for start, end in zip(offsets[positions].tolist(), offsets[positions + 1].tolist())
+            ]
+        # Every row's skill codes in one gather, then split per row
+        skill_offsets = self._sections['skill_offsets']
+        starts, ends = skill_offsets[positions], skill_offsets[positions + 1]
+        spans = np.zeros(len(positions) + 1, dtype=np.int64)
+        np.cumsum(ends - starts, out=spans[1:])
+        gather = np.arange(spans[-1]) + np.repeat(starts - spans[:-1], ends - starts)
+        roles, skills = self.roles, self.skills
+        skill_names = [skills[code] for code in self._sections['skill_codes'][gather].tolist()]
+        spans = spans.tolist()
+        role_names = [roles[code] for code in self.role_codes[positions].tolist()]
+        scores = self.score[positions].tolist()
+        flags = self.flags[positions].tolist()
+
+        candidates = []
+        for j in range(len(positions)):
+            if flags[j] & RAW_RECORD:
+                candidates.append(json.loads(self._string('extras', int(positions[j]))))
+                continue
+            candidate = {
+                'id': columns['id'][j],
+                'name': columns['name'][j],
+                'email': columns['email'][j],
+                'role': role_names[j],
+                'matchScore': scores[j] if flags[j] & SCORE_IS_FLOAT else int(scores[j]),
+                'skills': skill_names[spans[j]:spans[j + 1]],
+                'topSkill': columns['topSkill'][j],
+                'resumeId': columns['resumeId'][j],
+                'appliedDate': columns['appliedDate'][j]
+            }
+            if flags[j] & HAS_EXTRAS:
+                candidate.update(json.loads(self._string('extras', int(positions[j]))))
+            candidates.append(candidate)
+        return candidates
+
+    def find(self, candidate_id: str) -> Optional[int]:
+        """Row of ``candidate_id`` by binary search over the id order, or None"""
+        if not isinstance(candidate_id, str):
+            # Ids are stored as strings; anything else cannot match
+            return None
+        id_order = self._sections['id_order']
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._string('id', int(id_order[middle])) < candidate_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self._string('id', int(id_order[low])) == candidate_id:
+            return int(id_order[low])
+        return None
+
+    def order(self, sort_by: str) -> np.ndarray:
+        """Rows ordered by (``sort_by``, id); file order for fields without a precomputed order"""
+        order = self._sections.get(f'order.{sort_by}')
+        return order if order is not None else np.arange(self.count, dtype=np.int32)
+
+    def rank(self, sort_by: str, i: int) -> int:
+        ranks = self._sections.get(f'rank.{sort_by}')
+        return int(ranks[i]) if ranks is not None else i
+
+    def sort_key(self, sort_by: str, value: Any, candidate_id: str) -> tuple:
+        """Position of a (``sort_by`` value, id) pair in the ascending ``order(sort_by)``.
+
+        ``value`` is the field as a candidate record holds it; it is normalized
+        the way the column stores it, so keys compare like the precomputed order.
+        """
+        if sort_by == 'name':
+            return _text(value), candidate_id
+        if sort_by == 'matchScore':
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and not math.isnan(value):
+                return (0, float(value)), candidate_id
+            # Missing scores sort last
+            return (1, 0.0), candidate_id
+        if sort_by == 'appliedDate':
+            return parse_date(value), candidate_id
+        raise ValueError(f'{sort_by!r} has no precomputed order')
+
+    def _row_sort_key(self, sort_by: str, i: int) -> tuple:
+        candidate_id = self._string('id', i)
+        if sort_by == 'name':
+            return self._string('name', i), candidate_id
+        if sort_by == 'matchScore':
+            score = float(self.score[i])
+            return ((1, 0.0) if math.isnan(score) else (0, score)), candidate_id
+        return int(self.applied[i]), candidate_id
+
+    def seek(self, sort_by: str, key: tuple, inclusive: bool) -> int:
+        """Rows of ``order(sort_by)`` before ``key`` (and equal to it, if ``inclusive``), by binary search"""
+        order = self._sections[f'order.{sort_by}']
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            row_key = self._row_sort_key(sort_by, int(order[middle]))
+            if row_key < key or (inclusive and row_key == key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def role_mask(self, role: str) -> np.ndarray:
+        """Rows whose lower-cased role contains ``role``, decided once per dictionary entry"""
+        codes = [code for code, name in enumerate(self._lower_roles) if role in name]
+        return np.isin(self.role_codes, np.asarray(codes, dtype=np.uint32))
+
+    def search_mask(self, needle: str) -> np.ndarray:
+        """Rows whose lower-cased name, email, role or a skill contains ``needle``.
+
+        The search text is scanned in place, SEARCH_BLOCK bytes at a time so
+        temporaries stay small however large the pool is. Every position
+        that starts with the needle's first byte is narrowed down byte by
+        byte, then mapped to its row; matches that run into the next row
+        are dropped.
+        """
+        mask = np.zeros(self.count, dtype=bool)
+        pattern = np.frombuffer(needle.lower().encode('utf-8'), dtype=np.uint8)
+        text = self._sections['search']
+        offsets = self._sections['search_offsets']
+        if len(pattern) == 0:
+            mask[:] = True
+            return mask
+        last_start = len(text) - len(pattern)
+        for block in range(0, last_start + 1, SEARCH_BLOCK):
+            block_end = min(block + SEARCH_BLOCK, last_start + 1)
+            positions = np.flatnonzero(text[block:block_end] == pattern[0]) + block
+            for k in range(1, len(pattern)):
+                positions = positions[text[positions + k] == pattern[k]]
+            rows = np.searchsorted(offsets, positions, side='right') - 1
+            inside = positions + len(pattern) <= offsets[rows + 1]
+            mask[rows[inside]] = True
+        return mask
+
+
+class CandidateSnapshotStore:
+    """Keeps a snapshot of ``source_path`` on disk and mapped, rebuilding it when the file changes.
+
+    One worker rebuilds under a file lock, in a subprocess that writes a
+    temp file and renames it over the old snapshot. Other workers find the new file, so the pool is
+    parsed once per change instead of once per worker. Requests already
+    holding the previous snapshot keep reading its (unlinked) mapping.
+    """
+
+    def __init__(self, source_path: str, snapshot_path: str, isolated_build: bool = True):
+        self.source_path = source_path
+        self.snapshot_path = snapshot_path
+        self.isolated_build = isolated_build
+        self._snapshot: Optional[CandidateSnapshot] = None
+        self._lock = threading.Lock()
+
+    def _source_key(self) -> list:
+        stat = os.stat(self.source_path)
+        return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+    def current(self) -> CandidateSnapshot:
+        key = self._source_key()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.source == key:
+            return snapshot
+        with self._lock:
+            if self._snapshot is not None and self._snapshot.source == key:
+                return self._snapshot
+            snapshot = self._open_matching(key)
+            if snapshot is None:
+                os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+                with open(f'{self.snapshot_path}.lock', 'a') as lock:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    # Another worker may have built it while we waited
+                    snapshot = self._open_matching(key) or self._build(key)
+            self._snapshot = snapshot
+            SNAPSHOT_ROWS.set(snapshot.count)
+            SNAPSHOT_BYTES.set(snapshot.size)
+            return snapshot
+
+    def _open_matching(self, key: list) -> Optional[CandidateSnapshot]:
+        try:
+            snapshot = CandidateSnapshot.open(self.snapshot_path)
+        except (OSError, ValueError):
+            return None
+        return snapshot if snapshot.source == key else None
+
+    def _build(self, key: list) -> CandidateSnapshot:
+        if self.isolated_build:
+            # Parsing the JSON in a short-lived process keeps its peak memory out of the
+            # long-lived worker (or the gunicorn master, whose heap every worker inherits)
+            result = subprocess.run(
+                [sys.executable, '-m', __name__, self.source_path, self.snapshot_path, json.dumps(key)],
+                env={**os.environ, 'PYTHONPATH': _IMPORT_ROOT + os.pathsep + os.environ.get('PYTHONPATH', '')},
+                capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f'Building {self.snapshot_path} failed: {result.stderr.strip()[-500:]}')
+        else:
+            build_snapshot_file(self.source_path, self.snapshot_path, key)
+        SNAPSHOT_BUILDS.inc()
+        return CandidateSnapshot.open(self.snapshot_path)
+
+
+def build_snapshot_file(source_path: str, snapshot_path: str, key: list):
+    """Encode the JSON candidate list at ``source_path`` and atomically replace ``snapshot_path``"""
+    with open(source_path, 'r') as f:
+        candidates = json.load(f)
+    tmp_path = f'{snapshot_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as out:
+            write_snapshot(candidates, out, source=key)
+        os.replace(tmp_path, snapshot_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+if __name__ == '__main__':
+    build_snapshot_file(sys.argv[1], sys.argv[2], json.loads(sys.argv[3]))
@@ -0,0 +1,407 @@
+import codecs
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Dict, Optional, Tuple
+
+from app.utils.blob_store import CHUNK_SIZE, Blob, BlobStore
+from app.utils.metrics import registry
+
+SESSIONS = registry.counter(
+    'chunked_upload_sessions_total', 'Chunked upload sessions by outcome', ('result',))
+CHUNKS = registry.counter(
+    'chunked_upload_chunks_total', 'Chunks received by outcome', ('result',))
+CHUNK_BYTES = registry.counter(
+    'chunked_upload_bytes_total', 'Bytes accepted through chunked uploads')
+
+SHA256_PATTERN = re.compile(r'[0-9a-fA-F]{64}')
+
+# Validator signature: first bytes of the file -> (valid, mime, error)
+Validator = Callable[[bytes], Tuple[bool, Optional[str], Optional[str]]]
+
+
+class UploadError(Exception):
+    """A request the upload protocol refuses; carries the HTTP status and extra response fields"""
+
+    def __init__(self, message: str, status: int = 400, **details):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.details = details
+
+
+class ChunkedUploadStore:
+    """Resumable uploads assembled on disk, one chunk at a time.
+
+    A session is created with the file's name and total size. Chunks are then
+    sent in order, each with its byte offset and SHA-256. Session state sits
+    in a JSON file next to the partial data and every change to it is made
+    under an flock, so chunks of one upload may land on different workers. A
+    client that lost its connection asks for the session's offset and
+    continues from there. The exact retransmit of an accepted chunk is
+    acknowledged again without being rewritten.
+
+    Work starts before the last chunk arrives. The file type is sniffed as
+    soon as the first bytes are in, so a wrong type is refused straight away.
+    Plain text is decoded chunk by chunk into a sidecar file, so the text is
+    ready when the upload completes. The finished file is moved into the
+    blob store, where its hash becomes the key for cached results.
+    """
+
+    SNIFF_BYTES = 2048
+    SWEEP_INTERVAL = 600
+    MAX_CACHED_HASHERS = 256
+
+    def __init__(self, directory: str, blob_store: BlobStore, validator: Validator,
+                 max_size: int = 100 * 1024 * 1024, max_chunk_size: int = 8 * 1024 * 1024,
+                 chunk_size: int = 1024 * 1024, ttl_seconds: float = 24 * 3600):
+        self.directory = directory
+        self.blob_store = blob_store
+        self.validator = validator
+        self.max_size = max_size
+        self.max_chunk_size = max_chunk_size
+        self.chunk_size = chunk_size
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(directory, exist_ok=True)
+        # Running whole-file hashes for sessions whose chunks reached this process in order
+        self._hashers: 'OrderedDict[str, Tuple[int, Any]]' = OrderedDict()
+        self._hashers_lock = threading.Lock()
+        self._last_sweep = 0.0
+
+    def _path(self, upload_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f'{upload_id}.{suffix}')
+
+    @contextmanager
+    def _locked(self, upload_id: str):
+        """Exclusive across threads and workers for one session.
+
+        A session's lock file is unlinked, under the lock, when the session
+        is removed. A waiter that then gets the flock on the unlinked file
+        sees that the path no longer names it and tries again, so two holders
+        can never lock different files for one session.
+        """
+        if not upload_id.isalnum():
+            raise UploadError('Upload not found', 404)
+        lock_path = self._path(upload_id, 'lock')
+        while True:
+            if not os.path.exists(self._path(upload_id, 'json')):
+                raise UploadError('Upload not found', 404)
+            fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                try:
+                    locked = os.path.samestat(os.fstat(fd), os.stat(lock_path))
+                except FileNotFoundError:
+                    locked = False
+            except BaseException:
+                os.close(fd)
+                raise
+            if locked:
+                break
+            os.close(fd)
+        try:
+            if not os.path.exists(self._path(upload_id, 'json')):
+                # Removed between the check and the flock; don't leave a lock file behind
+                os.remove(lock_path)
+                raise UploadError('Upload not found', 404)
+            yield
+        finally:
+            os.close(fd)
+
+    def _remove(self, upload_id: str):
+        """Delete a session and its lock file (caller holds the lock)"""
+        self._discard_data(upload_id)
+        os.remove(self._path(upload_id, 'json'))
+        os.remove(self._path(upload_id, 'lock'))
+
+    def _load(self, upload_id: str) -> Dict[str, Any]:
+        try:
+            with open(self._path(upload_id, 'json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError('Upload not found', 404)
+
+    def _save(self, meta: Dict[str, Any]):
+        meta['updatedAt'] = time.time()
+        path = self._path(meta['id'], 'json')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def _discard_data(self, upload_id: str):
+        for suffix in ('part', 'txt'):
+            try:
+                os.remove(self._path(upload_id, suffix))
+            except FileNotFoundError:
+                pass
+        with self._hashers_lock:
+            self._hashers.pop(upload_id, None)
+
+    def _reject(self, meta: Dict[str, Any], error: str) -> UploadError:
+        meta['state'] = 'rejected'
+        meta['error'] = error
+        self._save(meta)
+        self._discard_data(meta['id'])
+        SESSIONS.inc(result='rejected')
+        return UploadError(error, 400, **self._public(meta))
+
+    def _public(self, meta: Dict[str, Any]) -> Dict[str, Any]:
+        status = {
+            'uploadId': meta['id'],
+            'filename': meta['filename'],
+            'size': meta['size'],
+            'offset': meta['received'],
+            'chunkSize': self.chunk_size,
+            'maxChunkSize': self.max_chunk_size,
+            'state': meta['state'],
+            'mimeType': meta['mime']
+        }
+        if meta.get('error'):
+            status['error'] = meta['error']
+        return status
+
+    def create(self, filename: str, size: int, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """Open a session for a file of ``size`` bytes"""
+        if size <= 0:
+            raise UploadError('size must be a positive number of bytes')
+        if size > self.max_size:
+            raise UploadError(f'File size exceeds maximum limit of {self.max_size // (1024 * 1024)}MB', 413)
+        if sha256 not in (None, '') and not (isinstance(sha256, str) and SHA256_PATTERN.fullmatch(sha256)):
+            raise UploadError('sha256 must be a hex SHA-256 digest')
+        self._sweep()
+        meta = {
+            'id': uuid.uuid4().hex,
+            'filename': filename,
+            'size': size,
+            'sha256': sha256.lower() if sha256 else None,
+            'received': 0,
+            'state': 'receiving',
+            'mime': None,
+            'textOffset': 0,
+            'chunks': [],
+            'digest': None,
+            'createdAt': time.time()
+        }
+        open(self._path(meta['id'], 'part'), 'wb').close()
+        self._save(meta)
+        SESSIONS.inc(result='created')
+        return self._public(meta)
+
+    def status(self, upload_id: str) -> Dict[str, Any]:
+        with self._locked(upload_id):
+            return self._public(self._load(upload_id))
+
+    def append(self, upload_id: str, offset: int, stream: BinaryIO, checksum: str) -> Dict[str, Any]:
+        """Write one chunk at ``offset`` and verify it against ``checksum`` (hex SHA-256)"""
+        checksum = checksum.lower()
+        with self._locked(upload_id):
+            meta = self._load(upload_id)
+            if meta['state'] != 'receiving':
+                raise UploadError(f"Upload is {meta['state']}", 409, **self._public(meta))
+
+            received = meta['received']
+            if offset < received:
+                return self._acknowledge_retransmit(meta, offset, stream, checksum)
+            if offset > received:
+                CHUNKS.inc(result='out_of_order')
+                raise UploadError('Chunk does not start at the current offset', 409, **self._public(meta))
+
+            chunk_hasher = hashlib.sha256()
+            with self._hashers_lock:
+                cached = self._hashers.get(upload_id)
+            if offset == 0:
+                file_hasher = hashlib.sha256()
+            else:
+                file_hasher = cached[1].copy() if cached and cached[0] == offset else None
+            with open(self._path(upload_id, 'part'), 'r+b') as part:
+                try:
+                    length = self._write_chunk(part, offset, meta, stream, chunk_hasher, file_hasher)
+                    if chunk_hasher.hexdigest() != checksum or not length:
+                        CHUNKS.inc(result='checksum_mismatch')
+                        raise UploadError('Chunk checksum mismatch' if length else 'Empty chunk', 400,
+                                          **self._public(meta))
+                except BaseException:
+                    # Drop whatever arrived of a rejected or interrupted chunk
+                    part.truncate(offset)
+                    raise
+
+            meta['received'] = offset + length
+            meta['chunks'].append([offset, length, checksum])
+            CHUNKS.inc(result='accepted')
+            CHUNK_BYTES.inc(length)
+            if file_hasher is not None:
+                self._remember_hasher(upload_id, meta['received'], file_hasher)
+
+            self._process_received(meta)
+            self._save(meta)
+            return self._public(meta)
+
+    def _write_chunk(self, part: BinaryIO, offset: int, meta: Dict[str, Any], stream: BinaryIO,
+                     chunk_hasher, file_hasher) -> int:
+        part.seek(offset)
+        length = 0
+        while True:
+            data = stream.read(CHUNK_SIZE)
+            if not data:
+                return length
+            length += len(data)
+            if length > self.max_chunk_size or offset + length > meta['size']:
+                CHUNKS.inc(result='too_large')
+                raise UploadError('Chunk exceeds the chunk size limit or the declared file size', 413,
+                                  **self._public(meta))
+            chunk_hasher.update(data)
+            if file_hasher is not None:
+                file_hasher.update(data)
+            part.write(data)
+
+    def _acknowledge_retransmit(self, meta: Dict[str, Any], offset: int, stream: BinaryIO,
+                                checksum: str) -> Dict[str, Any]:
+        """A chunk that was already accepted (the client never saw the reply) is acknowledged again"""
+        known = {(start, checksum_) for start, _, checksum_ in meta['chunks']}
+        if (offset, checksum) not in known:
+            CHUNKS.inc(result='out_of_order')
+            raise UploadError('Chunk overlaps data already received', 409, **self._public(meta))
+        hasher = hashlib.sha256()
+        while True:
+            data = stream.read(CHUNK_SIZE)
+            if not data:
+                break
+            hasher.update(data)
+        if hasher.hexdigest() != checksum:
+            CHUNKS.inc(result='checksum_mismatch')
+            raise UploadError('Chunk checksum mismatch', 400, **self._public(meta))
+        CHUNKS.inc(result='duplicate')
+        return self._public(meta)
+
+    def _remember_hasher(self, upload_id: str, offset: int, hasher):
+        with self._hashers_lock:
+            self._hashers[upload_id] = (offset, hasher)
+            while len(self._hashers) > self.MAX_CACHED_HASHERS:
+                self._hashers.popitem(last=False)
+
+    def _process_received(self, meta: Dict[str, Any]):
+        """Sniff the type once enough bytes are in, then extract text from what has arrived"""
+        complete = meta['received'] == meta['size']
+        if meta['mime'] is None and (meta['received'] >= self.SNIFF_BYTES or complete):
+            with open(self._path(meta['id'], 'part'), 'rb') as part:
+                head = part.read(self.SNIFF_BYTES)
+            is_valid, mime, error = self.validator(head)
+            if not is_valid:
+                raise self._reject(meta, error)
+            meta['mime'] = mime
+
+        if meta['mime'] == 'text/plain' and meta['textOffset'] < meta['received']:
+            self._extract_text(meta, complete)
+
+    def _extract_text(self, meta: Dict[str, Any], final: bool):
+        """Decode newly received bytes into the text sidecar.
+
+        A fresh decoder is used on every call and only whole characters are
+        consumed, so extraction can continue in whichever worker receives the
+        next chunk.
+        """
+        with open(self._path(meta['id'], 'part'), 'rb') as part:
+            part.seek(meta['textOffset'])
+            data = part.read(meta['received'] - meta['textOffset'])
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            text = decoder.decode(data, final=final)
+        except UnicodeDecodeError:
+            raise self._reject(meta, 'File is not valid UTF-8 text')
+        pending = len(decoder.getstate()[0])
+        with open(self._path(meta['id'], 'txt'), 'a', encoding='utf-8', newline='') as sidecar:
+            sidecar.write(text)
+        meta['textOffset'] += len(data) - pending
+
+    def complete(self, upload_id: str) -> Tuple[Optional[Blob], str]:
+        """Move the assembled file into the blob store.
+
+        Returns a new reference to the blob (release it when done) and its
+        digest. For a session that was already completed, returns (None,
+        digest) so the caller can look up the recorded result.
+        """
+        with self._locked(upload_id):
+            meta = self._load(upload_id)
+            if meta['state'] == 'complete':
+                return None, meta['digest']
+            if meta['state'] != 'receiving':
+                raise UploadError(f"Upload is {meta['state']}", 409, **self._public(meta))
+            if meta['received'] != meta['size']:
+                raise UploadError('Upload is incomplete', 409, **self._public(meta))
+
+            part_path = self._path(upload_id, 'part')
+            with self._hashers_lock:
+                cached = self._hashers.pop(upload_id, None)
+            if cached and cached[0] == meta['size']:
+                digest = cached[1].hexdigest()
+            else:
+                digest = _hash_file(part_path)
+            if meta['sha256'] and digest != meta['sha256']:
+                raise self._reject(meta, 'File checksum mismatch')
+
+            text = None
+            if meta['mime'] == 'text/plain' and meta['textOffset'] == meta['size']:
+                with open(self._path(upload_id, 'txt'), encoding='utf-8', newline='') as sidecar:
+                    text = sidecar.read()
+
+            blob = self.blob_store.adopt(part_path, digest, meta['size'])
+            if text is not None and self.blob_store.get_derived(digest, 'text') is None:
+                self.blob_store.set_derived(digest, 'text', text)
+            self._discard_data(upload_id)
+
+            meta['state'] = 'complete'
+            meta['digest'] = digest
+            self._save(meta)
+            SESSIONS.inc(result='completed')
+            return blob, digest
+
+    def abort(self, upload_id: str) -> bool:
+        with self._locked(upload_id):
+            meta = self._load(upload_id)
+            self._remove(upload_id)
+        if meta['state'] == 'receiving':
+            SESSIONS.inc(result='aborted')
+        return True
+
+    def _sweep(self):
+        """Remove sessions idle for longer than the TTL (at most every SWEEP_INTERVAL)"""
+        now = time.time()
+        if now - self._last_sweep < self.SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) < self.ttl_seconds:
+                    continue
+            except FileNotFoundError:
+                continue
+            upload_id = name[:-len('.json')]
+            try:
+                with self._locked(upload_id):
+                    # A chunk may have arrived while we waited for the lock
+                    if now - os.path.getmtime(path) < self.ttl_seconds:
+                        continue
+                    self._remove(upload_id)
+            except UploadError:
+                # Aborted, or swept by another worker, since the listing
+                continue
+            SESSIONS.inc(result='expired')
+
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(CHUNK_SIZE), b''):
+            hasher.update(data)
+    return hasher.hexdigest()
@@ -0,0 +1,140 @@
+import gzip
+import os
+import zlib
+from typing import Dict, Iterable, Iterator, Optional
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/x-ndjson', 'application/javascript', 'application/xml',
+    'image/svg+xml', 'text/csv', 'text/html', 'text/plain', 'text/css', 'text/xml'
+}
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parse ``gzip;q=0.8, br`` into {coding: q}"""
+    codings = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+class ResponseCompressor:
+    """Compresses responses with the best coding the client accepts.
+
+    Buffered bodies below ``min_size`` bytes are sent as-is, since the
+    framing overhead outweighs the savings. Streamed bodies are compressed
+    chunk by chunk and flushed after each one, so clients still receive
+    data as it is produced.
+    """
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 1, brotli_quality: int = 4,
+                 streaming_brotli_quality: int = 1):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.streaming_brotli_quality = streaming_brotli_quality
+        self.codings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def choose(self, accept_encoding: str) -> Optional[str]:
+        """Highest-q supported coding; ties go to brotli"""
+        accepted = parse_accept_encoding(accept_encoding)
+        best, best_q = None, 0.0
+        for coding in self.codings:
+            q = accepted.get(coding, accepted.get('*', 0.0))
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def compress(self, data: bytes, coding: str) -> bytes:
+        if coding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def compress_stream(self, chunks: Iterable[bytes], coding: str) -> Iterator[bytes]:
+        if coding == 'br':
+            compressor = brotli.Compressor(quality=self.streaming_brotli_quality)
+            for chunk in chunks:
+                compressor.process(chunk)
+                data = compressor.flush()
+                if data:
+                    yield data
+            yield compressor.finish()
+            return
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def __call__(self, request, response):
+        """after_request hook"""
+        if (response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough
+                or request.method == 'HEAD' or response.status_code < 200
+                or response.status_code in (204, 304) or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        coding = self.choose(request.headers.get('Accept-Encoding', ''))
+        if coding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self.compress_stream(_as_bytes(response.response), coding)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(self.compress(data, coding))
+
+        response.headers['Content-Encoding'] = coding
+        if response.headers.get('ETag'):
+            # The compressed representation differs byte-for-byte from the original
+            response.set_etag(response.get_etag()[0], weak=True)
+        return response
+
+
+def _as_bytes(chunks: Iterable) -> Iterator[bytes]:
+    for chunk in chunks:
+        yield chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+
+
+def configure_compression(app) -> Optional[ResponseCompressor]:
+    """Register the compressor; call after the blueprints so it runs before their hooks.
+
+    Flask runs after_request hooks in reverse order of registration, so the
+    metrics and access-log hooks then see the bytes actually sent.
+    """
+    if os.environ.get('COMPRESS_ENABLED', '1') == '0':
+        return None
+    compressor = ResponseCompressor(
+        min_size=int(os.environ.get('COMPRESS_MIN_SIZE', 1024)),
+        gzip_level=int(os.environ.get('COMPRESS_GZIP_LEVEL', 1)),
+        brotli_quality=int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))
+    )
+
+    @app.after_request
+    def compress_response(response):
+        return compressor(request, response)
+
+    app.compressor = compressor
+    return compressor
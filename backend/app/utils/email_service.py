@@ -1,9 +1,12 @@
+import asyncio
 import smtplib
 import os
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from flask import current_app, render_template
 import logging
+from app.utils.metrics import timed
+from app.utils.executors import run_blocking
 
 class EmailService:
     def __init__(self, app=None):
@@ -13,6 +16,10 @@ class EmailService:
         self.smtp_username = os.environ.get('SMTP_USERNAME', 'username')
         self.smtp_password = os.environ.get('SMTP_PASSWORD', 'password')
         self.sender_email = os.environ.get('SENDER_EMAIL', 'hr@example.com')
+        self.smtp_use_tls = os.environ.get('SMTP_USE_TLS', '1') != '0'
+        # Off by default: the send-email route only reports who would be emailed
+        self.delivery_enabled = os.environ.get('EMAIL_DELIVERY_ENABLED', '0') == '1'
+        self._templates = {}
         
         # Create templates directory if it doesn't exist
         if app:
@@ -85,11 +92,8 @@ class EmailService:
             }
             
             # Render HTML content from template
-            template_path = os.path.join(self.templates_dir, template_name)
-            if os.path.exists(template_path):
-                with open(template_path, 'r') as f:
-                    template_content = f.read()
-                    
+            template_content = self.load_template(template_name)
+            if template_content is not None:
                 # Simple template rendering (in a real app, use a proper template engine)
                 html_content = template_content
                 for key, value in template_vars.items():
@@ -129,8 +133,9 @@ class EmailService:
                 return True
             
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
+            with timed('smtp_send'), smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+                if self.smtp_use_tls:
+                    server.starttls()
                 server.login(self.smtp_username, self.smtp_password)
                 server.send_message(msg)
                 
@@ -140,6 +145,18 @@ class EmailService:
             current_app.logger.error(f"Error sending email: {str(e)}")
             return False
     
+    def load_template(self, template_name):
+        """Read a template from disk once and keep it in memory"""
+        template_content = self._templates.get(template_name)
+        if template_content is None:
+            template_path = os.path.join(self.templates_dir, template_name)
+            if not os.path.exists(template_path):
+                return None
+            with open(template_path, 'r') as f:
+                template_content = f.read()
+            self._templates[template_name] = template_content
+        return template_content
+    
     def send_bulk_emails(self, recipients, subject, message, template_name='default.html', **kwargs):
         """
         Send the same email to multiple recipients
@@ -159,18 +176,7 @@ class EmailService:
             'failed': []
         }
         
-        for recipient in recipients:
-            if isinstance(recipient, dict):
-                email = recipient.get('email')
-                name = recipient.get('name', '')
-                recipient_vars = {**kwargs, 'recipient_name': name}
-            else:
-                email = recipient
-                recipient_vars = kwargs
-            
-            if not email:
-                continue
-                
+        for email, recipient_vars in self._expand_recipients(recipients, kwargs):
             success = self.send_email(email, subject, message, template_name, **recipient_vars)
             
             if success:
@@ -179,3 +185,41 @@ class EmailService:
                 results['failed'].append(email)
                 
         return results
+    
+    async def send_bulk_emails_async(self, recipients, subject, message, template_name='default.html', **kwargs):
+        """
+        Send the same email to multiple recipients over concurrent SMTP sessions
+        
+        At most ``SMTP_MAX_CONCURRENCY`` sends are in flight at once; each runs
+        on the shared blocking I/O pool. Returns the same shape as send_bulk_emails.
+        """
+        limit = asyncio.Semaphore(int(os.environ.get('SMTP_MAX_CONCURRENCY', 8)))
+        
+        async def send_one(email, recipient_vars):
+            async with limit:
+                return await run_blocking(self.send_email, email, subject, message, template_name, **recipient_vars)
+        
+        expanded = list(self._expand_recipients(recipients, kwargs))
+        outcomes = await asyncio.gather(*(send_one(email, recipient_vars) for email, recipient_vars in expanded))
+        
+        results = {
+            'success': [],
+            'failed': []
+        }
+        for (email, _), success in zip(expanded, outcomes):
+            results['success' if success else 'failed'].append(email)
+        return results
+    
+    @staticmethod
+    def _expand_recipients(recipients, kwargs):
+        """Yield (email, template vars) for each recipient that has an address"""
+        for recipient in recipients:
+            if isinstance(recipient, dict):
+                email = recipient.get('email')
+                recipient_vars = {**kwargs, 'recipient_name': recipient.get('name', '')}
+            else:
+                email = recipient
+                recipient_vars = kwargs
+            
+            if email:
+                yield email, recipient_vars
@@ -0,0 +1,35 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+_io_executor = None
+_io_pid = None
+_io_lock = threading.Lock()
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Process-wide pool for blocking file and network I/O, recreated after fork"""
+    global _io_executor, _io_pid
+    if _io_pid != os.getpid():
+        with _io_lock:
+            if _io_pid != os.getpid():
+                _io_executor = ThreadPoolExecutor(
+                    max_workers=int(os.environ.get('IO_EXECUTOR_THREADS', 32)),
+                    thread_name_prefix='blocking-io'
+                )
+                _io_pid = os.getpid()
+    return _io_executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking call on the I/O pool and await it from an async view.
+
+    The caller's context variables (Flask's app and request context among
+    them) are copied into the worker thread, so ``current_app`` keeps working.
+    """
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(get_io_executor(), call)
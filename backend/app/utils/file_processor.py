@@ -1,26 +1,44 @@
 import os
+import threading
 from werkzeug.utils import secure_filename
 from typing import Optional, Tuple
 import magic
 import logging
+from app.utils.blob_store import Blob, BlobStore, BlobTooLarge
+from app.utils.metrics import timed_stage
+
+# libmagic handles are not thread-safe, so each thread keeps its own
+_sniffers = threading.local()
 
 class FileProcessor:
     ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'txt'}
     MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+    SNIFF_BYTES = 2048
+    VALID_MIMES = {
+        'application/pdf',
+        'application/msword',
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'text/plain'
+    }
     
-    def __init__(self, upload_folder: str):
+    def __init__(self, upload_folder: str, blob_store: Optional[BlobStore] = None):
         self.upload_folder = upload_folder
         self.logger = logging.getLogger(__name__)
         
         # Create upload folder if it doesn't exist
         if not os.path.exists(upload_folder):
             os.makedirs(upload_folder)
+        
+        # Uploads are stored by content hash, so concurrent uploads never share a path
+        self.blob_store = blob_store or BlobStore(
+            upload_folder, max_derived=int(os.environ.get('UPLOAD_CACHE_MAX_ENTRIES', 10000)))
     
     def allowed_file(self, filename: str) -> bool:
         """Check if the file extension is allowed"""
         return '.' in filename and \
                filename.rsplit('.', 1)[1].lower() in self.ALLOWED_EXTENSIONS
     
+    @timed_stage('file_validation')
     def validate_file(self, file) -> Tuple[bool, Optional[str]]:
         """Validate file type and size"""
         try:
@@ -32,30 +50,29 @@ class FileProcessor:
             if size > self.MAX_FILE_SIZE:
                 return False, "File size exceeds maximum limit of 5MB"
             
-            # Check file type using python-magic
-            mime = magic.Magic(mime=True)
-            file_type = mime.from_buffer(file.read(2048))
+            head = file.read(self.SNIFF_BYTES)
             file.seek(0)
             
-            # Validate MIME type
-            valid_mimes = {
-                'application/pdf',
-                'application/msword',
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'text/plain'
-            }
-            
-            if file_type not in valid_mimes:
-                return False, f"Invalid file type: {file_type}"
-            
-            return True, None
+            is_valid, _, error_message = self.check_file_type(head)
+            return is_valid, error_message
             
         except Exception as e:
             self.logger.error(f"Error validating file: {str(e)}")
             return False, "Error validating file"
     
-    def save_file(self, file) -> Tuple[bool, Optional[str], Optional[str]]:
-        """Save uploaded file and return success status and file path"""
+    def check_file_type(self, head: bytes) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Sniff the MIME type from the first bytes of a file; returns (valid, mime, error)"""
+        # Check file type using python-magic; loading its database is the costly part
+        sniffer = getattr(_sniffers, 'mime', None)
+        if sniffer is None:
+            sniffer = _sniffers.mime = magic.Magic(mime=True)
+        file_type = sniffer.from_buffer(head)
+        if file_type not in self.VALID_MIMES:
+            return False, file_type, f"Invalid file type: {file_type}"
+        return True, file_type, None
+    
+    def save_file(self, file) -> Tuple[bool, Optional[Blob], Optional[str]]:
+        """Store uploaded file by content hash and return success status and a blob reference"""
         try:
             if not file or not file.filename:
                 return False, None, "No file provided"
@@ -63,48 +80,68 @@ class FileProcessor:
             if not self.allowed_file(file.filename):
                 return False, None, "File type not allowed"
             
-            # Validate file
-            is_valid, error_message = self.validate_file(file)
-            if not is_valid:
-                return False, None, error_message
+            # Hash while streaming to disk; the size limit is enforced on the way
+            try:
+                blob = self.blob_store.put(file.stream, max_size=self.MAX_FILE_SIZE)
+            except BlobTooLarge:
+                return False, None, "File size exceeds maximum limit of 5MB"
             
-            # Secure the filename
-            filename = secure_filename(file.filename)
-            file_path = os.path.join(self.upload_folder, filename)
+            # Text is only recorded for content that passed validation, so a
+            # byte-identical re-upload needs no sniffing
+            if self.blob_store.get_derived(blob.digest, 'text') is None:
+                with blob.open() as f:
+                    is_valid, error_message = self.validate_file(f)
+                if not is_valid:
+                    self.blob_store.release(blob)
+                    return False, None, error_message
             
-            # Save file
-            file.save(file_path)
-            self.logger.info(f"File saved successfully: {file_path}")
+            self.logger.info(f"File stored: {secure_filename(file.filename)} as {blob.digest}")
             
-            return True, file_path, None
+            return True, blob, None
             
         except Exception as e:
             self.logger.error(f"Error saving file: {str(e)}")
             return False, None, "Error saving file"
     
-    def read_file_content(self, file_path: str) -> Tuple[bool, Optional[str], Optional[str]]:
-        """Read content from saved file"""
+    @timed_stage('text_extraction')
+    def read_file_content(self, blob: Blob) -> Tuple[bool, Optional[str], Optional[str]]:
+        """Read content from a stored file, reusing text extracted from identical content"""
         try:
-            if not os.path.exists(file_path):
+            content = self.blob_store.get_derived(blob.digest, 'text')
+            if content is not None:
+                return True, content, None
+            
+            if not os.path.exists(blob.path):
                 return False, None, "File not found"
             
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with open(blob.path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
+            self.blob_store.set_derived(blob.digest, 'text', content)
             return True, content, None
             
         except Exception as e:
             self.logger.error(f"Error reading file: {str(e)}")
             return False, None, "Error reading file"
     
-    def cleanup_file(self, file_path: str) -> bool:
-        """Remove processed file"""
+    def cached_result(self, digest: str, kind: str):
+        """A result previously recorded for identical content, or None"""
+        return self.blob_store.get_derived(digest, kind)
+    
+    def store_result(self, blob: Blob, kind: str, value) -> None:
+        """Remember a result computed from this content for later identical uploads"""
+        try:
+            self.blob_store.set_derived(blob.digest, kind, value)
+        except Exception as e:
+            self.logger.error(f"Error caching result: {str(e)}")
+    
+    def cleanup_file(self, blob: Blob) -> bool:
+        """Release a stored file; it is removed once no upload references it"""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                self.logger.info(f"File removed: {file_path}")
-                return True
-            return False
+            removed = self.blob_store.release(blob)
+            if removed:
+                self.logger.info(f"File removed: {blob.digest}")
+            return removed
         except Exception as e:
             self.logger.error(f"Error removing file: {str(e)}")
             return False 
\ No newline at end of file
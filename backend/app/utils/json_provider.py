@@ -0,0 +1,89 @@
+import math
+import os
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with stdlib semantics kept.
+
+    Keys are still sorted, dates still use the HTTP date format and Decimal
+    still becomes a string; non-ASCII text is written as UTF-8 rather than
+    escaped. Anything orjson refuses (integers beyond 64 bits, extra
+    ``dumps`` arguments such as ``cls``) goes through the stdlib path, and
+    so do NaN and infinite floats, which orjson would write as ``null``.
+    """
+
+    def _options(self, indent: bool = False) -> int:
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _encode(self, obj: Any, indent: bool = False) -> bytes:
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+        # NaN only ever shows up as null, so most bodies need no second look
+        if b'null' in body and _has_non_finite(obj):
+            raise orjson.JSONEncodeError('non-finite float')
+        return body
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        indent = kwargs.pop('indent', None)
+        kwargs.pop('ensure_ascii', None)
+        if kwargs or indent not in (None, 2):
+            return super().dumps(obj, indent=indent, **kwargs)
+        try:
+            return self._encode(obj, indent=indent == 2).decode('utf-8')
+        except orjson.JSONEncodeError:
+            return super().dumps(obj, indent=indent, **kwargs)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError:
+            # e.g. NaN or integers beyond 64 bits, which the stdlib accepts
+            return super().loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        try:
+            body = self._encode(obj, indent=indent) + b'\n'
+        except orjson.JSONEncodeError:
+            return super().response(obj)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _has_non_finite(obj: Any) -> bool:
+    """Whether a float in ``obj``, or in the dicts, lists and tuples within it, is NaN or infinite"""
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, float):
+            if not math.isfinite(item):
+                return True
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return False
+
+
+def make_json_provider(app):
+    """The provider named by ``JSON_PROVIDER`` (auto, orjson or stdlib)"""
+    choice = os.environ.get('JSON_PROVIDER', 'auto')
+    if choice == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER=orjson but orjson is not installed')
+    if choice == 'stdlib' or orjson is None:
+        return DefaultJSONProvider(app)
+    return FastJSONProvider(app)
@@ -0,0 +1,247 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import Dict, List, Sequence
+
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+from app.utils.metrics import registry
+
+DROPPED = registry.counter('log_records_dropped_total', 'Log records dropped because the queue was full')
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the request context attached"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'pid': record.process,
+            'source': f'{record.pathname}:{record.lineno}'
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Copies request id, route and method onto records emitted during a request"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if has_request_context():
+            record.request_id = g.get('request_id')
+            record.route = request.url_rule.rule if request.url_rule is not None else request.path
+            record.method = request.method
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of low-level records on noisy paths.
+
+    The decision is made per request id, so a sampled request keeps all of
+    its lines and a dropped one loses all of them.
+    """
+
+    def __init__(self, rates: Dict[int, float], paths: Sequence[str] = ()):
+        super().__init__()
+        self.rates = rates
+        self.paths = tuple(paths)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        if rate is None or rate >= 1.0:
+            return True
+        if self.paths and not has_request_context():
+            return True
+        if self.paths and not request.path.startswith(self.paths):
+            return True
+        key = getattr(record, 'request_id', None) or f'{record.created}:{record.lineno}'
+        return zlib.crc32(key.encode('utf-8')) % 10000 < rate * 10000
+
+
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """Writes a batch of records with a single write, flush and rollover check"""
+
+    def emit_batch(self, records: List[logging.LogRecord]):
+        try:
+            lines = [self.format(record) + self.terminator for record in records]
+            payload = ''.join(lines)
+            if self.stream is None:
+                self.stream = self._open()
+            if self.maxBytes > 0:
+                # maxBytes is in bytes, and records can hold non-ASCII text
+                size = len(payload.encode(self.stream.encoding, self.errors or 'strict'))
+                self.stream.seek(0, 2)
+                if self.stream.tell() + size >= self.maxBytes and self.stream.tell() > 0:
+                    self.doRollover()
+            if self.stream is None:
+                # doRollover leaves a delayed handler without a stream
+                self.stream = self._open()
+            self.stream.write(payload)
+            self.stream.flush()
+        except Exception:
+            self.handleError(records[-1])
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueues records without ever blocking the request thread.
+
+    When the queue is full the record is dropped and counted. The listener
+    is (re)started lazily, so the pipeline also works in forked workers.
+    """
+
+    def __init__(self, pipeline: 'AsyncLogPipeline'):
+        super().__init__(None)
+        self.pipeline = pipeline
+
+    def enqueue(self, record: logging.LogRecord):
+        self.pipeline.ensure_started()
+        try:
+            self.pipeline.queue.put_nowait(record)
+        except queue.Full:
+            self.pipeline.dropped += 1
+            DROPPED.inc()
+
+
+class AsyncLogPipeline:
+    """Request threads only enqueue; a background thread does the file I/O"""
+
+    def __init__(self, handler: BatchingRotatingFileHandler, max_queue: int = 10000, batch_size: int = 256):
+        self.handler = handler
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._pid = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+        atexit.register(self.stop)
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # Forked child: the parent's listener thread did not survive the fork
+                self.queue = queue.Queue(maxsize=self.queue.maxsize)
+                self.handler.stream = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                return
+            batch = [record]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    stop = True
+                    break
+                batch.append(record)
+            self.handler.emit_batch(batch)
+            if stop:
+                return
+
+    def stop(self, timeout: float = 2.0):
+        """Drain queued records and stop the writer thread"""
+        if self._thread is None or self._pid != os.getpid() or self._stopping:
+            return
+        self._stopping = True
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+def _parse_sample_rates(value: str) -> Dict[int, float]:
+    """Parse ``INFO=0.1,DEBUG=0`` into {levelno: rate}"""
+    rates = {}
+    for part in filter(None, (p.strip() for p in value.split(','))):
+        level, _, rate = part.partition('=')
+        rates[logging.getLevelName(level.strip().upper())] = float(rate)
+    return rates
+
+
+def configure_logging(app) -> AsyncLogPipeline:
+    """Attach the queue-based JSON logging pipeline and request context hooks"""
+    log_dir = app.config.get('LOG_DIR', os.environ.get('LOG_DIR', 'logs'))
+    os.makedirs(log_dir, exist_ok=True)
+
+    file_handler = BatchingRotatingFileHandler(
+        os.path.join(log_dir, 'app.log'),
+        maxBytes=int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        backupCount=int(os.environ.get('LOG_BACKUP_COUNT', 10)),
+        delay=True
+    )
+    file_handler.setFormatter(JsonFormatter())
+    pipeline = AsyncLogPipeline(
+        file_handler,
+        max_queue=int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+        batch_size=int(os.environ.get('LOG_BATCH_SIZE', 256))
+    )
+
+    queue_handler = NonBlockingQueueHandler(pipeline)
+    queue_handler.setLevel(logging.INFO)
+    queue_handler.addFilter(RequestContextFilter())
+    sample_rates = _parse_sample_rates(os.environ.get('LOG_SAMPLE_RATES', ''))
+    if sample_rates:
+        sample_paths = [p for p in os.environ.get('LOG_SAMPLE_PATHS', '').split(',') if p]
+        queue_handler.addFilter(SamplingFilter(sample_rates, sample_paths))
+    # Flask's stderr handler would write on the request thread; the queue is the only path out
+    app.logger.removeHandler(default_handler)
+    # app.logger is shared by every app of this name; replace the pipeline of an earlier one
+    for handler in [h for h in app.logger.handlers if isinstance(h, NonBlockingQueueHandler)]:
+        app.logger.removeHandler(handler)
+        handler.pipeline.stop()
+    app.logger.addHandler(queue_handler)
+    app.logger.setLevel(logging.INFO)
+    app.log_pipeline = pipeline
+
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.log_start = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+        start = g.get('log_start')
+        if start is not None:
+            app.logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+                'status': response.status_code,
+                'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+                'bytes': response.content_length
+            })
+        return response
+
+    return pipeline
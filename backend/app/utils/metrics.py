@@ -0,0 +1,328 @@
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+MULTIPROC_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str,
+                 labelnames: Tuple[str, ...] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+        self.registry.maybe_flush()
+
+
+class Gauge(_Metric):
+    """Merged across processes by summing, or by taking the max for host-wide values"""
+    kind = 'gauge'
+
+    def __init__(self, registry, name, documentation, labelnames=(), mode='sum'):
+        super().__init__(registry, name, documentation, labelnames)
+        self.mode = mode
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+        self.registry.maybe_flush()
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            self.values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self.registry.lock:
+            state = self.values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self.values[key] = [0.0] * (len(self.buckets) + 3)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-2] += value
+            state[-1] += 1
+        self.registry.maybe_flush()
+
+
+class MetricsRegistry:
+    """Thread-safe metric store rendered in the Prometheus text format.
+
+    With ``PROMETHEUS_MULTIPROC_DIR`` set, each process periodically writes
+    its values to ``metrics_<pid>.json`` in that directory and a scrape of any
+    worker merges every process's file, so all gunicorn workers are counted.
+    Counters and histograms are summed; gauges are summed (or maxed, for
+    ``mode='max'``) over live processes.
+    """
+
+    def __init__(self, multiproc_dir: Optional[str] = None, flush_interval: float = 1.0):
+        self.lock = threading.RLock()
+        self.metrics: Dict[str, _Metric] = {}
+        self.collect_hooks: List[Callable[[], None]] = []
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._last_flush = 0.0
+        if multiproc_dir:
+            os.makedirs(multiproc_dir, exist_ok=True)
+            atexit.register(self.flush)
+
+    def reset(self):
+        """Forget every value, e.g. those a forked worker inherited from the master.
+
+        The lock is replaced rather than taken: another master thread may have
+        held it at fork time, and the child has no thread to release it.
+        """
+        self.lock = threading.RLock()
+        for metric in self.metrics.values():
+            metric.values = {}
+        self._last_flush = 0.0
+
+    def _register(self, metric_class, name, documentation, labelnames=(), **kwargs):
+        with self.lock:
+            existing = self.metrics.get(name)
+            if existing is not None:
+                return existing
+            metric = metric_class(self, name, documentation, labelnames, **kwargs)
+            self.metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=(), mode: str = 'sum') -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames, mode=mode)
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def add_collect_hook(self, hook: Callable[[], None]):
+        """Run ``hook`` (e.g. to refresh gauges) before every flush and scrape"""
+        self.collect_hooks.append(hook)
+
+    def _run_collect_hooks(self):
+        for hook in self.collect_hooks:
+            try:
+                hook()
+            except Exception:
+                pass
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Copy of this process's values in a JSON-serializable layout"""
+        with self.lock:
+            return {
+                name: {
+                    'kind': metric.kind,
+                    'help': metric.documentation,
+                    'labelnames': list(metric.labelnames),
+                    'buckets': list(getattr(metric, 'buckets', ())),
+                    'mode': getattr(metric, 'mode', 'sum'),
+                    'values': [[list(key), list(value) if isinstance(value, list) else value]
+                               for key, value in metric.values.items()]
+                }
+                for name, metric in self.metrics.items()
+            }
+
+    def maybe_flush(self):
+        if not self.multiproc_dir:
+            return
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._last_flush = now
+            self.flush()
+
+    def flush(self):
+        """Write this process's values to the shared multiprocess directory"""
+        if not self.multiproc_dir:
+            return
+        self._run_collect_hooks()
+        path = os.path.join(self.multiproc_dir, f'metrics_{os.getpid()}.json')
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'pid': os.getpid(), 'metrics': self.snapshot()}, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def _load_snapshots(self) -> List[Tuple[bool, Dict[str, dict]]]:
+        self._run_collect_hooks()
+        own = (True, self.snapshot())
+        if not self.multiproc_dir:
+            return [own]
+        snapshots = [own]
+        for filename in os.listdir(self.multiproc_dir):
+            if not (filename.startswith('metrics_') and filename.endswith('.json')):
+                continue
+            try:
+                pid = int(filename[len('metrics_'):-len('.json')])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            try:
+                with open(os.path.join(self.multiproc_dir, filename)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            snapshots.append((_pid_alive(pid), data['metrics']))
+        return snapshots
+
+    def collect(self) -> Dict[str, dict]:
+        """Merge the values of every process into one snapshot"""
+        merged: Dict[str, dict] = {}
+        for alive, snapshot in self._load_snapshots():
+            for name, metric in snapshot.items():
+                if metric['kind'] == 'gauge' and not alive:
+                    continue
+                target = merged.setdefault(name, {**metric, 'values': {}})
+                for key, value in metric['values']:
+                    key = tuple(key)
+                    current = target['values'].get(key)
+                    if current is None:
+                        target['values'][key] = list(value) if isinstance(value, list) else value
+                    elif isinstance(value, list):
+                        target['values'][key] = [a + b for a, b in zip(current, value)]
+                    elif metric.get('mode') == 'max':
+                        target['values'][key] = max(current, value)
+                    else:
+                        target['values'][key] = current + value
+        return merged
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f'# HELP {name} {metric["help"]}')
+            lines.append(f'# TYPE {name} {metric["kind"]}')
+            labelnames = metric['labelnames']
+            for key, value in sorted(metric['values'].items()):
+                labels = list(zip(labelnames, key))
+                if metric['kind'] != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                    continue
+                cumulative = 0.0
+                for bound, count in zip(list(metric['buckets']) + ['+Inf'], value[:-2]):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _format_value(bound)
+                    lines.append(f'{name}_bucket{_format_labels(labels + [("le", le)])} {_format_value(cumulative)}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-2])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {_format_value(value[-1])}')
+        return '\n'.join(lines) + '\n'
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ''
+    escaped = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value) -> str:
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def mark_process_dead(pid: int):
+    """Drop a dead worker's gauges (call from gunicorn's ``child_exit`` hook)"""
+    directory = os.environ.get(MULTIPROC_DIR_ENV)
+    if not directory:
+        return
+    path = os.path.join(directory, f'metrics_{pid}.json')
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        data['metrics'] = {name: metric for name, metric in data['metrics'].items()
+                           if metric['kind'] != 'gauge'}
+        with open(path, 'w') as f:
+            json.dump(data, f)
+    except (OSError, ValueError):
+        pass
+
+
+registry = MetricsRegistry(multiproc_dir=os.environ.get(MULTIPROC_DIR_ENV))
+
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by route', ('method', 'endpoint', 'status'))
+REQUESTS_IN_FLIGHT = registry.gauge(
+    'http_requests_in_flight', 'Requests currently being served', ('endpoint',))
+RESPONSE_SIZE = registry.histogram(
+    'http_response_size_bytes', 'Response body size by route', ('method', 'endpoint'), buckets=SIZE_BUCKETS)
+STAGE_LATENCY = registry.histogram(
+    'app_stage_duration_seconds', 'Time spent in internal processing stages', ('stage',))
+
+
+@contextmanager
+def timed(stage: str):
+    """Record the duration of an internal stage, e.g. ``with timed('sentiment'):``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage=stage)
+
+
+def timed_stage(stage: str):
+    """Decorator form of :func:`timed`"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,49 +1,56 @@
 import random
 import re
-from typing import Dict, List, Any
+import zlib
+from typing import Dict, List, Any, Tuple
+from app.utils.analysis_backend import AnalysisBackend
+from app.utils.metrics import timed_stage
+from app.utils.resume_sections import ResumeSections, reads
+from app.utils.taxonomy import load_taxonomy
 
-class MockAIModel:
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+# Weighted sentiment lexicon, matched against whole tokens only
+SENTIMENT_LEXICON = {
+    **dict.fromkeys([
+        "accomplished", "accomplishment", "accomplishments", "achieved", "achievement",
+        "achievements", "improved", "improvement", "improvements", "increased",
+        "developed", "led", "managed", "created", "successful", "successfully",
+        "award", "awards", "awarded", "recognition", "recognized", "promoted",
+        "promotion", "excellence", "excellent"
+    ], 1.0),
+    **dict.fromkeys([
+        "failed", "failure", "failures", "mistake", "mistakes", "struggle", "struggled",
+        "terminated", "fired"
+    ], -1.0),
+    # Common in neutral resume phrasing ("solved a problem", "left to join"),
+    # so they count for less
+    **dict.fromkeys([
+        "error", "errors", "problem", "problems", "difficulty", "difficulties",
+        "challenge", "challenges", "left"
+    ], -0.5)
+}
+
+# Bigrams whose first token is not sentiment-bearing in context
+NEUTRAL_BIGRAMS = {("problem", "solving"), ("problem", "solver"), ("error", "handling")}
+
+NEGATIONS = {"not", "no", "never", "without", "didn't", "wasn't", "hardly"}
+NEGATION_WINDOW = 3
+
+class MockAIModel(AnalysisBackend):
     def __init__(self):
-        # Expanded skills list categorized by domain
-        self.skills_by_category = {
-            "frontend": [
-                "JavaScript", "TypeScript", "React", "Angular", "Vue.js", 
-                "HTML", "CSS", "SASS", "LESS", "Redux", "Webpack", "Babel",
-                "Next.js", "Gatsby", "Material UI", "Tailwind CSS"
-            ],
-            "backend": [
-                "Node.js", "Express", "Django", "Flask", "Spring Boot", 
-                "Ruby on Rails", "ASP.NET", "Laravel", "FastAPI", "GraphQL",
-                "REST API", "Microservices", "Serverless"
-            ],
-            "database": [
-                "SQL", "MySQL", "PostgreSQL", "MongoDB", "Redis", "Cassandra",
-                "DynamoDB", "Firebase", "Oracle", "SQLite", "Elasticsearch"
-            ],
-            "devops": [
-                "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Jenkins", 
-                "CircleCI", "GitHub Actions", "Terraform", "Ansible", "Prometheus",
-                "Grafana", "ELK Stack", "Git", "CI/CD"
-            ],
-            "data_science": [
-                "Python", "R", "Machine Learning", "Deep Learning", "TensorFlow", 
-                "PyTorch", "Pandas", "NumPy", "Scikit-learn", "Data Analysis",
-                "Data Visualization", "NLP", "Computer Vision", "Big Data"
-            ],
-            "soft_skills": [
-                "Communication", "Leadership", "Teamwork", "Problem Solving", 
-                "Critical Thinking", "Time Management", "Adaptability", "Creativity",
-                "Project Management", "Agile", "Scrum"
-            ]
-        }
-        
-        # Flatten skills list for easy access
-        self.skills = []
-        for category in self.skills_by_category.values():
-            self.skills.extend(category)
+        # Skills vocabulary, aliases and matcher, shared with ResumeAnalyzer
+        self.taxonomy = load_taxonomy()
+        self.skills_by_category = self.taxonomy.categories
+        self.skills = self.taxonomy.skills
         
         self.sentiments = ["positive", "neutral", "negative"]
         
+    def skill_vocabulary(self) -> Dict[str, List[str]]:
+        return self.skills_by_category
+    
+    def skill_aliases(self) -> Dict[str, str]:
+        return self.taxonomy.aliases
+    
     def analyze_resume(self, text: str) -> Dict[str, Any]:
         """Mock resume analysis"""
         return {
@@ -67,23 +74,16 @@ class MockAIModel:
             ]
         }
     
+    @timed_stage('skill_matching')
     def extract_skills(self, text: str) -> List[str]:
         """Extract skills from resume text"""
         if not text:
             return []
         
         # In a real implementation, this would use NLP to extract skills
-        # For our mock implementation, we'll extract skills that appear in the text
-        extracted_skills = []
-        
-        # If text is provided, look for actual skills in the text
-        if text:
-            text_lower = text.lower()
-            for skill in self.skills:
-                # Use word boundary to avoid partial matches
-                pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-                if re.search(pattern, text_lower):
-                    extracted_skills.append(skill)
+        # For our mock implementation, we'll extract skills (or their aliases)
+        # that appear in the text as whole words
+        extracted_skills = self.taxonomy.match(text)
         
         # If we didn't find any skills or text is empty, generate random skills
         if not extracted_skills:
@@ -101,62 +101,76 @@ class MockAIModel:
         
         return extracted_skills
     
+    @timed_stage('sentiment')
     def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """Analyze sentiment of resume text"""
-        # In a real implementation, this would use NLP for sentiment analysis
-        # For our mock implementation, we'll generate a realistic sentiment score
+        # Single pass over the narrative sections' tokens against a weighted
+        # lexicon; the result depends only on the text so it can be cached
+        positive, negative = self._score_tokens(ResumeSections(text)) if text else (0.0, 0.0)
         
-        # Default to neutral with medium confidence
-        sentiment = "neutral"
-        score = 0.5
+        # Calculate sentiment score (0 to 1), neutral when nothing matched
+        total = positive + negative
+        score = positive / total if total > 0 else 0.5
         
-        # If text is provided, do some basic analysis
-        if text:
-            text_lower = text.lower()
-            
-            # Look for positive keywords
-            positive_keywords = ["accomplished", "achieved", "improved", "increased", 
-                               "developed", "led", "managed", "created", "successful",
-                               "award", "recognition", "promoted", "excellence"]
-            
-            # Look for negative keywords
-            negative_keywords = ["failed", "mistake", "error", "problem", "difficulty",
-                               "challenge", "struggle", "terminated", "fired", "left"]
-            
-            # Count occurrences
-            positive_count = sum(1 for word in positive_keywords if word in text_lower)
-            negative_count = sum(1 for word in negative_keywords if word in text_lower)
-            
-            # Calculate sentiment score (0 to 1)
-            total = positive_count + negative_count
-            if total > 0:
-                score = positive_count / total
-            
-            # Determine sentiment label
-            if score >= 0.7:
-                sentiment = "positive"
-            elif score <= 0.3:
-                sentiment = "negative"
-            else:
-                sentiment = "neutral"
+        # Determine sentiment label
+        if score >= 0.7:
+            sentiment = "positive"
+        elif score <= 0.3:
+            sentiment = "negative"
         else:
-            # Generate random sentiment if no text
-            sentiment = random.choice(self.sentiments)
-            score = random.uniform(0.3, 0.9)
-            if sentiment == "positive":
-                score = random.uniform(0.7, 0.95)
-            elif sentiment == "negative":
-                score = random.uniform(0.05, 0.3)
-            else:
-                score = random.uniform(0.4, 0.6)
+            sentiment = "neutral"
         
         return {
             "label": sentiment,
             "score": round(score, 2),
-            "key_phrases": self._generate_key_phrases(sentiment)
+            "key_phrases": self._generate_key_phrases(sentiment, text or "")
         }
     
-    def _generate_key_phrases(self, sentiment: str) -> List[str]:
+    def analyze_sentiment_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Analyze sentiment of many documents, scoring identical texts once"""
+        results: Dict[str, Dict[str, Any]] = {}
+        for text in texts:
+            key = text or ""
+            if key not in results:
+                results[key] = self.analyze_sentiment(key)
+        return [results[text or ""] for text in texts]
+    
+    @reads('header', 'summary', 'experience', 'projects')
+    def _score_tokens(self, text: str) -> Tuple[float, float]:
+        """Sum positive and negative lexicon weights, flipping negated terms"""
+        text_lower = text.lower()
+        positive = 0.0
+        negative = 0.0
+        negated_until = -1
+        previous = None
+        last_weight = 0.0
+        for position, match in enumerate(TOKEN_PATTERN.finditer(text_lower)):
+            token = match.group()
+            if (previous, token) in NEUTRAL_BIGRAMS:
+                # e.g. "problem solving": take back the weight counted for "problem"
+                if last_weight > 0:
+                    positive -= last_weight
+                else:
+                    negative += last_weight
+                previous = token
+                last_weight = 0.0
+                continue
+            if token in NEGATIONS:
+                negated_until = position + NEGATION_WINDOW
+                weight = 0.0
+            else:
+                weight = SENTIMENT_LEXICON.get(token, 0.0)
+                if position <= negated_until:
+                    weight = -weight
+            previous = token
+            last_weight = weight
+            if weight > 0:
+                positive += weight
+            elif weight < 0:
+                negative -= weight
+        return max(positive, 0.0), max(negative, 0.0)
+    
+    def _generate_key_phrases(self, sentiment: str, text: str = "") -> List[str]:
         """Generate key phrases based on sentiment"""
         phrases = {
             "positive": [
@@ -176,9 +190,11 @@ class MockAIModel:
             ]
         }
         
-        # Select 2-4 random phrases from the appropriate list
-        num_phrases = random.randint(2, 4)
-        return random.sample(phrases.get(sentiment, phrases["neutral"]), num_phrases)
+        # Select 2-4 phrases from the appropriate list, seeded by the text so
+        # the same resume always gets the same phrases
+        rng = random.Random(zlib.crc32(text.encode("utf-8")))
+        num_phrases = rng.randint(2, 4)
+        return rng.sample(phrases.get(sentiment, phrases["neutral"]), num_phrases)
     
     def analyze_candidate(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
         """Mock candidate analysis"""
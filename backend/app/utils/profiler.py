@@ -0,0 +1,189 @@
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_HZ = 100
+MAX_HZ = 1000
+MAX_STACK_DEPTH = 128
+
+
+# Path prefixes stripped from frame labels to keep them short and stable
+_PATH_PREFIXES = sorted(
+    {path + os.sep for path in sys.path if path and os.path.isdir(path)} |
+    {os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep},
+    key=len, reverse=True
+)
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            filename = filename[len(prefix):]
+            break
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+class Profile:
+    """Aggregated stack samples"""
+
+    def __init__(self, hz: float):
+        self.hz = hz
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = time.time()
+        self.duration = 0.0
+
+    def add(self, stack: Tuple[str, ...]):
+        self.stacks[stack] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """Collapsed-stack output, one ``root;...;leaf count`` line per stack"""
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Functions ranked by self time (samples where they were the leaf frame)"""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            self_counts[stack[-1]] += count
+            for label in set(stack):
+                total_counts[label] += count
+        total = max(self.samples, 1)
+        return [
+            {
+                'function': label,
+                'selfSamples': count,
+                'selfPercent': round(100.0 * count / total, 2),
+                'totalSamples': total_counts[label],
+                'totalPercent': round(100.0 * total_counts[label] / total, 2)
+            }
+            for label, count in self_counts.most_common(limit)
+        ]
+
+    def to_dict(self, limit: int = 20) -> Dict[str, Any]:
+        return {
+            'samples': self.samples,
+            'hz': self.hz,
+            'seconds': round(self.duration, 3),
+            'startedAt': self.started_at,
+            'top': self.top(limit),
+            'collapsed': self.collapsed()
+        }
+
+
+class SamplingProfiler:
+    """Statistical profiler that periodically snapshots other threads' stacks.
+
+    A sampler thread wakes ``hz`` times a second and reads the current frame
+    of each target thread via ``sys._current_frames()``. Profiled code runs
+    untouched (no tracing hooks), so the overhead is one stack walk per
+    sample and the profiler is safe to point at a live worker. ``helpers``
+    maps threads that work for the targets (an async view's event loop, the
+    analysis batcher) to a role, which becomes the root frame of their stacks.
+    """
+
+    def __init__(self, threads: Callable[[], Iterable[int]], hz: float = DEFAULT_HZ,
+                 helpers: Optional[Callable[[], Dict[int, str]]] = None):
+        self.threads = threads
+        self.helpers = helpers
+        hz = float(hz)
+        self.hz = min(max(hz, 1.0), MAX_HZ) if math.isfinite(hz) else DEFAULT_HZ
+        self.profile = Profile(self.hz)
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self):
+        self._sampler = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._started = time.perf_counter()
+        self._sampler.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.profile.duration = time.perf_counter() - self._started
+        return self.profile
+
+    def run_for(self, seconds: float) -> Profile:
+        """Sample for ``seconds`` on the calling thread's behalf and return the profile"""
+        self.start()
+        self._stop.wait(seconds)
+        return self.stop()
+
+    def _run(self):
+        interval = 1.0 / self.hz
+        own_ident = threading.get_ident()
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            frames = sys._current_frames()
+            for ident in list(self.threads()):
+                if ident == own_ident:
+                    continue
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.profile.add(_walk(frame))
+            # Threads doing work on the targets' behalf, rooted at their role
+            for ident, role in (self.helpers() if self.helpers else {}).items():
+                frame = frames.get(ident)
+                if frame is not None and ident != own_ident:
+                    self.profile.add((f'[{role}]',) + _walk(frame))
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind (e.g. GIL contention); don't try to catch up
+                next_tick = time.perf_counter()
+
+
+def _walk(frame) -> Tuple[str, ...]:
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class ThreadRegistry:
+    """Idents of threads currently serving requests, and of helper threads working for them"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idents = set()
+        self._helpers: Dict[int, Tuple[int, str]] = {}
+
+    def add(self, ident: int):
+        with self._lock:
+            self._idents.add(ident)
+
+    def discard(self, ident: int):
+        with self._lock:
+            self._idents.discard(ident)
+
+    def add_helper(self, ident: int, owner: int, role: str):
+        """Record that thread ``ident`` is doing ``role`` work for request thread ``owner``"""
+        with self._lock:
+            self._helpers[ident] = (owner, role)
+
+    def discard_helper(self, ident: int):
+        with self._lock:
+            self._helpers.pop(ident, None)
+
+    def snapshot(self) -> List[int]:
+        with self._lock:
+            return list(self._idents)
+
+    def helpers(self, owner: Optional[int] = None) -> Dict[int, str]:
+        """Helper thread idents and roles, only those working for ``owner`` if given"""
+        with self._lock:
+            return {ident: role for ident, (helper_owner, role) in self._helpers.items()
+                    if owner is None or helper_owner == owner}
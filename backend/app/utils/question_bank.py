@@ -0,0 +1,197 @@
+import hashlib
+import random
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.mock_ai import MockAIModel
+
+# Technical question templates per taxonomy category
+TECHNICAL_TEMPLATES = {
+    "frontend": [
+        "How do you structure state management in a large {skill} application?",
+        "What techniques do you use to diagnose rendering performance problems in {skill}?",
+        "Walk us through how you would make a {skill} interface accessible.",
+        "How do you test components built with {skill}?"
+    ],
+    "backend": [
+        "How would you design a versioned API using {skill}?",
+        "Describe how you handle authentication and authorization in {skill}.",
+        "How do you approach error handling and retries in a {skill} service?",
+        "What would you monitor in a production {skill} deployment?"
+    ],
+    "database": [
+        "How do you decide on indexes when working with {skill}?",
+        "Describe a time you had to diagnose a slow query in {skill}.",
+        "How do you handle schema or data migrations with {skill}?",
+        "What consistency trade-offs have you made when using {skill}?"
+    ],
+    "devops": [
+        "How have you used {skill} to make deployments safer?",
+        "Describe how you would troubleshoot a failing pipeline that relies on {skill}.",
+        "How do you manage secrets and configuration with {skill}?",
+        "What would you automate first when introducing {skill} to a team?"
+    ],
+    "data_science": [
+        "How do you validate a model or analysis built with {skill}?",
+        "Describe a project where {skill} was central to the outcome.",
+        "How do you handle missing or noisy data when working with {skill}?",
+        "How would you explain results produced with {skill} to a non-technical stakeholder?"
+    ],
+    "languages": [
+        "Which {skill} language features do you rely on most, and which do you avoid?",
+        "How do you manage dependencies and builds in a {skill} codebase?",
+        "How do you profile and optimize code written in {skill}?",
+        "What does idiomatic, maintainable {skill} look like to you?"
+    ]
+}
+
+GENERIC_TECHNICAL_TEMPLATES = [
+    "What is the most complex problem you have solved using {skill}?",
+    "How do you keep your {skill} knowledge up to date?",
+    "What are common pitfalls you have seen with {skill}, and how do you avoid them?"
+]
+
+BEHAVIORAL_TEMPLATES = [
+    "Tell us about a time your {skill} made a difference to a project outcome.",
+    "Describe a situation where your {skill} was tested under pressure.",
+    "How have you developed your {skill} over the last few years?"
+]
+
+GENERIC_BEHAVIORAL = [
+    "Tell us about a time you disagreed with a teammate and how you resolved it.",
+    "Describe a project that did not go as planned. What did you learn?",
+    "How do you prioritize when everything seems urgent?",
+    "Tell us about feedback that changed the way you work.",
+    "Describe a time you had to learn something new quickly."
+]
+
+EXPERIENCE_TEMPLATES = [
+    "Which project best demonstrates your experience with {skill}, and what was your role?",
+    "How has your use of {skill} changed as your projects grew in scale?",
+    "What would a new teammate need to know about how you have used {skill} in production?"
+]
+
+GENERIC_EXPERIENCE = [
+    "What in your background best prepares you for a {role} position?",
+    "Walk us through the most significant responsibility you held in your last role.",
+    "What kind of team and work environment do you do your best work in?"
+]
+
+# Industry and business-function experience: asked about, but not as a technology
+DOMAIN_EXPERIENCE_TEMPLATES = [
+    "What did working in {skill} teach you about how the business measures success?",
+    "Which {skill} regulations, constraints or conventions have shaped your technical decisions?",
+    "Tell us about a {skill} problem where understanding the domain changed your solution."
+]
+
+SOFT_SKILL_CATEGORY = "soft_skills"
+DOMAIN_CATEGORY = "domain"
+
+
+class QuestionBank:
+    """Interview questions indexed by skill and category.
+
+    Per-skill question sets are expanded once at construction, so generating a
+    question pack is a handful of dictionary lookups plus a seeded sample.
+    """
+
+    def __init__(self, skills_by_category: Optional[Dict[str, List[str]]] = None,
+                 pool_cache_size: int = 1024):
+        if skills_by_category is None:
+            skills_by_category = MockAIModel().skills_by_category
+
+        self.skill_index: Dict[str, Tuple[str, str]] = {}
+        self.technical: Dict[str, Tuple[str, ...]] = {}
+        self.behavioral: Dict[str, Tuple[str, ...]] = {}
+        self.experience: Dict[str, Tuple[str, ...]] = {}
+
+        for category, skills in skills_by_category.items():
+            for skill in skills:
+                self.skill_index[skill.lower()] = (skill, category)
+                self._index_skill(skill, category)
+
+        self._pools = lru_cache(maxsize=pool_cache_size)(self._build_pools)
+
+    def _index_skill(self, skill: str, category: Optional[str]):
+        """Expand the question templates for a single skill"""
+        if category == SOFT_SKILL_CATEGORY:
+            self.behavioral[skill] = tuple(t.format(skill=skill.lower()) for t in BEHAVIORAL_TEMPLATES)
+            return
+        if category == DOMAIN_CATEGORY:
+            self.experience[skill] = tuple(t.format(skill=skill) for t in DOMAIN_EXPERIENCE_TEMPLATES)
+            return
+        templates = TECHNICAL_TEMPLATES.get(category, []) + GENERIC_TECHNICAL_TEMPLATES
+        self.technical[skill] = tuple(t.format(skill=skill) for t in templates)
+        self.experience[skill] = tuple(t.format(skill=skill) for t in EXPERIENCE_TEMPLATES)
+
+    def canonicalize(self, skills: Iterable[str]) -> Tuple[str, ...]:
+        """Normalize a skill list (or a single skill name) to a sorted, de-duplicated key"""
+        if isinstance(skills, str):
+            # One skill, not a sequence of one-letter skills
+            skills = [skills]
+        canonical = set()
+        for skill in skills:
+            if not skill:
+                continue
+            known = self.skill_index.get(skill.lower())
+            canonical.add(known[0] if known else skill)
+        return tuple(sorted(canonical))
+
+    def _build_pools(self, skills: Tuple[str, ...], role: str) -> Dict[str, Tuple[str, ...]]:
+        """Merge per-skill question sets for one skill combination"""
+        technical, behavioral, experience = [], [], []
+        for skill in skills:
+            if skill.lower() not in self.skill_index:
+                # Skills outside the taxonomy only get the generic templates
+                technical.extend(t.format(skill=skill) for t in GENERIC_TECHNICAL_TEMPLATES)
+                experience.extend(t.format(skill=skill) for t in EXPERIENCE_TEMPLATES)
+                continue
+            technical.extend(self.technical.get(skill, ()))
+            behavioral.extend(self.behavioral.get(skill, ()))
+            experience.extend(self.experience.get(skill, ()))
+
+        behavioral.extend(GENERIC_BEHAVIORAL)
+        experience.extend(t.format(role=role or 'this') for t in GENERIC_EXPERIENCE)
+        return {
+            'technical': tuple(technical),
+            'behavioral': tuple(behavioral),
+            'experience': tuple(experience)
+        }
+
+    @staticmethod
+    def seed_for(*parts: Any) -> int:
+        """Stable sampling seed for e.g. a (candidate, job) pair"""
+        digest = hashlib.sha256(':'.join(str(p) for p in parts).encode('utf-8')).digest()
+        return int.from_bytes(digest[:8], 'big')
+
+    def generate(self, skills: Iterable[str], role: str = '', seed: int = 0,
+                 technical: int = 5, behavioral: int = 3, experience: int = 3) -> Dict[str, List[str]]:
+        """Generate a question pack for a single candidate"""
+        pools = self._pools(self.canonicalize(skills), role or '')
+        rng = random.Random(seed)
+        wanted = {'technical': technical, 'behavioral': behavioral, 'experience': experience}
+        return {
+            kind: rng.sample(pools[kind], min(count, len(pools[kind])))
+            for kind, count in wanted.items()
+        }
+
+    def generate_batch(self, profiles: List[Dict[str, Any]], job_id: str = '',
+                       **counts) -> Dict[str, Dict[str, List[str]]]:
+        """Generate question packs for a whole shortlist.
+
+        Each profile needs ``id`` and ``skills`` and may carry ``role``.
+        Candidates sharing a skill combination reuse the same merged pools.
+        """
+        return {
+            profile['id']: self.generate(
+                profile.get('skills', []),
+                role=profile.get('role', ''),
+                seed=self.seed_for(profile['id'], job_id),
+                **counts
+            )
+            for profile in profiles
+        }
+
+    def cache_info(self):
+        """Hit/miss statistics of the skill-combination pool cache"""
+        return self._pools.cache_info()
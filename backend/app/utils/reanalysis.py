@@ -0,0 +1,379 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import click
+
+from app.utils.analysis_backend import AnalysisBackend, load_backend
+from app.utils.blob_store import TERM_PATTERN, BlobStore
+from app.utils.metrics import registry
+from app.utils.taxonomy import Taxonomy, compile_taxonomy, tokenize, vocabulary_fingerprint
+
+REANALYZED = registry.counter(
+    'reanalysis_documents_total', 'Stored skill analyses handled by vocabulary reanalysis', ('result',))
+
+
+def backend_fingerprint(backend: AnalysisBackend) -> str:
+    """Version key of the vocabulary and aliases ``backend`` extracts skills with"""
+    return vocabulary_fingerprint(backend.skill_vocabulary(), backend.skill_aliases())
+
+
+def skills_kind(backend: AnalysisBackend, fingerprint: str) -> str:
+    """Derived-record kind for skills extracted by ``backend`` under one vocabulary"""
+    backend_class = type(backend)
+    return f"skills:{backend_class.__module__}.{backend_class.__qualname__}:{fingerprint}"
+
+
+def diff_vocabularies(old: Dict[str, List[str]], new: Dict[str, List[str]],
+                      old_aliases: Optional[Dict[str, str]] = None,
+                      new_aliases: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Added, removed, renamed, re-categorized and re-aliased skills between two vocabularies.
+
+    A rename is a removed and an added skill that differ only in case, or
+    the only removal and only addition within one category. A skill is
+    re-aliased when the set of aliases that resolve to it changed.
+    """
+    old_category = {skill: category for category, skills in old.items() for skill in skills}
+    new_category = {skill: category for category, skills in new.items() for skill in skills}
+    added = sorted(set(new_category) - set(old_category))
+    removed = sorted(set(old_category) - set(new_category))
+
+    renamed = []
+    by_lower = {skill.lower(): skill for skill in added}
+    for skill in removed:
+        if skill.lower() in by_lower:
+            renamed.append([skill, by_lower[skill.lower()]])
+    paired = {skill for pair in renamed for skill in pair}
+    for category in new:
+        gone = [s for s in removed if old_category[s] == category and s not in paired]
+        came = [s for s in added if new_category[s] == category and s not in paired]
+        if len(gone) == 1 and len(came) == 1:
+            renamed.append([gone[0], came[0]])
+
+    recategorized = sorted(s for s in set(old_category) & set(new_category) if old_category[s] != new_category[s])
+    old_aliases, new_aliases = old_aliases or {}, new_aliases or {}
+    realiased = sorted(
+        {skill for alias, skill in old_aliases.items() if new_aliases.get(alias) != skill}
+        | {skill for alias, skill in new_aliases.items() if old_aliases.get(alias) != skill})
+    return {
+        'added': added,
+        'removed': removed,
+        'renamed': sorted(renamed),
+        'recategorized': recategorized,
+        'realiased': realiased,
+        'changed': sorted(set(added) | set(removed) | set(recategorized) | set(realiased))
+    }
+
+
+def skill_surfaces(skills: List[str], *alias_tables: Dict[str, str]) -> List[str]:
+    """``skills`` plus every alias that resolves to one of them in any of ``alias_tables``"""
+    wanted = set(skills)
+    aliases = {alias for table in alias_tables for alias, skill in table.items() if skill in wanted}
+    return sorted(wanted | aliases)
+
+
+def skill_terms(skill: str) -> List[str]:
+    """Index terms a text must contain for ``skill`` to match in it"""
+    return TERM_PATTERN.findall(skill.lower())
+
+
+def skill_matcher(skills: List[str]) -> Optional[Taxonomy]:
+    """A taxonomy whose ``match`` finds any of ``skills`` in a text.
+
+    Every surface is compiled into one trie, as the backend compiles its own
+    vocabulary, so a text matches here exactly when the backend's tokenizer
+    would find one of the surfaces in it, whatever separates the words.
+    """
+    surfaces = [skill for skill in skills if tokenize(skill)]
+    if not surfaces:
+        return None
+    first, rest = surfaces[0], surfaces[1:]
+    return Taxonomy(compile_taxonomy({'changed': [first]}, {surface: first for surface in rest}))
+
+
+class VocabularyStore:
+    """Snapshots of every skills vocabulary (and its aliases) that stored analyses were computed with"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._saved: Set[str] = set()
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, f'{fingerprint}.json')
+
+    def save(self, vocabulary: Dict[str, List[str]], aliases: Optional[Dict[str, str]] = None) -> str:
+        fingerprint = vocabulary_fingerprint(vocabulary, aliases)
+        if fingerprint not in self._saved:
+            path = self._path(fingerprint)
+            if not os.path.exists(path):
+                os.makedirs(self.directory, exist_ok=True)
+                tmp_path = f'{path}.{os.getpid()}.tmp'
+                with open(tmp_path, 'w') as f:
+                    json.dump({'skills': vocabulary, 'aliases': aliases} if aliases else vocabulary, f, sort_keys=True)
+                os.replace(tmp_path, path)
+            self._saved.add(fingerprint)
+        return fingerprint
+
+    def load(self, fingerprint: str) -> Optional[Tuple[Dict[str, List[str]], Dict[str, str]]]:
+        """(vocabulary, aliases) saved under ``fingerprint``, or None"""
+        try:
+            with open(self._path(fingerprint)) as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return None
+        # A plain vocabulary maps categories to lists; one with aliases wraps both
+        if isinstance(saved.get('aliases'), dict):
+            return saved['skills'], saved['aliases']
+        return saved, {}
+
+    def current_kind(self, backend: AnalysisBackend) -> str:
+        """Skills record kind for the backend's vocabulary as it is now (snapshotting it)"""
+        return skills_kind(backend, self.save(backend.skill_vocabulary(), backend.skill_aliases()))
+
+
+_worker_backend = None
+_worker_fingerprint = None
+
+
+def _init_worker(backend_spec: Optional[str]):
+    global _worker_backend, _worker_fingerprint
+    _worker_backend = load_backend(backend_spec)
+    _worker_fingerprint = backend_fingerprint(_worker_backend)
+
+
+def _extract_batch(texts: List[str], fingerprint: str) -> List[List[str]]:
+    if _worker_fingerprint != fingerprint:
+        raise RuntimeError(f"Worker backend has vocabulary {_worker_fingerprint}, expected {fingerprint}")
+    return _worker_backend.run_batch('extract_skills', texts)
+
+
+class SkillReanalysis:
+    """Brings stored skill analyses up to date after the skills vocabulary changes.
+
+    Stored skills are keyed by the fingerprint of the vocabulary they were
+    extracted with. For each older vocabulary still in use, the job diffs it
+    against the current one. It then looks up, in the term index, the stored
+    texts that contain every term of some changed skill, and confirms each
+    hit with a trie of the changed skills tokenized as the backend tokenizes
+    them; records that list a removed skill are added to these. Only those
+    resumes are run through ``extract_skills`` again, in batches spread over worker
+    processes. Every other record is re-keyed to the new vocabulary
+    unchanged, and a record whose text has been evicted is dropped so it
+    cannot be served stale.
+
+    Each batch replaces its records atomically, so the store itself shows
+    what is left to do. The checkpoint file keeps the plan and counters, so
+    an interrupted run resumes without scanning again.
+    """
+
+    def __init__(self, blob_store: BlobStore, vocabularies: VocabularyStore, backend: AnalysisBackend,
+                 checkpoint_path: str, batch_size: int = 64, workers: int = 1,
+                 backend_spec: Optional[str] = None):
+        self.blob_store = blob_store
+        self.vocabularies = vocabularies
+        self.backend = backend
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = batch_size
+        self.workers = workers
+        self.backend_spec = backend_spec
+
+    def _load_checkpoint(self, target: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        return checkpoint if checkpoint.get('target') == target else None
+
+    def _save_checkpoint(self, checkpoint: Dict[str, Any]):
+        checkpoint['updatedAt'] = time.time()
+        os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+        tmp_path = f'{self.checkpoint_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def plan(self, target_kind: str) -> Dict[str, Any]:
+        """Per stale vocabulary: the diff and the resumes whose skills it changes"""
+        prefix = target_kind.rsplit(':', 1)[0] + ':'
+        plans = {}
+        for kind, count in sorted(self.blob_store.derived_kinds(prefix).items()):
+            if kind == target_kind:
+                continue
+            old = self.vocabularies.load(kind.rsplit(':', 1)[1])
+            digests = self.blob_store.derived_digests(kind)
+            texts_present = self.blob_store.digests_with_derived(digests, 'text')
+            if old is None:
+                # No snapshot to diff against: every record with its text is redone
+                diff, candidates, affected = None, texts_present, texts_present
+            else:
+                old_vocabulary, old_aliases = old
+                new_aliases = self.backend.skill_aliases()
+                diff = diff_vocabularies(old_vocabulary, self.backend.skill_vocabulary(), old_aliases, new_aliases)
+                # A changed skill can match through its name or any alias it had or has
+                surfaces = skill_surfaces(diff['changed'], old_aliases, new_aliases)
+                candidates = self.blob_store.digests_with_terms(
+                    [skill_terms(surface) for surface in surfaces], kind) & texts_present
+                affected = self._confirm_matches(candidates, surfaces)
+                affected |= self._holding(texts_present - affected, kind, diff['removed'])
+            plans[kind] = {
+                'records': count,
+                'diff': diff,
+                'indexHits': len(candidates),
+                'affected': sorted(affected),
+                'unaffected': sorted(texts_present - affected),
+                'textMissing': sorted(digests - texts_present)
+            }
+        return plans
+
+    def _confirm_matches(self, digests: Set[str], skills: List[str]) -> Set[str]:
+        """Index hits whose text really contains one of ``skills`` as the backend would match it"""
+        matcher = skill_matcher(skills)
+        if matcher is None:
+            return set()
+        confirmed = set()
+        digests = sorted(digests)
+        for start in range(0, len(digests), 500):
+            texts = self.blob_store.get_derived_many(digests[start:start + 500], 'text')
+            confirmed.update(digest for digest, text in texts.items() if matcher.match(text))
+        return confirmed
+
+    def _holding(self, digests: Set[str], kind: str, skills: List[str]) -> Set[str]:
+        """Records of ``kind`` that list one of ``skills`` whether or not their text mentions it"""
+        skills = set(skills)
+        if not skills:
+            return set()
+        holding = set()
+        digests = sorted(digests)
+        for start in range(0, len(digests), 500):
+            values = self.blob_store.get_derived_many(digests[start:start + 500], kind)
+            holding.update(digest for digest, value in values.items() if skills.intersection(value or ()))
+        return holding
+
+    def run(self, progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+            dry_run: bool = False) -> Dict[str, Any]:
+        """Reanalyze what the vocabulary change affects; returns the final checkpoint"""
+        indexed = self.blob_store.index_pending_texts()
+        target_kind = self.vocabularies.current_kind(self.backend)
+
+        checkpoint = self._load_checkpoint(target_kind)
+        if checkpoint is None:
+            checkpoint = {
+                'target': target_kind,
+                'startedAt': time.time(),
+                'plans': self.plan(target_kind),
+                'reanalyzed': 0,
+                'restamped': 0,
+                'dropped': 0
+            }
+            checkpoint['total'] = sum(len(p['affected']) for p in checkpoint['plans'].values())
+        checkpoint['indexedTexts'] = indexed
+        if dry_run:
+            return checkpoint
+        self._save_checkpoint(checkpoint)
+
+        for kind, plan in checkpoint['plans'].items():
+            remaining = self.blob_store.derived_digests(kind)
+            if not remaining:
+                continue
+            unaffected = [d for d in plan['unaffected'] if d in remaining]
+            self.blob_store.rename_derived(kind, target_kind, unaffected)
+            missing = [d for d in plan['textMissing'] if d in remaining]
+            self.blob_store.delete_derived(kind, missing)
+            checkpoint['restamped'] += len(unaffected)
+            checkpoint['dropped'] += len(missing)
+            REANALYZED.inc(len(unaffected), result='restamped')
+            REANALYZED.inc(len(missing), result='dropped')
+            self._save_checkpoint(checkpoint)
+
+            pending = [d for d in plan['affected'] if d in remaining]
+            self._reanalyze(kind, target_kind, pending, checkpoint, progress)
+
+        checkpoint['finishedAt'] = time.time()
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+        return checkpoint
+
+    def _reanalyze(self, old_kind: str, new_kind: str, digests: List[str], checkpoint: Dict[str, Any],
+                   progress: Optional[Callable[[Dict[str, Any]], None]]):
+        batches = [digests[i:i + self.batch_size] for i in range(0, len(digests), self.batch_size)]
+
+        def finish(batch: List[str], results: List[Any]):
+            self.blob_store.replace_derived(old_kind, new_kind, dict(zip(batch, results)))
+            checkpoint['reanalyzed'] += len(batch)
+            REANALYZED.inc(len(batch), result='reanalyzed')
+            self._save_checkpoint(checkpoint)
+            if progress is not None:
+                progress(checkpoint)
+
+        def texts_for(batch: List[str]) -> List[str]:
+            texts = self.blob_store.get_derived_many(batch, 'text')
+            return [texts.get(digest, '') for digest in batch]
+
+        if self.workers <= 1:
+            for batch in batches:
+                finish(batch, self.backend.run_batch('extract_skills', texts_for(batch)))
+            return
+
+        fingerprint = new_kind.rsplit(':', 1)[1]
+        # Spawned rather than forked: the app process runs logging and scheduler threads
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(self.workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(self.backend_spec,)) as pool:
+            queued = iter(batches)
+            in_flight = {}
+            while True:
+                while len(in_flight) < self.workers * 2:
+                    batch = next(queued, None)
+                    if batch is None:
+                        break
+                    in_flight[pool.submit(_extract_batch, texts_for(batch), fingerprint)] = batch
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(in_flight.pop(future), future.result())
+
+
+@click.command('reanalyze-skills')
+@click.option('--workers', type=int, default=os.cpu_count() or 1, show_default=True,
+              help='Worker processes extracting skills')
+@click.option('--batch-size', type=int, default=64, show_default=True, help='Resumes per batch')
+@click.option('--dry-run', is_flag=True, help='Only report what would be reanalyzed')
+def reanalyze_command(workers, batch_size, dry_run):
+    """Update stored skill analyses after the skills vocabulary changed"""
+    from flask import current_app
+    from app.routes import resume_routes
+
+    job = resume_routes.skill_reanalysis(workers=workers, batch_size=batch_size)
+
+    def report(checkpoint):
+        click.echo(f"reanalyzed {checkpoint['reanalyzed']}/{checkpoint['total']}")
+
+    started = time.perf_counter()
+    result = job.run(progress=report, dry_run=dry_run)
+    for kind, plan in result['plans'].items():
+        diff = plan['diff']
+        click.echo(f"{kind.rsplit(':', 1)[1]} -> {result['target'].rsplit(':', 1)[1]}: "
+                   f"{plan['records']} records, {plan['indexHits']} index hits, "
+                   f"{len(plan['affected'])} affected, {len(plan['textMissing'])} without text")
+        if diff is None:
+            click.echo('  no snapshot of the old vocabulary; every record is reanalyzed')
+        else:
+            for change in ('added', 'removed', 'recategorized', 'realiased'):
+                if diff[change]:
+                    click.echo(f"  {change}: {', '.join(diff[change])}")
+            if diff['renamed']:
+                click.echo(f"  renamed: {', '.join(f'{old} -> {new}' for old, new in diff['renamed'])}")
+    if not result['plans']:
+        click.echo('Stored skill analyses already match the current vocabulary')
+    elif not dry_run:
+        click.echo(f"done in {time.perf_counter() - started:.1f}s: {result['reanalyzed']} reanalyzed, "
+                   f"{result['restamped']} unchanged, {result['dropped']} dropped")
+    current_app.logger.info('Skill reanalysis finished', extra={'reanalysis': {
+        k: result[k] for k in ('reanalyzed', 'restamped', 'dropped', 'total')}})
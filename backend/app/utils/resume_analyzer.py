@@ -1,89 +1,57 @@
 import re
-import os
-import json
 from collections import Counter
-from flask import current_app
+from app.utils.metrics import timed_stage
+from app.utils.resume_sections import ResumeSections, reads
+from app.utils.taxonomy import Taxonomy, load_taxonomy
+
+EDUCATION_PATTERNS = [re.compile(pattern) for pattern in (
+    r'(?i)(?:B\.?S\.?|Bachelor of Science|Bachelor\'s) (?:in|of)? (?:[A-Za-z\s]+)',
+    r'(?i)(?:M\.?S\.?|Master of Science|Master\'s) (?:in|of)? (?:[A-Za-z\s]+)',
+    r'(?i)(?:Ph\.?D\.?|Doctor of Philosophy|Doctorate) (?:in|of)? (?:[A-Za-z\s]+)',
+    r'(?i)(?:MBA|Master of Business Administration)',
+    r'(?i)University of [A-Za-z\s]+',
+    r'(?i)[A-Za-z]+ University',
+    r'(?i)[A-Za-z]+ College',
+    r'(?i)[A-Za-z]+ Institute of [A-Za-z\s]+'
+)]
+
+EXPERIENCE_PATTERNS = [re.compile(pattern) for pattern in (
+    r'(?i)(\d+)[\+]? years? of experience',
+    r'(?i)experience of (\d+)[\+]? years?',
+    r'(?i)(\d+)[\+]? years? experience'
+)]
+
+# Coarse skill groups; every other taxonomy category is technical
+SKILL_GROUPS = {'soft_skills': 'soft', 'domain': 'domain'}
+# Skills this analyzer has always grouped apart from their taxonomy category
+SKILL_GROUP_OVERRIDES = {
+    'Agile': 'technical', 'Scrum': 'technical', 'Kanban': 'technical',
+    'Project Management': 'domain'
+}
+
+# Keywords behind the skillDistribution chart; its keys are part of the response
+DISTRIBUTION_CATEGORIES = {
+    'programming_languages': ['python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'go', 'php', 'swift', 'kotlin'],
+    'web_technologies': ['html', 'css', 'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask', 'spring'],
+    'databases': ['sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 'firebase', 'dynamodb', 'cassandra'],
+    'cloud_platforms': ['aws', 'azure', 'gcp', 'google cloud', 'heroku', 'digitalocean', 'kubernetes', 'docker'],
+    'data_science': ['machine learning', 'deep learning', 'nlp', 'data analysis', 'tensorflow', 'pytorch', 'pandas', 'numpy', 'scikit-learn'],
+    'soft_skills': ['communication', 'leadership', 'teamwork', 'problem solving', 'critical thinking', 'time management', 'adaptability']
+}
 
 class ResumeAnalyzer:
     def __init__(self):
-        # Load skills dictionary from JSON file
-        self.skills_file = os.path.join(current_app.root_path, 'data', 'skills.json')
-        self.skills_dict = self._load_skills_dict()
-        
-        # Common skill categories
-        self.skill_categories = {
-            'programming_languages': ['python', 'java', 'javascript', 'c++', 'c#', 'ruby', 'go', 'php', 'swift', 'kotlin'],
-            'web_technologies': ['html', 'css', 'react', 'angular', 'vue', 'node.js', 'express', 'django', 'flask', 'spring'],
-            'databases': ['sql', 'mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 'firebase', 'dynamodb', 'cassandra'],
-            'cloud_platforms': ['aws', 'azure', 'gcp', 'google cloud', 'heroku', 'digitalocean', 'kubernetes', 'docker'],
-            'data_science': ['machine learning', 'deep learning', 'nlp', 'data analysis', 'tensorflow', 'pytorch', 'pandas', 'numpy', 'scikit-learn'],
-            'soft_skills': ['communication', 'leadership', 'teamwork', 'problem solving', 'critical thinking', 'time management', 'adaptability']
-        }
-    
-    def _load_skills_dict(self):
-        """Load skills dictionary from JSON file or create if it doesn't exist"""
-        try:
-            if os.path.exists(self.skills_file):
-                with open(self.skills_file, 'r') as f:
-                    return json.load(f)
-            else:
-                # Create a basic skills dictionary if it doesn't exist
-                skills_dict = {
-                    "technical": [
-                        "Python", "Java", "JavaScript", "TypeScript", "C++", "C#", "Ruby", "Go", "PHP", "Swift",
-                        "HTML", "CSS", "React", "Angular", "Vue.js", "Node.js", "Express", "Django", "Flask", "Spring",
-                        "SQL", "MySQL", "PostgreSQL", "MongoDB", "Redis", "Oracle", "Firebase", "DynamoDB", "Cassandra",
-                        "AWS", "Azure", "GCP", "Heroku", "DigitalOcean", "Kubernetes", "Docker", "CI/CD", "Git", "GitHub",
-                        "Machine Learning", "Deep Learning", "NLP", "Data Analysis", "TensorFlow", "PyTorch", "Pandas", "NumPy", "Scikit-learn",
-                        "REST API", "GraphQL", "Microservices", "Serverless", "DevOps", "Agile", "Scrum", "Kanban", "JIRA", "Confluence"
-                    ],
-                    "soft": [
-                        "Communication", "Leadership", "Teamwork", "Problem Solving", "Critical Thinking", "Time Management", "Adaptability",
-                        "Creativity", "Emotional Intelligence", "Conflict Resolution", "Decision Making", "Negotiation", "Presentation", "Mentoring"
-                    ],
-                    "domain": [
-                        "Healthcare", "Finance", "E-commerce", "Education", "Real Estate", "Manufacturing", "Retail", "Logistics", "Marketing",
-                        "Sales", "Customer Service", "Human Resources", "Legal", "Accounting", "Project Management", "Product Management"
-                    ]
-                }
-                
-                # Ensure the data directory exists
-                os.makedirs(os.path.dirname(self.skills_file), exist_ok=True)
-                
-                # Save skills dictionary
-                with open(self.skills_file, 'w') as f:
-                    json.dump(skills_dict, f)
-                
-                return skills_dict
-        except Exception as e:
-            current_app.logger.error(f"Error loading skills dictionary: {str(e)}")
-            return {
-                "technical": [],
-                "soft": [],
-                "domain": []
-            }
+        # Skills vocabulary, aliases and matcher, shared with the analysis backend
+        self.taxonomy = load_taxonomy()
+        # Distribution keywords matched as whole words with the same tokenizer
+        self.distribution = Taxonomy.compile(DISTRIBUTION_CATEGORIES, {})
     
+    @timed_stage('skill_matching')
     def extract_skills(self, text):
         """Extract skills from resume text"""
         if not text:
             return []
-        
-        # Normalize text
-        text = text.lower()
-        
-        # Flatten skills dictionary
-        all_skills = []
-        for category in self.skills_dict.values():
-            all_skills.extend(category)
-        
-        # Extract skills
-        found_skills = []
-        for skill in all_skills:
-            skill_pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-            if re.search(skill_pattern, text):
-                found_skills.append(skill)
-        
-        return found_skills
+        return self.taxonomy.match(text)
     
     def categorize_skills(self, skills):
         """Categorize skills into technical, soft, and domain skills"""
@@ -94,23 +62,22 @@ class ResumeAnalyzer:
         }
         
         for skill in skills:
-            for category, category_skills in self.skills_dict.items():
-                if skill in category_skills:
-                    categorized[category].append(skill)
-                    break
+            category = self.taxonomy.category_of.get(skill)
+            if category is not None:
+                group = SKILL_GROUP_OVERRIDES.get(skill) or SKILL_GROUPS.get(category, "technical")
+                categorized[group].append(skill)
         
         return categorized
     
+    @reads('header', 'summary', 'experience', 'projects', 'skills', 'certifications')
     def compute_skill_stats(self, text):
         """Compute statistics about skills in the resume"""
         if not text:
             return {}
         
-        # Extract skills
-        skills = self.extract_skills(text)
-        
-        # Count skill occurrences
-        skill_counts = Counter(skills)
+        # Count skill occurrences; the skills are the distinct ones
+        skill_counts = Counter(self.taxonomy.count(text))
+        skills = list(skill_counts)
         
         # Categorize skills
         categorized_skills = self.categorize_skills(skills)
@@ -140,15 +107,11 @@ class ResumeAnalyzer:
                 proficiency = "Beginner"
             skill_proficiency[skill] = proficiency
         
-        # Analyze skill distribution by category
+        # Analyze skill distribution: distinct keywords found per category
         skill_distribution = {}
-        for category_name, category_keywords in self.skill_categories.items():
-            matches = []
-            for keyword in category_keywords:
-                if keyword in text.lower():
-                    matches.append(keyword)
-            if matches:
-                skill_distribution[category_name] = len(matches)
+        for keyword in self.distribution.match(text):
+            category = self.distribution.category_of[keyword]
+            skill_distribution[category] = skill_distribution.get(category, 0) + 1
         
         # Return statistics
         return {
@@ -168,7 +131,8 @@ class ResumeAnalyzer:
             return {}
         
         # Extract skills and compute statistics
-        skill_stats = self.compute_skill_stats(text)
+        sections = ResumeSections(text)
+        skill_stats = self.compute_skill_stats(sections)
         
         # Calculate word count
         words = re.findall(r'\b\w+\b', text)
@@ -184,42 +148,9 @@ class ResumeAnalyzer:
         else:
             avg_sentence_length = 0
         
-        # Extract education (simple regex pattern)
-        education_patterns = [
-            r'(?i)(?:B\.?S\.?|Bachelor of Science|Bachelor\'s) (?:in|of)? (?:[A-Za-z\s]+)',
-            r'(?i)(?:M\.?S\.?|Master of Science|Master\'s) (?:in|of)? (?:[A-Za-z\s]+)',
-            r'(?i)(?:Ph\.?D\.?|Doctor of Philosophy|Doctorate) (?:in|of)? (?:[A-Za-z\s]+)',
-            r'(?i)(?:MBA|Master of Business Administration)',
-            r'(?i)University of [A-Za-z\s]+',
-            r'(?i)[A-Za-z]+ University',
-            r'(?i)[A-Za-z]+ College',
-            r'(?i)[A-Za-z]+ Institute of [A-Za-z\s]+'
-        ]
-        
-        education = []
-        for pattern in education_patterns:
-            matches = re.findall(pattern, text)
-            education.extend(matches)
-        
-        # Extract experience (years)
-        experience_patterns = [
-            r'(?i)(\d+)[\+]? years? of experience',
-            r'(?i)experience of (\d+)[\+]? years?',
-            r'(?i)(\d+)[\+]? years? experience'
-        ]
-        
-        experience_years = []
-        for pattern in experience_patterns:
-            matches = re.findall(pattern, text)
-            experience_years.extend(matches)
-        
-        if experience_years:
-            try:
-                years_of_experience = max(int(year) for year in experience_years)
-            except ValueError:
-                years_of_experience = None
-        else:
-            years_of_experience = None
+        # Education and experience only read the sections they can appear in
+        education = self.extract_education(sections)
+        years_of_experience = self.extract_years_of_experience(sections)
         
         # Return analysis results
         return {
@@ -230,3 +161,25 @@ class ResumeAnalyzer:
             "education": list(set(education)),
             "yearsOfExperience": years_of_experience
         }
+    
+    @reads('education')
+    def extract_education(self, text):
+        """Degrees and institutions mentioned in the resume"""
+        education = []
+        for pattern in EDUCATION_PATTERNS:
+            education.extend(pattern.findall(text))
+        return education
+    
+    @reads('header', 'summary', 'experience')
+    def extract_years_of_experience(self, text):
+        """Largest stated number of years of experience, or None"""
+        experience_years = []
+        for pattern in EXPERIENCE_PATTERNS:
+            experience_years.extend(pattern.findall(text))
+        
+        if not experience_years:
+            return None
+        try:
+            return max(int(year) for year in experience_years)
+        except ValueError:
+            return None
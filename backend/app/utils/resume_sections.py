@@ -0,0 +1,112 @@
+import itertools
+import re
+from functools import wraps
+from typing import Dict, List, Tuple
+
+from app.utils.metrics import registry
+
+EXTRACTOR_CHARS = registry.counter(
+    'resume_extractor_chars_total', 'Resume characters each extractor scanned or skipped', ('extractor', 'result'))
+
+# Text before the first heading: name, contact details and often an untitled summary
+HEADER = 'header'
+
+# Canonical section -> headings that open it, matched case-insensitively on a line of their own
+SECTION_HEADINGS: Dict[str, Tuple[str, ...]] = {
+    'summary': ('summary', 'professional summary', 'profile', 'professional profile', 'objective',
+                'career objective', 'about me'),
+    'experience': ('experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'career history'),
+    'education': ('education', 'academic background', 'education and training'),
+    'skills': ('skills', 'technical skills', 'key skills', 'core competencies', 'competencies'),
+    'projects': ('projects', 'personal projects', 'selected projects'),
+    'publications': ('publications', 'papers'),
+    'certifications': ('certifications', 'certificates', 'licenses and certifications')
+}
+
+_SECTION_NAMES = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# A heading on a line of its own, optionally markdown-style ("## Skills") or followed by a colon
+_HEADING = (
+    r'[ \t]*(?:#{1,6}[ \t]*)?('
+    + '|'.join(r'[ \t]+'.join(map(re.escape, heading.split()))
+               for heading in sorted(_SECTION_NAMES, key=len, reverse=True))
+    + r')[ \t]*:?[ \t]*(?=\r?\n|\Z)'
+)
+# Anchored on the newline rather than ^ so the scan skips ahead between line starts
+HEADING_PATTERN = re.compile(r'\n' + _HEADING, re.IGNORECASE)
+FIRST_HEADING_PATTERN = re.compile(_HEADING, re.IGNORECASE)
+
+class ResumeSections:
+    """A resume split at its section headings.
+
+    Headings are found in a single pass when the object is built; the text
+    of a section (or a group of sections) is only sliced out, and then
+    cached, when an extractor first asks for it. A resume without any
+    recognized heading is one unsegmented block.
+    """
+
+    def __init__(self, text: str):
+        self.text = text or ''
+        self.spans: Dict[str, List[Tuple[int, int]]] = {}
+        self._views: Dict[Tuple[str, ...], str] = {}
+
+        name, start = HEADER, 0
+        first = FIRST_HEADING_PATTERN.match(self.text)
+        matches = HEADING_PATTERN.finditer(self.text)
+        for match in itertools.chain([first] if first else [], matches):
+            self._add(name, start, match.start())
+            name, start = _SECTION_NAMES[' '.join(match.group(1).lower().split())], match.end()
+        self._add(name, start, len(self.text))
+        self.segmented = name != HEADER
+
+    def _add(self, name: str, start: int, end: int):
+        if start < end:
+            self.spans.setdefault(name, []).append((start, end))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.spans
+
+    def view(self, *names: str) -> str:
+        """Text of the named sections in document order.
+
+        The whole text when the resume is unsegmented or has none of them,
+        so an unusual layout costs a full scan rather than a missed match.
+        """
+        key = tuple(sorted(set(names)))
+        view = self._views.get(key)
+        if view is None:
+            spans = sorted(span for name in key for span in self.spans.get(name, ()))
+            if not self.segmented or not spans:
+                view = self.text
+            elif len(spans) == 1:
+                view = self.text[spans[0][0]:spans[0][1]]
+            else:
+                # Separate sections so no match runs from one into the next
+                view = '\n\n'.join(self.text[start:end] for start, end in spans)
+            self._views[key] = view
+        return view
+
+
+def reads(*names: str):
+    """Declare the sections an extractor reads.
+
+    The decorated function takes the text as its last positional argument.
+    Given a :class:`ResumeSections` there, it receives only the view of
+    ``names``; given a plain string, it scans the string as before.
+    """
+    def decorator(func):
+        extractor = func.__name__.lstrip('_')
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if args and isinstance(args[-1], ResumeSections):
+                sections = args[-1]
+                text = sections.view(*names)
+                EXTRACTOR_CHARS.inc(len(text), extractor=extractor, result='scanned')
+                EXTRACTOR_CHARS.inc(max(len(sections.text) - len(text), 0), extractor=extractor, result='skipped')
+                args = args[:-1] + (text,)
+            return func(*args, **kwargs)
+        wrapper.sections = names
+        return wrapper
+    return decorator
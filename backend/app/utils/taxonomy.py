@@ -0,0 +1,377 @@
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import click
+
+MAGIC = b'SKILLTAX'
+FORMAT_VERSION = 1
+PREAMBLE = struct.Struct('<8sII')
+
+# The one skills vocabulary, by category. Category order and the order within
+# a category are the order extracted skills are reported in.
+SKILL_TAXONOMY: Dict[str, List[str]] = {
+    "frontend": [
+        "JavaScript", "TypeScript", "React", "Angular", "Vue.js",
+        "HTML", "CSS", "SASS", "LESS", "Redux", "Webpack", "Babel",
+        "Next.js", "Gatsby", "Material UI", "Tailwind CSS"
+    ],
+    "backend": [
+        "Node.js", "Express", "Django", "Flask", "Spring Boot",
+        "Ruby on Rails", "ASP.NET", "Laravel", "FastAPI", "GraphQL",
+        "REST API", "Microservices", "Serverless"
+    ],
+    "database": [
+        "SQL", "MySQL", "PostgreSQL", "MongoDB", "Redis", "Cassandra",
+        "DynamoDB", "Firebase", "Oracle", "SQLite", "Elasticsearch"
+    ],
+    "devops": [
+        "AWS", "Azure", "GCP", "Docker", "Kubernetes", "Jenkins",
+        "CircleCI", "GitHub Actions", "Terraform", "Ansible", "Prometheus",
+        "Grafana", "ELK Stack", "Git", "CI/CD", "Heroku", "DigitalOcean",
+        "GitHub", "DevOps", "JIRA", "Confluence"
+    ],
+    "data_science": [
+        "Python", "R", "Machine Learning", "Deep Learning", "TensorFlow",
+        "PyTorch", "Pandas", "NumPy", "Scikit-learn", "Data Analysis",
+        "Data Visualization", "NLP", "Computer Vision", "Big Data"
+    ],
+    "languages": [
+        "Java", "C++", "C#", "Ruby", "Go", "PHP", "Swift", "Kotlin"
+    ],
+    "soft_skills": [
+        "Communication", "Leadership", "Teamwork", "Problem Solving",
+        "Critical Thinking", "Time Management", "Adaptability", "Creativity",
+        "Project Management", "Agile", "Scrum", "Kanban", "Emotional Intelligence",
+        "Conflict Resolution", "Decision Making", "Negotiation", "Presentation", "Mentoring"
+    ],
+    # "Education" is left out: it is a section heading on nearly every resume
+    "domain": [
+        "Healthcare", "Finance", "E-commerce", "Real Estate", "Manufacturing", "Retail",
+        "Logistics", "Marketing", "Sales", "Customer Service", "Human Resources", "Legal",
+        "Accounting", "Product Management"
+    ]
+}
+
+# Other spellings of a skill, reported under the skill's own name
+SKILL_ALIASES: Dict[str, str] = {
+    "k8s": "Kubernetes",
+    "node": "Node.js",
+    "nodejs": "Node.js",
+    "express.js": "Express",
+    "expressjs": "Express",
+    "reactjs": "React",
+    "react.js": "React",
+    "angularjs": "Angular",
+    "vue": "Vue.js",
+    "vuejs": "Vue.js",
+    "nextjs": "Next.js",
+    "html5": "HTML",
+    "css3": "CSS",
+    "scss": "SASS",
+    "tailwind": "Tailwind CSS",
+    "rails": "Ruby on Rails",
+    "restful api": "REST API",
+    "postgres": "PostgreSQL",
+    "mongo": "MongoDB",
+    "amazon web services": "AWS",
+    "microsoft azure": "Azure",
+    "google cloud": "GCP",
+    "google cloud platform": "GCP",
+    "elk": "ELK Stack",
+    "cicd": "CI/CD",
+    "continuous integration": "CI/CD",
+    "ml": "Machine Learning",
+    "natural language processing": "NLP",
+    "sklearn": "Scikit-learn",
+    "scikit learn": "Scikit-learn",
+    "golang": "Go"
+}
+
+# Words of Unicode letters and digits ("résumé" is one word), with a trailing
+# "++" or "#", and the ".", "/" or "-" joining two of them ("node.js",
+# "ci/cd"); everything else separates tokens
+TOKEN_PATTERN = re.compile(r'[^\W_]+[+#]*|(?<=[^\W_])[./-](?=[^\W_])')
+
+# Directory the compiled taxonomy is written to by default
+_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+_loaded: Dict[str, 'Taxonomy'] = {}
+_loaded_lock = threading.Lock()
+
+
+def vocabulary_fingerprint(vocabulary: Dict[str, List[str]], aliases: Optional[Dict[str, str]] = None) -> str:
+    """Version key of a skills vocabulary; aliases, when there are any, are part of it"""
+    content = {'skills': vocabulary, 'aliases': aliases} if aliases else vocabulary
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+@lru_cache(maxsize=None)
+def source_version() -> str:
+    """Version of the taxonomy defined in this module"""
+    return vocabulary_fingerprint(SKILL_TAXONOMY, SKILL_ALIASES)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased tokens of ``text`` as the taxonomy matches them"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _int32(values: List[int]) -> bytes:
+    packed = array('i', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def compile_taxonomy(categories: Dict[str, List[str]] = None, aliases: Dict[str, str] = None) -> bytes:
+    """Compile a vocabulary and its aliases into the binary taxonomy format.
+
+    Layout: magic, format version and header length, a JSON header (version,
+    skill names, categories, trie tokens, alias names, section table), then
+    little-endian int32 sections: per-category skill ranges, the token trie
+    as CSR edge lists with each node's skill, and each alias's skill.
+    Raises ValueError for a skill listed twice, an alias of an unknown skill,
+    or two skills that would match the same words.
+    """
+    categories = SKILL_TAXONOMY if categories is None else categories
+    aliases = SKILL_ALIASES if aliases is None else aliases
+
+    skills: List[str] = []
+    category_of: Dict[str, str] = {}
+    category_offsets = [0]
+    for category, names in categories.items():
+        for skill in names:
+            if skill in category_of:
+                raise ValueError(f'{skill!r} is listed under both {category_of[skill]!r} and {category!r}')
+            category_of[skill] = category
+            skills.append(skill)
+        category_offsets.append(len(skills))
+    ids = {skill: i for i, skill in enumerate(skills)}
+
+    tokens: Dict[str, int] = {}
+    children: List[Dict[int, int]] = [{}]
+    node_skill = [-1]
+
+    def insert(surface: str, skill_id: int):
+        path = tokenize(surface)
+        if not path:
+            raise ValueError(f'{surface!r} has no matchable words')
+        node = 0
+        for token in path:
+            token_id = tokens.setdefault(token, len(tokens))
+            child = children[node].get(token_id)
+            if child is None:
+                child = children[node][token_id] = len(children)
+                children.append({})
+                node_skill.append(-1)
+            node = child
+        if node_skill[node] not in (-1, skill_id):
+            raise ValueError(f'{surface!r} would match both {skills[node_skill[node]]!r} and {skills[skill_id]!r}')
+        node_skill[node] = skill_id
+
+    for skill_id, skill in enumerate(skills):
+        insert(skill, skill_id)
+    alias_names = sorted(aliases)
+    for alias in alias_names:
+        if aliases[alias] not in ids:
+            raise ValueError(f'Alias {alias!r} refers to unknown skill {aliases[alias]!r}')
+        insert(alias, ids[aliases[alias]])
+
+    node_edges = [0]
+    edge_tokens: List[int] = []
+    edge_targets: List[int] = []
+    for edges in children:
+        for token_id, child in sorted(edges.items()):
+            edge_tokens.append(token_id)
+            edge_targets.append(child)
+        node_edges.append(len(edge_tokens))
+
+    data = [
+        ('category_offsets', category_offsets),
+        ('node_edges', node_edges),
+        ('edge_tokens', edge_tokens),
+        ('edge_targets', edge_targets),
+        ('node_skill', node_skill),
+        ('alias_skill', [ids[aliases[alias]] for alias in alias_names])
+    ]
+    sections = {}
+    offset = 0
+    for name, values in data:
+        sections[name] = [offset, len(values)]
+        offset += 4 * len(values)
+    header = json.dumps({
+        'version': vocabulary_fingerprint(categories, aliases),
+        'skills': skills,
+        'categories': list(categories),
+        'tokens': sorted(tokens, key=tokens.get),
+        'aliases': alias_names,
+        'sections': sections
+    }, separators=(',', ':')).encode('utf-8')
+    return PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)) + header + b''.join(_int32(values) for _, values in data)
+
+
+class Taxonomy:
+    """A compiled skills taxonomy: vocabulary, category index, aliases and matcher.
+
+    Matching lower-cases the text, splits it into tokens and walks a token
+    trie from every token that starts a skill or alias, so the cost depends
+    on the text's length rather than the number of skills. A skill matches
+    as whole words only, and the longest skill or alias starting at a token
+    wins.
+    """
+
+    def __init__(self, buffer: bytes, path: Optional[str] = None):
+        """Load a compiled taxonomy; raises ValueError if ``buffer`` is not a complete one"""
+        self.path = path
+        try:
+            self._load(buffer)
+        except (struct.error, KeyError, IndexError, TypeError, AttributeError) as e:
+            raise ValueError(f'{path or "buffer"} is not a valid skill taxonomy: {e!r}') from e
+
+    def _load(self, buffer: bytes):
+        if len(buffer) < PREAMBLE.size:
+            raise ValueError(f'{self.path or "buffer"} is truncated')
+        magic, format_version, header_length = PREAMBLE.unpack_from(buffer, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f'{self.path or "buffer"} is not a version {FORMAT_VERSION} skill taxonomy')
+        data_start = PREAMBLE.size + header_length
+        if data_start > len(buffer):
+            raise ValueError(f'{self.path or "buffer"} is truncated')
+        header = json.loads(bytes(buffer[PREAMBLE.size:data_start]))
+        sections = {}
+        for name, (offset, length) in header['sections'].items():
+            if offset < 0 or length < 0 or data_start + offset + 4 * length > len(buffer):
+                raise ValueError(f'{self.path or "buffer"} is truncated')
+            values = array('i')
+            values.frombytes(bytes(buffer[data_start + offset:data_start + offset + 4 * length]))
+            if sys.byteorder == 'big':
+                values.byteswap()
+            sections[name] = values
+
+        self.version: str = header['version']
+        self.skills: List[str] = header['skills']
+        offsets = sections['category_offsets']
+        self.categories: Dict[str, List[str]] = {
+            category: self.skills[offsets[i]:offsets[i + 1]] for i, category in enumerate(header['categories'])
+        }
+        self.category_of: Dict[str, str] = {
+            skill: category for category, skills in self.categories.items() for skill in skills
+        }
+        self.aliases: Dict[str, str] = {
+            alias: self.skills[skill_id] for alias, skill_id in zip(header['aliases'], sections['alias_skill'])
+        }
+
+        tokens = header['tokens']
+        node_edges, edge_tokens, edge_targets = sections['node_edges'], sections['edge_tokens'], sections['edge_targets']
+        self._children = [
+            {tokens[edge_tokens[e]]: edge_targets[e] for e in range(node_edges[node], node_edges[node + 1])}
+            for node in range(len(node_edges) - 1)
+        ]
+        self._node_skill = sections['node_skill'].tolist()
+
+    @classmethod
+    def open(cls, path: str) -> 'Taxonomy':
+        with open(path, 'rb') as f:
+            return cls(f.read(), path)
+
+    @classmethod
+    def compile(cls, categories: Dict[str, List[str]] = None, aliases: Dict[str, str] = None) -> 'Taxonomy':
+        """In-memory taxonomy, for callers with no artifact to load"""
+        return cls(compile_taxonomy(categories, aliases))
+
+    def _scan(self, text: str) -> List[int]:
+        """Skill id of every mention in ``text``, by name or alias, in text order.
+
+        Mentions do not overlap: the longest match wins and the scan resumes
+        after it, so "Tailwind CSS" is not also a mention of "CSS".
+        """
+        tokens = tokenize(text)
+        children, node_skill = self._children, self._node_skill
+        root = children[0]
+        end = len(tokens)
+        found = []
+        start = 0
+        while start < end:
+            node = root.get(tokens[start])
+            position = start + 1
+            matched, matched_end = -1, start + 1
+            while node is not None:
+                if node_skill[node] >= 0:
+                    matched, matched_end = node_skill[node], position
+                if position == end:
+                    break
+                node = children[node].get(tokens[position])
+                position += 1
+            if matched >= 0:
+                found.append(matched)
+            start = matched_end
+        return found
+
+    def match(self, text: str) -> List[str]:
+        """Skills mentioned in ``text``, by name or alias, in taxonomy order"""
+        return [self.skills[skill_id] for skill_id in sorted(set(self._scan(text)))]
+
+    def count(self, text: str) -> Dict[str, int]:
+        """How often each skill is mentioned in ``text``, in taxonomy order"""
+        counts = Counter(self._scan(text))
+        return {self.skills[skill_id]: counts[skill_id] for skill_id in sorted(counts)}
+
+
+def default_path() -> str:
+    return os.environ.get('SKILL_TAXONOMY_FILE') or os.path.join(_DATA_DIR, 'taxonomy.bin')
+
+
+def build_taxonomy_file(path: str) -> Taxonomy:
+    """Compile the taxonomy in this module and atomically replace ``path``"""
+    compiled = compile_taxonomy()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(compiled)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return Taxonomy(compiled, path)
+
+
+def load_taxonomy(path: Optional[str] = None) -> Taxonomy:
+    """The process-wide compiled taxonomy, recompiling the artifact if it is missing or out of date"""
+    path = path or default_path()
+    taxonomy = _loaded.get(path)
+    if taxonomy is not None:
+        return taxonomy
+    with _loaded_lock:
+        if path not in _loaded:
+            try:
+                taxonomy = Taxonomy.open(path)
+            except (OSError, ValueError):
+                taxonomy = None
+            if taxonomy is None or taxonomy.version != source_version():
+                try:
+                    taxonomy = build_taxonomy_file(path)
+                except OSError:
+                    # Read-only deployment: compile in memory on every start instead
+                    taxonomy = Taxonomy.compile()
+            _loaded[path] = taxonomy
+        return _loaded[path]
+
+
+@click.command('compile-taxonomy')
+@click.option('--output', help='Artifact path (default: $SKILL_TAXONOMY_FILE or app/data/taxonomy.bin)')
+def compile_taxonomy_command(output):
+    """Compile the skills taxonomy into its binary artifact"""
+    built = build_taxonomy_file(output or default_path())
+    click.echo(f'{built.path}: version {built.version}, {len(built.skills)} skills, '
+               f'{len(built.categories)} categories, {len(built.aliases)} aliases')
@@ -0,0 +1,146 @@
+"""Concurrent-connection capacity: sync gthread workers against the ASGI adapter.
+
+    python -m benchmarks.concurrency --workers 2 --threads 4 --slow-clients 4 16 64
+    python -m benchmarks.concurrency --servers asgi --trickle 5 --output concurrency.json
+
+Each stage opens N slow clients that trickle a resume upload to the server
+over --trickle seconds, the way clients on poor mobile links do. While they
+are in flight a probe sends cheap candidate-list requests at a fixed rate.
+A server that parks a thread on every slow connection runs out of threads
+and the probe's latency climbs or times out. A server that buffers request
+bodies on its event loop keeps answering the probe.
+"""
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.loadtest import GunicornServer, Recorder, TrafficMix
+
+SERVERS = {
+    'sync': {'app_spec': 'app:create_app()', 'worker_class': 'gthread'},
+    'asgi': {'app_spec': 'app.asgi:application', 'worker_class': 'uvicorn.workers.UvicornWorker'}
+}
+
+
+def slow_request(base_url: str, method: str, path: str, body: bytes, headers: Dict[str, str],
+                 trickle: float, chunks: int, timeout: float) -> int:
+    """Send ``body`` in ``chunks`` pieces spread over ``trickle`` seconds"""
+    parsed = urlparse(base_url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+    try:
+        conn.putrequest(method, path)
+        for name, value in headers.items():
+            conn.putheader(name, value)
+        conn.putheader('Content-Length', str(len(body)))
+        conn.endheaders()
+        step = max(len(body) // chunks, 1)
+        for offset in range(0, len(body), step):
+            conn.send(body[offset:offset + step])
+            time.sleep(trickle / chunks)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+    finally:
+        conn.close()
+
+
+def run_stage(base_url: str, mix: TrafficMix, slow_clients: int, trickle: float, chunks: int,
+              probe_rate: float, timeout: float) -> Dict[str, Any]:
+    recorder = Recorder()
+    slow_done = threading.Event()
+
+    def slow_client(seed: int):
+        rng = random.Random(seed)
+        method, path, body, headers = mix.build('upload', rng)
+        started = time.perf_counter()
+        try:
+            ok = slow_request(base_url, method, path, body, headers, trickle, chunks, timeout) < 400
+        except Exception:
+            ok = False
+        recorder.record('slow-upload', time.perf_counter() - started, ok)
+
+    def probe():
+        parsed = urlparse(base_url)
+        next_send = time.perf_counter()
+        while not slow_done.is_set():
+            started = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+                conn.request('GET', '/api/candidates/?limit=1')
+                response = conn.getresponse()
+                response.read()
+                conn.close()
+                ok = response.status < 400
+            except Exception:
+                ok = False
+            recorder.record('probe', time.perf_counter() - started, ok)
+            next_send += 1.0 / probe_rate
+            time.sleep(max(next_send - time.perf_counter(), 0))
+
+    started = time.perf_counter()
+    clients = [threading.Thread(target=slow_client, args=(i,), daemon=True) for i in range(slow_clients)]
+    prober = threading.Thread(target=probe, daemon=True)
+    for thread in clients:
+        thread.start()
+    prober.start()
+    for thread in clients:
+        thread.join()
+    slow_done.set()
+    prober.join()
+    return recorder.summary(time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent slow-client capacity', epilog=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['sync', 'asgi'])
+    parser.add_argument('--slow-clients', type=int, nargs='+', default=[4, 16, 64])
+    parser.add_argument('--trickle', type=float, default=3.0, help='Seconds each slow upload takes to send')
+    parser.add_argument('--chunks', type=int, default=10)
+    parser.add_argument('--probe-rate', type=float, default=20.0, help='Probe requests per second')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--pool-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--output', help='Write the report JSON to this path')
+    args = parser.parse_args(argv)
+
+    mix = TrafficMix({'upload': 1}, generate_corpus(20, seed=args.seed, max_words=800), [], seed=args.seed)
+    report: Dict[str, List[Dict[str, Any]]] = {}
+    for name in args.servers:
+        server = GunicornServer(args.workers, args.threads, args.pool_size, args.seed, **SERVERS[name]).start()
+        try:
+            report[name] = []
+            for n in args.slow_clients:
+                summary = run_stage(server.url, mix, n, args.trickle, args.chunks, args.probe_rate, args.timeout)
+                report[name].append({'slowClients': n, **summary})
+        finally:
+            server.stop()
+
+    print(f"\n{args.workers} workers x {args.threads} threads, uploads trickled over {args.trickle:g}s")
+    print(f"{'server':>6s} {'slow':>6s} {'ok':>6s} {'upload p50':>11s} {'probe p50':>10s} "
+          f"{'probe p99':>10s} {'probe err':>10s}")
+    for name, stages in report.items():
+        for stage in stages:
+            upload = stage['routes'].get('slow-upload', {})
+            probe = stage['routes'].get('probe', {})
+            ok = upload.get('requests', 0) - upload.get('errors', 0)
+            print(f"{name:>6s} {stage['slowClients']:>6d} {ok:>6d} {upload.get('p50Ms', 0):>11.0f} "
+                  f"{probe.get('p50Ms', 0):>10.1f} {probe.get('p99Ms', 0):>10.1f} {probe.get('errors', 0):>10d}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'servers': report}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
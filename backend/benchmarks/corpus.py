@@ -0,0 +1,113 @@
+import random
+from functools import lru_cache
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from app.utils.mock_ai import MockAIModel
+
+FIRST_NAMES = ["Ava", "Liam", "Priya", "Noah", "Mei", "Omar", "Sofia", "Kenji", "Amara", "Lucas",
+               "Zara", "Mateo", "Ines", "Arjun", "Hana", "Felix", "Leila", "Tomas", "Nia", "Ravi"]
+LAST_NAMES = ["Patel", "Nguyen", "Garcia", "Okafor", "Kim", "Muller", "Rossi", "Haddad", "Silva",
+              "Cohen", "Tanaka", "Novak", "Mensah", "Ibrahim", "Larsen", "Costa", "Sharma", "Ali"]
+COMPANIES = ["Tech Solutions Inc.", "Data Analytics Corp.", "CloudNine Systems", "Bright Retail",
+             "Northwind Health", "Quantum Finance", "Blue Harbor Logistics", "Acme Software"]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Data Scientist", "DevOps Engineer",
+          "Frontend Developer", "Backend Developer", "Engineering Manager", "Intern"]
+DEGREES = ["Bachelor of Science in Computer Science", "Master of Science in Data Science",
+           "Bachelor of Engineering in Electronics", "MBA", "Ph.D. in Machine Learning"]
+SCHOOLS = ["University of Technology", "Stanford University", "Tech Institute of Engineering",
+           "City College", "Massachusetts Institute of Technology"]
+ROLES = ["Software Developer", "UX Designer", "Product Manager", "Data Scientist", "DevOps Engineer"]
+FILLER = ["collaborated with cross-functional teams", "improved release cadence",
+          "reduced infrastructure cost", "mentored junior engineers", "owned on-call rotation",
+          "designed internal tooling", "migrated legacy services", "wrote technical documentation",
+          "struggled with unclear requirements early on", "led a successful product launch"]
+
+# Section orderings seen in real resumes; "inline" has no headings at all
+LAYOUTS = {
+    "classic": ["SUMMARY", "EXPERIENCE", "EDUCATION", "SKILLS"],
+    "skills_first": ["SKILLS", "EXPERIENCE", "PROJECTS", "EDUCATION"],
+    "academic": ["EDUCATION", "PUBLICATIONS", "EXPERIENCE", "SKILLS"],
+    "inline": []
+}
+
+
+@lru_cache(maxsize=None)
+def _skills():
+    return tuple(MockAIModel().skills)
+
+
+def generate_resume(rng: random.Random, length: int = 400, skill_density: float = 0.05,
+                    layout: str = "classic") -> str:
+    """Build one resume of roughly ``length`` words.
+
+    ``skill_density`` is the fraction of words drawn from the skills taxonomy.
+    """
+    skills = _skills()
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    headings = LAYOUTS[layout]
+    sections = headings or ["BODY"]
+    words_per_section = max(length // len(sections), 10)
+
+    lines = [name, f"{name.split()[0].lower()}@example.com", ""]
+    for heading in sections:
+        if headings:
+            lines.append(heading)
+        written = 0
+        while written < words_per_section:
+            if heading == "EDUCATION":
+                line = f"- {rng.choice(DEGREES)}, {rng.choice(SCHOOLS)} ({rng.randint(2005, 2022)})"
+            elif heading == "SKILLS":
+                line = "- " + ", ".join(rng.sample(skills, rng.randint(3, 8)))
+            else:
+                parts = []
+                for _ in range(rng.randint(8, 20)):
+                    if rng.random() < skill_density:
+                        parts.append(rng.choice(skills))
+                    else:
+                        parts.append(rng.choice(FILLER))
+                line = f"- {rng.choice(TITLES)}, {rng.choice(COMPANIES)}: " + "; ".join(parts) + "."
+                if rng.random() < 0.2:
+                    line += f" {rng.randint(1, 15)} years of experience."
+            lines.append(line)
+            written += len(line.split())
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_corpus(count: int, seed: int = 0, min_words: int = 150, max_words: int = 2500) -> List[str]:
+    """Resumes with varying length, skill density and section layout"""
+    rng = random.Random(seed)
+    layouts = list(LAYOUTS)
+    return [
+        generate_resume(
+            rng,
+            length=rng.randint(min_words, max_words),
+            skill_density=rng.uniform(0.01, 0.2),
+            layout=rng.choice(layouts)
+        )
+        for _ in range(count)
+    ]
+
+
+def generate_candidates(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Candidate records in the shape served by /api/candidates"""
+    rng = random.Random(seed)
+    skills = _skills()
+    base_date = datetime(2025, 1, 1)
+    candidates = []
+    for i in range(1, count + 1):
+        candidate_skills = rng.sample(skills, rng.randint(2, 10))
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        candidates.append({
+            "id": f"c{i}",
+            "name": name,
+            "email": f"{name.replace(' ', '.').lower()}{i}@example.com",
+            "role": rng.choice(ROLES),
+            "matchScore": rng.randint(40, 99),
+            "skills": candidate_skills,
+            "topSkill": f"{candidate_skills[0]} ({rng.randint(1, 10)} years)",
+            "resumeId": f"resume{i}",
+            "appliedDate": (base_date + timedelta(minutes=rng.randint(0, 525600))).isoformat()
+        })
+    return candidates
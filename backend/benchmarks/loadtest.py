@@ -0,0 +1,448 @@
+"""End-to-end load test against the app served by gunicorn on localhost.
+
+    python -m benchmarks.loadtest --workers 2 --threads 4 --clients 8 16 32 --duration 20
+    python -m benchmarks.loadtest --mode open --rate 50 100 200 --output load.json
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --clients 16
+
+Closed-loop mode runs a fixed number of clients that each send their next
+request as soon as the previous one completes. Open-loop mode issues requests
+at a fixed arrival rate regardless of how fast the server answers. Latency is
+measured from the scheduled send time, so queueing in front of a saturated
+server shows up in the percentiles. Each value passed to --clients/--rate is
+one stage of the saturation curve.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import urlparse
+
+from benchmarks.corpus import generate_candidates, generate_corpus
+from benchmarks.smtp_sink import SMTPSink
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MIX = {
+    'list': 35,
+    'search': 20,
+    'detail': 20,
+    'upload': 10,
+    'analyze': 10,
+    'email': 5
+}
+
+# Admission control's load-shedding responses
+SHED_STATUSES = (429, 503)
+
+
+class TrafficMix:
+    """Builds requests for each route in the mix from a seeded corpus"""
+
+    def __init__(self, weights: Dict[str, float], corpus: List[str], candidate_ids: List[str], seed: int = 0):
+        unknown = set(weights) - set(DEFAULT_MIX)
+        if unknown:
+            raise ValueError(f"Unknown routes in mix: {', '.join(sorted(unknown))}")
+        self.routes = [name for name, weight in weights.items() if weight > 0]
+        self.cumulative = list(itertools.accumulate(weights[name] for name in self.routes))
+        self.corpus = corpus
+        self.candidate_ids = candidate_ids
+        self.seed = seed
+
+    def rng(self) -> random.Random:
+        return random.Random(f'{self.seed}:{threading.get_ident()}:{time.perf_counter_ns()}')
+
+    def pick(self, rng: random.Random) -> str:
+        return rng.choices(self.routes, cum_weights=self.cumulative)[0]
+
+    def build(self, route: str, rng: random.Random) -> Tuple[str, str, bytes, Dict[str, str]]:
+        """Return (method, path, body, headers) for one request"""
+        if route == 'list':
+            return 'GET', f'/api/candidates/?page={rng.randint(1, 5)}&limit=10', b'', {}
+        if route == 'search':
+            term = rng.choice(['python', 'react', 'aws', 'manager', 'data'])
+            return 'GET', f'/api/candidates/?search={term}&sortBy=name', b'', {}
+        if route == 'detail':
+            return 'GET', f'/api/candidates/{rng.choice(self.candidate_ids)}', b'', {}
+        if route == 'analyze':
+            body = json.dumps({'content': rng.choice(self.corpus)}).encode('utf-8')
+            return 'POST', '/api/resume/analyze', body, {'Content-Type': 'application/json'}
+        if route == 'email':
+            body = json.dumps({
+                'candidateIds': rng.sample(self.candidate_ids, min(5, len(self.candidate_ids))),
+                'subject': 'Interview invitation',
+                'message': 'We would like to invite you to an interview.'
+            }).encode('utf-8')
+            return 'POST', '/api/candidates/send-email', body, {'Content-Type': 'application/json'}
+        # upload
+        boundary = uuid.uuid4().hex
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="resume.txt"\r\n'
+            f'Content-Type: text/plain\r\n\r\n'
+        ).encode('utf-8') + rng.choice(self.corpus).encode('utf-8') + (
+            # A unique trailer so uploads exercise the full path, not the content-hash cache
+            f'\n{boundary}\r\n--{boundary}--\r\n'
+        ).encode('utf-8')
+        return 'POST', '/api/resume/upload', body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+class Recorder:
+    """Thread-safe per-route latency and status collection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.shed: Dict[str, int] = {}
+
+    def record(self, route: str, latency: float, ok: bool, shed: bool = False):
+        """Shed requests (429/503 from admission control) are counted, not timed"""
+        with self._lock:
+            if shed:
+                self.shed[route] = self.shed.get(route, 0) + 1
+                self.latencies.setdefault(route, [])
+                return
+            self.latencies.setdefault(route, []).append(latency)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            routes = {route: _describe(values, self.errors.get(route, 0), elapsed, self.shed.get(route, 0))
+                      for route, values in self.latencies.items()}
+            everything = [v for values in self.latencies.values() for v in values]
+            total = _describe(everything, sum(self.errors.values()), elapsed, sum(self.shed.values()))
+        return {'total': total, 'routes': routes}
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _describe(values: List[float], errors: int, elapsed: float, shed: int = 0) -> Dict[str, Any]:
+    ordered = sorted(values)
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'shed': shed,
+        'throughput': round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0,
+        'p50Ms': round(_percentile(ordered, 50) * 1000, 2),
+        'p95Ms': round(_percentile(ordered, 95) * 1000, 2),
+        'p99Ms': round(_percentile(ordered, 99) * 1000, 2),
+        'maxMs': round(ordered[-1] * 1000, 2) if ordered else 0.0
+    }
+
+
+class Client:
+    """One keep-alive HTTP connection, re-opened after errors.
+
+    Each client presents its own X-Forwarded-For address so per-client rate
+    limits treat simulated users as distinct clients.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, base_url: str, timeout: float):
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.conn = None
+        self.retry_after = 0.0
+        n = next(self._ids)
+        self.address = f'10.{(n >> 16) & 255}.{(n >> 8) & 255}.{n & 255}'
+
+    def send(self, method: str, path: str, body: bytes, headers: Dict[str, str]) -> int:
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body or None,
+                                  headers={**headers, 'X-Forwarded-For': self.address})
+                response = self.conn.getresponse()
+                response.read()
+                self.retry_after = float(response.getheader('Retry-After') or 0)
+                if response.getheader('Connection', '').lower() == 'close':
+                    self.close()
+                return response.status
+            except (http.client.HTTPException, ConnectionError, OSError):
+                self.close()
+                if attempt:
+                    raise
+        return 0
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def _timed_request(client: Client, mix: TrafficMix, rng: random.Random, recorder: Recorder,
+                   scheduled: float) -> float:
+    """Send one request; returns the Retry-After delay if it was shed, else 0"""
+    route = mix.pick(rng)
+    method, path, body, headers = mix.build(route, rng)
+    try:
+        status = client.send(method, path, body, headers)
+    except Exception:
+        status = 0
+    shed = status in SHED_STATUSES
+    recorder.record(route, time.perf_counter() - scheduled, 0 < status < 400, shed=shed)
+    return client.retry_after if shed else 0.0
+
+
+def run_closed(base_url: str, mix: TrafficMix, clients: int, duration: float, timeout: float) -> Dict[str, Any]:
+    """``clients`` concurrent users, each sending back-to-back requests"""
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def user():
+        client = Client(base_url, timeout)
+        rng = mix.rng()
+        while time.perf_counter() < deadline:
+            backoff = _timed_request(client, mix, rng, recorder, time.perf_counter())
+            if backoff:
+                # Honour Retry-After like a well-behaved client instead of hammering
+                time.sleep(min(backoff, max(deadline - time.perf_counter(), 0)))
+        client.close()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, daemon=True) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder.summary(time.perf_counter() - started)
+
+
+def run_open(base_url: str, mix: TrafficMix, rate: float, duration: float, timeout: float,
+             max_outstanding: int = 512) -> Dict[str, Any]:
+    """Poisson arrivals at ``rate`` requests per second"""
+    recorder = Recorder()
+    local = threading.local()
+    outstanding = threading.Semaphore(max_outstanding)
+    dropped = 0
+
+    def send(scheduled: float):
+        try:
+            if not hasattr(local, 'client'):
+                local.client = Client(base_url, timeout)
+                local.rng = mix.rng()
+            _timed_request(local.client, mix, local.rng, recorder, scheduled)
+        finally:
+            outstanding.release()
+
+    started = time.perf_counter()
+    next_send = started
+    rng = mix.rng()
+    with ThreadPoolExecutor(max_workers=max_outstanding) as pool:
+        while next_send < started + duration:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if outstanding.acquire(blocking=False):
+                pool.submit(send, next_send)
+            else:
+                # The generator itself is saturated; count rather than queue forever
+                dropped += 1
+            next_send += rng.expovariate(rate)
+    summary = recorder.summary(time.perf_counter() - started)
+    summary['droppedByGenerator'] = dropped
+    return summary
+
+
+class GunicornServer:
+    """Runs the app under gunicorn on localhost with an SMTP sink and a seeded candidate pool"""
+
+    def __init__(self, workers: int, threads: int, pool_size: int, seed: int, port: int = 0,
+                 app_spec: str = 'app:create_app()', worker_class: str = 'gthread'):
+        self.workers = workers
+        self.threads = threads
+        self.app_spec = app_spec
+        self.worker_class = worker_class
+        self.workdir = tempfile.mkdtemp(prefix='resume-load-')
+        self.port = port or _free_port()
+        self.candidates = generate_candidates(pool_size, seed=seed)
+        self.candidates_file = os.path.join(self.workdir, 'candidates.json')
+        with open(self.candidates_file, 'w') as f:
+            json.dump(self.candidates, f)
+        self.smtp = SMTPSink()
+        self.process = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self, ready_timeout: float = 30.0):
+        self.smtp.start()
+        metrics_dir = os.path.join(self.workdir, 'metrics')
+        os.makedirs(metrics_dir)
+        env = {
+            **os.environ,
+            'SMTP_SERVER': '127.0.0.1',
+            'SMTP_PORT': str(self.smtp.port),
+            'SMTP_USE_TLS': '0',
+            'EMAIL_DELIVERY_ENABLED': '1',
+            'CANDIDATES_FILE': self.candidates_file,
+            'PROMETHEUS_MULTIPROC_DIR': metrics_dir,
+            'ADMISSION_DIR': os.path.join(self.workdir, 'admission'),
+            'ASGI_THREADS': str(self.threads),
+            # Trust the clients' X-Forwarded-For, as if behind one proxy, so each is rate limited apart
+            'TRUSTED_PROXY_HOPS': '1'
+        }
+        command = [
+            sys.executable, '-m', 'gunicorn',
+            '-c', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'),
+            '--chdir', BACKEND_DIR,
+            '-b', f'127.0.0.1:{self.port}',
+            '-w', str(self.workers),
+            '--threads', str(self.threads),
+            '-k', self.worker_class,
+            '--log-level', 'warning',
+            self.app_spec
+        ]
+        self.process = subprocess.Popen(command, env=env, cwd=self.workdir)
+
+        deadline = time.monotonic() + ready_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited with status {self.process.returncode}')
+            try:
+                conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=1)
+                conn.request('GET', '/api/candidates/?limit=1')
+                conn.getresponse().read()
+                conn.close()
+                return self
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError('gunicorn did not become ready in time')
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.smtp.stop()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def _free_port() -> int:
+    import socket
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse ``list=40,search=20,upload=10`` into route weights"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def _print_stage(label: str, summary: Dict[str, Any]):
+    total = summary['total']
+    print(f"\n== {label}: {total['throughput']} req/s, p50 {total['p50Ms']} ms, "
+          f"p95 {total['p95Ms']} ms, p99 {total['p99Ms']} ms, errors {total['errors']}, shed {total['shed']}")
+    print(f"{'route':10s} {'reqs':>7s} {'err':>5s} {'shed':>6s} {'req/s':>8s} {'p50':>8s} {'p95':>8s} "
+          f"{'p99':>8s} {'max':>8s}")
+    for route, stats in sorted(summary['routes'].items()):
+        print(f"{route:10s} {stats['requests']:>7d} {stats['errors']:>5d} {stats['shed']:>6d} {stats['throughput']:>8.1f} "
+              f"{stats['p50Ms']:>8.1f} {stats['p95Ms']:>8.1f} {stats['p99Ms']:>8.1f} {stats['maxMs']:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End-to-end load test', formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog=__doc__)
+    parser.add_argument('--url', help='Target an already running server instead of starting gunicorn')
+    parser.add_argument('--mode', choices=['closed', 'open'], default='closed')
+    parser.add_argument('--clients', type=int, nargs='+', default=[4, 8, 16, 32], help='Closed-loop stages')
+    parser.add_argument('--rate', type=float, nargs='+', default=[25, 50, 100, 200], help='Open-loop stages (req/s)')
+    parser.add_argument('--duration', type=float, default=15.0, help='Seconds per stage')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='Route weights, e.g. list=40,search=20,detail=20,upload=10,analyze=5,email=5')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--pool-size', type=int, default=1000)
+    parser.add_argument('--corpus-size', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--output', help='Write the report JSON to this path')
+    args = parser.parse_args(argv)
+
+    corpus = generate_corpus(args.corpus_size, seed=args.seed, max_words=1200)
+    server = None
+    if args.url:
+        base_url = args.url
+        candidate_ids = [c['id'] for c in generate_candidates(args.pool_size, seed=args.seed)]
+    else:
+        server = GunicornServer(args.workers, args.threads, args.pool_size, args.seed).start()
+        base_url = server.url
+        candidate_ids = [c['id'] for c in server.candidates]
+
+    mix = TrafficMix(args.mix, corpus, candidate_ids, seed=args.seed)
+    stages: List[Tuple[str, Callable[[], Dict[str, Any]]]]
+    if args.mode == 'closed':
+        stages = [(f'{n} clients', lambda n=n: run_closed(base_url, mix, n, args.duration, args.timeout))
+                  for n in args.clients]
+    else:
+        stages = [(f'{r:g} req/s offered', lambda r=r: run_open(base_url, mix, r, args.duration, args.timeout))
+                  for r in args.rate]
+
+    report = {
+        'config': {
+            'mode': args.mode,
+            'workers': None if args.url else args.workers,
+            'threads': None if args.url else args.threads,
+            'duration': args.duration,
+            'mix': args.mix,
+            'poolSize': args.pool_size
+        },
+        'stages': []
+    }
+    try:
+        for label, stage in stages:
+            summary = stage()
+            _print_stage(label, summary)
+            report['stages'].append({'label': label, **summary})
+        if server is not None:
+            report['emailsDelivered'] = server.smtp.messages
+    finally:
+        if server is not None:
+            server.stop()
+
+    # Saturation curve: offered load against achieved throughput and tail latency
+    print('\nSaturation curve')
+    print(f"{'stage':>22s} {'req/s':>8s} {'p50':>8s} {'p99':>8s} {'err%':>6s}")
+    for stage in report['stages']:
+        total = stage['total']
+        error_rate = 100.0 * total['errors'] / total['requests'] if total['requests'] else 0.0
+        print(f"{stage['label']:>22s} {total['throughput']:>8.1f} {total['p50Ms']:>8.1f} "
+              f"{total['p99Ms']:>8.1f} {error_rate:>6.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Per-worker memory as the candidate pool and the worker count grow.
+
+    python -m benchmarks.memory --workers 1 2 4 --pool-sizes 1000 100000
+
+Each stage starts gunicorn, sends every candidate endpoint a few requests
+per worker, replaces the candidates file, and sends them again. It then
+reads each worker's /proc/<pid>/smaps. ``anon`` is memory the worker
+allocated for itself. ``pss`` also counts a proportional share of pages
+mapped with other processes, such as the candidate snapshot. With the
+snapshot shared, ``anon`` should barely move with the pool size.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import urllib.request
+from typing import Dict, List
+
+from benchmarks.loadtest import GunicornServer
+
+
+def _get(url: str):
+    with urllib.request.urlopen(url, timeout=300) as response:
+        response.read()
+
+
+def _post(url: str, body: dict):
+    request = urllib.request.Request(url, data=json.dumps(body).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=300) as response:
+        response.read()
+
+
+def exercise(base_url: str, rounds: int):
+    """Every candidate read path: sorted pages, search and filters, lookups, bias and export"""
+    for _ in range(rounds):
+        for sort_by in ('matchScore', 'name', 'appliedDate'):
+            _get(f'{base_url}/api/candidates/?sortBy={sort_by}&limit=20')
+            _get(f'{base_url}/api/candidates/?sortBy={sort_by}&search=python&role=engineer&limit=20&page=3')
+        _get(f'{base_url}/api/candidates/?minScore=80&appliedAfter=2025-06-01&limit=20')
+        _get(f'{base_url}/api/candidates/c7')
+        _post(f'{base_url}/api/detect-bias', {})
+        _post(f'{base_url}/api/generate-questions', {'candidateId': 'c5'})
+    _get(f'{base_url}/api/candidates/export?format=ndjson')
+
+
+def worker_memory(pid: int) -> Dict[str, float]:
+    """Private anonymous and proportional set size of one process, in MB"""
+    anon = pss = 0
+    mapping = ''
+    with open(f'/proc/{pid}/smaps') as f:
+        for line in f:
+            fields = line.split()
+            if not fields[0].endswith(':'):
+                mapping = fields[5] if len(fields) > 5 else ''
+            elif fields[0] == 'Pss:':
+                pss += int(fields[1])
+            elif fields[0] == 'Private_Dirty:' and not mapping.startswith('/'):
+                anon += int(fields[1])
+    return {'anon': round(anon / 1024, 1), 'pss': round(pss / 1024, 1)}
+
+
+def run_stage(workers: int, pool_size: int, threads: int, seed: int) -> Dict[str, object]:
+    server = GunicornServer(workers, threads, pool_size, seed).start(ready_timeout=300)
+    try:
+        exercise(server.url, rounds=workers * 4)
+        # An updated pool: every worker has to pick up the new file
+        server.candidates[0]['name'] = 'Updated Candidate'
+        with open(f'{server.candidates_file}.tmp', 'w') as f:
+            json.dump(server.candidates, f)
+        os.replace(f'{server.candidates_file}.tmp', server.candidates_file)
+        exercise(server.url, rounds=workers * 4)
+
+        pids = subprocess.run(['pgrep', '-P', str(server.process.pid)],
+                              capture_output=True, text=True).stdout.split()
+        per_worker = [worker_memory(int(pid)) for pid in pids]
+        return {
+            'workers': workers,
+            'poolSize': pool_size,
+            'master': worker_memory(server.process.pid),
+            'perWorker': per_worker,
+            'maxWorkerAnon': max(m['anon'] for m in per_worker),
+            'totalPss': round(sum(m['pss'] for m in per_worker) + worker_memory(server.process.pid)['pss'], 1)
+        }
+    finally:
+        server.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per-worker memory against pool size and worker count')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results JSON to this path')
+    args = parser.parse_args(argv)
+
+    results: List[Dict[str, object]] = []
+    print(f"{'workers':>8s} {'pool':>8s} {'max anon MB':>12s} {'total pss MB':>13s}")
+    for pool_size in args.pool_sizes:
+        for workers in args.workers:
+            stage = run_stage(workers, pool_size, args.threads, args.seed)
+            results.append(stage)
+            print(f"{workers:>8d} {pool_size:>8d} {stage['maxWorkerAnon']:>12.1f} {stage['totalPss']:>13.1f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""Run backend microbenchmarks and compare them against a stored baseline.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.25
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+from app import create_app
+from benchmarks.corpus import generate_candidates, generate_corpus
+
+DEFAULT_THRESHOLD = 0.25
+
+
+class BenchmarkContext:
+    """Shared fixtures: the Flask app, a corpus and a candidate pool on disk"""
+
+    def __init__(self, corpus_size: int, pool_size: int, seed: int):
+        self.workdir = tempfile.mkdtemp(prefix='resume-bench-')
+        self.corpus = generate_corpus(corpus_size, seed=seed)
+        self.candidates = generate_candidates(pool_size, seed=seed)
+
+        # create_app writes its logs relative to the working directory
+        previous_cwd = os.getcwd()
+        os.chdir(self.workdir)
+        try:
+            # Measures handler cost, so the test client's single address must not be rate limited
+            os.environ.setdefault('ADMISSION_ENABLED', '0')
+            # The candidate file is swapped below, so skip warming the default one
+            self.app = create_app(preload_caches=False)
+        finally:
+            os.chdir(previous_cwd)
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        from app.routes import candidate_routes
+        candidate_routes.CANDIDATES_FILE = os.path.join(self.workdir, 'candidates.json')
+        with open(candidate_routes.CANDIDATES_FILE, 'w') as f:
+            json.dump(self.candidates, f)
+
+    def cycle(self, items):
+        """Endless iterator so each call sees a different document"""
+        return itertools.cycle(items)
+
+
+def _function_benchmarks(ctx: BenchmarkContext) -> Dict[str, Callable[[], Any]]:
+    from werkzeug.datastructures import FileStorage
+    from app.utils.file_processor import FileProcessor
+    from app.utils.mock_ai import MockAIModel
+    from app.utils.resume_analyzer import ResumeAnalyzer
+    from app.routes import candidate_routes
+
+    model = MockAIModel()
+    with ctx.app.app_context():
+        analyzer = ResumeAnalyzer()
+    processor = FileProcessor(os.path.join(ctx.workdir, 'uploads'))
+    docs = ctx.cycle(ctx.corpus)
+    payloads = ctx.cycle([doc.encode('utf-8') for doc in ctx.corpus])
+
+    def analyze_resume():
+        with ctx.app.app_context():
+            analyzer.analyze_resume(next(docs))
+
+    def validate_file():
+        processor.validate_file(FileStorage(stream=io.BytesIO(next(payloads)), filename='resume.txt'))
+
+    def get_all_candidates():
+        with ctx.app.app_context():
+            candidate_routes.get_all_candidates()
+
+    return {
+        'mock_ai.extract_skills': lambda: model.extract_skills(next(docs)),
+        'mock_ai.analyze_sentiment': lambda: model.analyze_sentiment(next(docs)),
+        'resume_analyzer.analyze_resume': analyze_resume,
+        'file_processor.validate_file': validate_file,
+        'candidate_routes.get_all_candidates': get_all_candidates
+    }
+
+
+def _endpoint_benchmarks(ctx: BenchmarkContext) -> Dict[str, Callable[[], Any]]:
+    client = ctx.client
+    docs = ctx.cycle(ctx.corpus)
+    candidate_ids = ctx.cycle([c['id'] for c in ctx.candidates])
+
+    def check(response):
+        if response.status_code >= 400:
+            raise RuntimeError(f'{response.request.path} returned {response.status_code}')
+
+    uploads = itertools.count()
+
+    def upload():
+        # A unique trailer keeps every upload off the content-hash cache
+        body = f'{next(docs)}\n{next(uploads)}'.encode('utf-8')
+        data = {'file': (io.BytesIO(body), 'resume.txt')}
+        check(client.post('/api/resume/upload', data=data, content_type='multipart/form-data'))
+
+    def upload_duplicate():
+        data = {'file': (io.BytesIO(ctx.corpus[0].encode('utf-8')), 'resume.txt')}
+        check(client.post('/api/resume/upload', data=data, content_type='multipart/form-data'))
+
+    return {
+        'GET /api/candidates/': lambda: check(client.get('/api/candidates/?page=1&limit=10')),
+        'GET /api/candidates/?search': lambda: check(client.get('/api/candidates/?search=python&sortBy=name')),
+        'GET /api/candidates/<id>': lambda: check(client.get(f'/api/candidates/{next(candidate_ids)}')),
+        'GET /api/candidates/export': lambda: check(client.get('/api/candidates/export')),
+        'GET /api/candidates/export?format=csv': lambda: check(client.get('/api/candidates/export?format=csv&search=python')),
+        'POST /api/resume/analyze': lambda: check(client.post('/api/resume/analyze', json={'content': next(docs)})),
+        'POST /api/resume/upload': upload,
+        'POST /api/resume/upload (duplicate)': upload_duplicate
+    }
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """Time ``func`` like timeit: calibrate a loop count, then take ``repeat`` runs"""
+    func()  # warm up caches and lazy imports
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    per_call = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        per_call.append((time.perf_counter() - start) / loops * 1e6)
+
+    return {
+        'medianUs': round(statistics.median(per_call), 3),
+        'minUs': round(min(per_call), 3),
+        'meanUs': round(statistics.mean(per_call), 3),
+        'stdevUs': round(statistics.stdev(per_call), 3) if len(per_call) > 1 else 0.0,
+        'loops': loops,
+        'repeat': repeat
+    }
+
+
+def run(corpus_size: int = 50, pool_size: int = 1000, seed: int = 0, pattern: str = '',
+        repeat: int = 5, min_time: float = 0.2) -> Dict[str, Any]:
+    ctx = BenchmarkContext(corpus_size, pool_size, seed)
+    suites = {**_function_benchmarks(ctx), **_endpoint_benchmarks(ctx)}
+
+    results = {}
+    for name, func in suites.items():
+        if pattern and pattern not in name:
+            continue
+        results[name] = measure(func, repeat=repeat, min_time=min_time)
+        print(f"{name:45s} {results[name]['medianUs']:>12.1f} us/op", file=sys.stderr)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'corpusSize': corpus_size,
+            'poolSize': pool_size,
+            'seed': seed
+        },
+        'results': results
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Return (rows, regressions) comparing median timings with the baseline.
+
+    A baseline may carry per-benchmark overrides under ``thresholds``.
+    """
+    overrides = baseline.get('thresholds', {})
+    rows, regressions = [], []
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            rows.append({'name': name, 'current': result['medianUs'], 'baseline': None, 'change': None})
+            continue
+        change = result['medianUs'] / base['medianUs'] - 1 if base['medianUs'] else 0.0
+        limit = overrides.get(name, threshold)
+        rows.append({'name': name, 'current': result['medianUs'], 'baseline': base['medianUs'],
+                     'change': change, 'limit': limit})
+        if change > limit:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Backend microbenchmarks')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    parser.add_argument('--baseline', help='Compare against this results JSON')
+    parser.add_argument('--save-baseline', action='store_true', help='Write results to --baseline instead of comparing')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Allowed slowdown before failing, as a fraction (default: 0.25)')
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--corpus-size', type=int, default=50)
+    parser.add_argument('--pool-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds spent per benchmark')
+    args = parser.parse_args(argv)
+
+    results = run(args.corpus_size, args.pool_size, args.seed, args.filter, args.repeat, args.min_time)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if not args.baseline:
+        return 0
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Baseline written to {args.baseline}', file=sys.stderr)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows, regressions = compare(results, baseline, args.threshold)
+    for row in rows:
+        if row['baseline'] is None:
+            print(f"{row['name']:45s} {row['current']:>12.1f} us/op   (new)")
+        else:
+            flag = '  REGRESSION' if row['name'] in regressions else ''
+            print(f"{row['name']:45s} {row['current']:>12.1f} us/op  {row['change']:+7.1%} "
+                  f"(limit {row['limit']:+.0%}){flag}")
+
+    if regressions:
+        print(f'{len(regressions)} benchmark(s) regressed beyond the threshold', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Serialized size and CPU cost per response type, per JSON provider and coding.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --pool-size 5000 --output serialization.json
+
+Payloads are real responses from the app's endpoints over a seeded pool.
+Each one is encoded with the stdlib provider and with the orjson provider
+(when installed) and then compressed with every available coding. CPU time
+is thread CPU time per operation, so it is not inflated by scheduling noise.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict
+
+from flask.json.provider import DefaultJSONProvider
+
+from app import create_app
+from app.utils import compression
+from app.utils.json_provider import FastJSONProvider, orjson
+from benchmarks.corpus import generate_candidates, generate_corpus
+
+
+def cpu_time(func: Callable[[], Any], repeat: int = 5, min_time: float = 0.1) -> float:
+    """Median thread CPU microseconds per call"""
+    func()
+    loops = 1
+    while True:
+        start = time.thread_time()
+        for _ in range(loops):
+            func()
+        if time.thread_time() - start >= min_time / repeat or loops >= 1 << 16:
+            break
+        loops *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.thread_time()
+        for _ in range(loops):
+            func()
+        samples.append((time.thread_time() - start) / loops * 1e6)
+    return round(statistics.median(samples), 2)
+
+
+def collect_payloads(pool_size: int, seed: int) -> Dict[str, Any]:
+    """Response objects as the endpoints produce them"""
+    workdir = tempfile.mkdtemp(prefix='resume-serialization-')
+    candidates = generate_candidates(pool_size, seed=seed)
+    candidates_file = os.path.join(workdir, 'candidates.json')
+    with open(candidates_file, 'w') as f:
+        json.dump(candidates, f)
+
+    previous_cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        app = create_app(preload_caches=False)
+    finally:
+        os.chdir(previous_cwd)
+    from app.routes import candidate_routes
+    candidate_routes.CANDIDATES_FILE = candidates_file
+    client = app.test_client()
+
+    def get(path, **kwargs):
+        response = client.open(path, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f'{path} returned {response.status_code}')
+        return response
+
+    resume = generate_corpus(1, seed=seed)[0]
+    return {
+        'candidates page (10)': get('/api/candidates/?limit=10').get_json(),
+        'candidates page (100)': get('/api/candidates/?limit=100').get_json(),
+        'candidate detail': get(f"/api/candidates/{candidates[0]['id']}").get_json(),
+        'resume analyze': get('/api/resume/analyze', method='POST', json={'content': resume}).get_json(),
+        'bias report': get('/api/detect-bias', method='POST', json={}).get_json(),
+        'export (ndjson)': [json.loads(line) for line in get('/api/candidates/export').get_data().splitlines()]
+    }, app
+
+
+def run(pool_size: int = 1000, seed: int = 0, min_time: float = 0.1) -> Dict[str, Any]:
+    payloads, app = collect_payloads(pool_size, seed)
+    providers = {'stdlib': DefaultJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = FastJSONProvider(app)
+    compressor = compression.ResponseCompressor()
+    codings = {'gzip-1': ('gzip', 1), 'gzip-6': ('gzip', 6)}
+    if compression.brotli is not None:
+        codings.update({'br-1': ('br', 1), 'br-4': ('br', 4)})
+
+    results = {}
+    for name, obj in payloads.items():
+        if name.startswith('export'):
+            # One line per record, as the streaming export writes them
+            encoders = {label: (lambda p=p: '\n'.join(p.dumps(row) for row in obj).encode('utf-8'))
+                        for label, p in providers.items()}
+        else:
+            encoders = {label: (lambda p=p: p.response(obj).get_data()) for label, p in providers.items()}
+
+        row = {'encode': {}}
+        body = None
+        for label, encode in encoders.items():
+            body = encode()
+            row['encode'][label] = {'bytes': len(body), 'cpuUs': cpu_time(encode, min_time=min_time)}
+
+        row['compress'] = {}
+        for label, (coding, level) in codings.items():
+            if coding == 'gzip':
+                compressor.gzip_level = level
+            else:
+                compressor.brotli_quality = level
+            compressed = compressor.compress(body, coding)
+            row['compress'][label] = {
+                'bytes': len(compressed),
+                'ratio': round(len(compressed) / len(body), 3),
+                'cpuUs': cpu_time(lambda: compressor.compress(body, coding), min_time=min_time)
+            }
+        results[name] = row
+    return {'poolSize': pool_size, 'seed': seed, 'results': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='JSON encoding and compression cost per response type')
+    parser.add_argument('--pool-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-time', type=float, default=0.1, help='CPU seconds spent per measurement')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    args = parser.parse_args(argv)
+
+    report = run(args.pool_size, args.seed, args.min_time)
+    for name, row in report['results'].items():
+        print(f'\n{name}')
+        for label, stats in row['encode'].items():
+            print(f"  encode {label:8s} {stats['bytes']:>10d} B {stats['cpuUs']:>12.1f} us")
+        for label, stats in row['compress'].items():
+            print(f"  {label:15s} {stats['bytes']:>10d} B {stats['cpuUs']:>12.1f} us  ({stats['ratio']:.1%} of raw)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
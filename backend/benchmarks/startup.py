@@ -0,0 +1,62 @@
+"""Measure cold start: import + create_app in fresh interpreters.
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs inside the child interpreter; prints one JSON object
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+import_ms = (time.perf_counter() - start) * 1000.0
+app = create_app()
+phases = {'import app': import_ms, **app.startup_report.to_dict()}
+phases['total'] = (time.perf_counter() - start) * 1000.0
+sys.stdout.write(json.dumps(phases))
+"""
+
+
+def measure_once(preload: bool = True) -> dict:
+    env = {**os.environ, 'PYTHONPATH': BACKEND_DIR, 'APP_PRELOAD': '1' if preload else '0'}
+    with tempfile.TemporaryDirectory(prefix='resume-startup-') as workdir:
+        env.setdefault('LOG_DIR', os.path.join(workdir, 'logs'))
+        output = subprocess.run([sys.executable, '-c', _PROBE], env=env, cwd=workdir,
+                                check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def run(runs: int = 5, preload: bool = True) -> dict:
+    samples = [measure_once(preload) for _ in range(runs)]
+    return {name: round(statistics.median(s[name] for s in samples), 3) for name in samples[0]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cold start timing per startup phase')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--no-preload', action='store_true', help='Skip the preload phase (APP_PRELOAD=0)')
+    parser.add_argument('--json', action='store_true', help='Print JSON instead of a table')
+    args = parser.parse_args(argv)
+
+    medians = run(args.runs, preload=not args.no_preload)
+    if args.json:
+        print(json.dumps(medians, indent=2))
+        return 0
+    total = medians['total']
+    for name, ms in sorted(medians.items(), key=lambda item: item[1], reverse=True):
+        if name != 'total':
+            print(f"{name:32s} {ms:>10.2f} ms {ms / total:>7.1%}")
+    print(f"{'total':32s} {total:>10.2f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
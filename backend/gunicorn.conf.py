@@ -0,0 +1,32 @@
+# Gunicorn configuration: gunicorn -c gunicorn.conf.py "app:create_app()"
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Build the app (and its warmed caches) once in the master; workers inherit it
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+
+def when_ready(server):
+    """Freeze preloaded objects so worker GC passes don't un-share their pages"""
+    if preload_app:
+        from app.startup import freeze_for_fork
+        from app.utils.metrics import registry
+        # Metrics recorded while preloading are reported once, from the master's own file
+        registry.flush()
+        freeze_for_fork()
+
+
+def post_fork(server, worker):
+    """Start the worker's metrics from zero instead of re-counting the master's"""
+    if preload_app:
+        from app.utils.metrics import registry
+        registry.reset()
+
+
+def child_exit(server, worker):
+    """Drop the exited worker's gauges from the shared metrics directory"""
+    from app.utils.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
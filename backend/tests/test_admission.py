@@ -0,0 +1,87 @@
+import types
+
+import pytest
+from flask import Flask
+
+from app.utils import admission
+from app.utils.admission import AdmissionController, SlotPool, TokenBucketStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(admission, 'time', types.SimpleNamespace(
+        time=lambda: clock.now, monotonic=lambda: clock.now, sleep=lambda seconds: None))
+    return clock
+
+
+def test_bucket_spends_its_burst_then_refills(tmp_path, clock):
+    buckets = TokenBucketStore(str(tmp_path / 'buckets.sqlite3'))
+    assert [buckets.take('a', rate=2.0, burst=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.take('a', rate=2.0, burst=3) == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert buckets.take('a', rate=2.0, burst=3) == 0.0
+    # Refill never exceeds the burst
+    clock.now += 60
+    assert [buckets.take('a', rate=2.0, burst=3) for _ in range(4)][-1] > 0
+
+
+def test_buckets_are_per_key_and_shared_between_stores(tmp_path, clock):
+    path = str(tmp_path / 'buckets.sqlite3')
+    first, second = TokenBucketStore(path), TokenBucketStore(path)
+    assert first.take('a', rate=1.0, burst=1) == 0.0
+    assert second.take('a', rate=1.0, burst=1) == pytest.approx(1.0)
+    assert second.take('b', rate=1.0, burst=1) == 0.0
+
+
+def test_slot_pool_is_bounded(tmp_path):
+    pool = SlotPool(str(tmp_path), 'upload', 2)
+    held = [pool.try_acquire(), pool.try_acquire()]
+    assert None not in held
+    assert pool.try_acquire() is None
+    SlotPool.release(held.pop())
+    fd = pool.try_acquire()
+    assert fd is not None
+    for fd in held + [fd]:
+        SlotPool.release(fd)
+
+
+def test_over_the_rate_is_429_with_retry_after(tmp_path, clock):
+    controller = AdmissionController(str(tmp_path), {'upload': {'rate': 0.5, 'burst': 1}})
+    with Flask(__name__).test_request_context():
+        assert controller.admit('upload', 'client-a') is None
+        response = controller.admit('upload', 'client-a')
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '2'
+        assert controller.admit('upload', 'client-b') is None
+        assert controller.admit('other', 'client-a') is None
+
+
+def test_full_slots_and_queue_are_503(tmp_path, clock):
+    controller = AdmissionController(str(tmp_path), {'upload': {'concurrency': 1, 'queue': 0}})
+    app = Flask(__name__)
+    with app.test_request_context():
+        assert controller.admit('upload', 'client-a') is None
+        with app.test_request_context():
+            assert controller.admit('upload', 'client-b').status_code == 503
+        controller.release()
+    with app.test_request_context():
+        assert controller.admit('upload', 'client-b') is None
+        controller.release()
+
+
+@pytest.mark.parametrize('hops, address', [(None, '127.0.0.1'), ('1', '203.0.113.9')])
+def test_forwarded_for_is_only_trusted_from_configured_proxies(monkeypatch, hops, address):
+    from flask import request
+
+    from app import create_app
+    if hops is None:
+        monkeypatch.delenv('TRUSTED_PROXY_HOPS', raising=False)
+    else:
+        monkeypatch.setenv('TRUSTED_PROXY_HOPS', hops)
+    app = create_app(preload_caches=False)
+    app.add_url_rule('/client-address', 'client_address', lambda: request.remote_addr)
+
+    response = app.test_client().get('/client-address', headers={'X-Forwarded-For': '203.0.113.9'})
+    assert response.get_data(as_text=True) == address
@@ -0,0 +1,48 @@
+import pytest
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from app import create_app
+from app.utils import batch_scheduler
+from app.utils.batch_scheduler import SchedulerOverloaded
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app(preload_caches=False)
+
+    @app.route('/_too_large')
+    def too_large():
+        raise RequestEntityTooLarge()
+
+    @app.route('/_overloaded')
+    def overloaded():
+        raise SchedulerOverloaded('full')
+
+    @app.route('/_broken')
+    def broken():
+        raise RuntimeError('boom')
+
+    return app
+
+
+def test_building_the_app_does_not_load_the_backend(app):
+    assert batch_scheduler.current_scheduler() is None
+
+
+def test_http_errors_keep_their_status(app):
+    client = app.test_client()
+    assert client.get('/no-such-page').status_code == 404
+    assert client.delete('/api/resume/sentiment').status_code == 405
+    assert client.get('/_too_large').status_code == 413
+
+
+def test_unhandled_errors_are_500(app):
+    response = app.test_client().get('/_broken')
+    assert response.status_code == 500
+    assert response.get_json() == {'error': 'Internal server error'}
+
+
+def test_full_analysis_queue_is_503_with_retry_after(app):
+    response = app.test_client().get('/_overloaded')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(SchedulerOverloaded.retry_after)
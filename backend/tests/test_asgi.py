@@ -0,0 +1,56 @@
+import asyncio
+import importlib
+import threading
+
+import pytest
+
+
+@pytest.fixture(scope='module')
+def asgi():
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('APP_PRELOAD', '0')
+        yield importlib.import_module('app.asgi')
+
+
+def call(application, method='GET', path='/', body=b'', chunks=1):
+    """Run one request through an ASGI app; returns (status, headers, body)"""
+    size = -(-len(body) // chunks) if body else 0
+    messages = [{'type': 'http.request', 'body': body[i:i + size], 'more_body': i + size < len(body)}
+                for i in range(0, len(body), size)] if body else [{'type': 'http.request', 'body': b''}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'http_version': '1.1',
+             'headers': [(b'content-length', str(len(body)).encode())]}
+    asyncio.run(application(scope, receive, send))
+    start = sent[0]
+    assert start['type'] == 'http.response.start'
+    assert sent[-1] == {'type': 'http.response.body'}
+    return start['status'], dict(start['headers']), b''.join(m.get('body', b'') for m in sent[1:])
+
+
+def test_requests_run_on_the_pool_and_stream(asgi):
+    threads = []
+
+    def wsgi_app(environ, start_response):
+        threads.append(threading.current_thread().name)
+        data = environ['wsgi.input'].read()
+        start_response('201 Created', [('Content-Type', 'text/plain'), ('Content-Length', str(len(data) + 2))])
+        return [data, b'!!', b'ignored past Content-Length']
+
+    application = asgi.PooledWsgiToAsgi(wsgi_app, max_threads=2)
+    status, headers, body = call(application, 'POST', body=b'hello world', chunks=3)
+    assert (status, body) == (201, b'hello world!!')
+    assert headers[b'content-type'] == b'text/plain'
+    assert threads[0].startswith('asgi-request')
+
+
+def test_flask_app_behind_the_adapter(asgi):
+    status, headers, body = call(asgi.application, path='/api/no-such-route')
+    assert status == 404
+    assert headers[b'content-type'] == b'application/json'
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from app.utils.batch_jobs import BatchJobStore
+
+
+class ManualScheduler:
+    """Hands out futures the test completes by hand"""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, method, payload):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    def finish(self):
+        for future in self.futures:
+            future.set_result('ok')
+
+
+def test_wait_returns_when_the_job_finishes(tmp_path):
+    store = BatchJobStore(str(tmp_path))
+    scheduler = ManualScheduler()
+    job = store.submit(scheduler, 'analyze_sentiment', ['a', 'b'])
+
+    assert not asyncio.run(store.wait(job.id, 0.01))
+    threading.Timer(0.05, scheduler.finish).start()
+    assert asyncio.run(store.wait(job.id, 5))
+    assert store.status(job.id)['results'] == ['ok', 'ok']
+
+
+def test_other_workers_wait_on_the_status_file(tmp_path):
+    accepting, other = BatchJobStore(str(tmp_path)), BatchJobStore(str(tmp_path))
+    other.POLL_INTERVAL = 0.01
+    scheduler = ManualScheduler()
+    job = accepting.submit(scheduler, 'analyze_sentiment', ['a'])
+
+    assert other.job(job.id) is None
+    assert not asyncio.run(other.wait(job.id, 0.05))
+    # The accepting worker persists the finished status from its I/O pool
+    threading.Timer(0.05, scheduler.finish).start()
+    assert asyncio.run(other.wait(job.id, 5))
+    assert other.status(job.id)['status'] == 'completed'
+    assert not asyncio.run(other.wait('0' * 32, 1))
+
+
+def test_batch_jobs_are_capped_and_typed(monkeypatch):
+    from app import create_app
+    from app.routes import resume_routes
+    monkeypatch.setattr(resume_routes, 'MAX_BATCH_JOB_SIZE', 2)
+    client = create_app(preload_caches=False).test_client()
+
+    response = client.post('/api/resume/batch', json={'contents': ['a', 'b', 'c']})
+    assert response.status_code == 413
+    assert response.get_json()['maxBatchSize'] == 2
+    response = client.post('/api/resume/batch', json={'contents': ['a', {'text': 'b'}]})
+    assert response.status_code == 400
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from app.utils.batch_scheduler import BatchScheduler, SchedulerOverloaded
+
+
+class RecordingBackend:
+    """Upper-cases payloads and records each batch; blocks while ``gate`` is clear"""
+
+    def __init__(self):
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def run_batch(self, method, payloads):
+        self.gate.wait(5)
+        self.batches.append((method, list(payloads)))
+        return [payload.upper() for payload in payloads]
+
+
+def test_concurrent_calls_share_a_batch():
+    backend = RecordingBackend()
+    scheduler = BatchScheduler(backend, max_batch_size=8, max_wait_ms=50)
+    assert scheduler.map('analyze_sentiment', ['a', 'b', 'c']) == ['A', 'B', 'C']
+    assert backend.batches == [('analyze_sentiment', ['a', 'b', 'c'])]
+    assert scheduler.stats()['batches'] == 1
+
+
+def test_calls_are_grouped_by_method():
+    backend = RecordingBackend()
+    scheduler = BatchScheduler(backend, max_batch_size=8, max_wait_ms=50)
+    first = scheduler.submit('extract_skills', 'x')
+    second = scheduler.submit('analyze_sentiment', 'y')
+    assert (first.result(5), second.result(5)) == ('X', 'Y')
+    assert sorted(method for method, _ in backend.batches) == ['analyze_sentiment', 'extract_skills']
+
+
+def test_rejected_batch_leaves_no_queued_work():
+    backend = RecordingBackend()
+    backend.gate.clear()
+    scheduler = BatchScheduler(backend, max_batch_size=1, max_wait_ms=0, max_queue_depth=3)
+    blocker = scheduler.submit('analyze_sentiment', 'busy')
+    while scheduler.stats()['queueDepth']:
+        pass
+
+    with pytest.raises(SchedulerOverloaded):
+        scheduler.map('analyze_sentiment', ['a', 'b', 'c', 'd'])
+    with pytest.raises(SchedulerOverloaded):
+        scheduler.submit_all('analyze_sentiment', ['a'] * 10)
+
+    backend.gate.set()
+    blocker.result(5)
+    assert scheduler.map('analyze_sentiment', ['e']) == ['E']
+    assert [payloads for _, payloads in backend.batches] == [['busy'], ['e']]
+
+
+def test_backend_errors_reach_every_caller():
+    class FailingBackend:
+        def run_batch(self, method, payloads):
+            raise RuntimeError('backend down')
+
+    scheduler = BatchScheduler(FailingBackend(), max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        scheduler.call('analyze_sentiment', 'x', timeout=5)
+    assert scheduler.stats()['errors'] == 1
+
+
+def test_analyze_resume_queues_every_call_before_waiting(monkeypatch):
+    from concurrent.futures import Future
+
+    from app import create_app
+    from app.routes import resume_routes
+
+    submitted, queued_at_wait = [], []
+
+    class RecordingFuture(Future):
+        def result(self, timeout=None):
+            queued_at_wait.append(len(submitted))
+            return super().result(timeout)
+
+    class RecordingScheduler:
+        def submit(self, method, payload):
+            submitted.append(method)
+            future = RecordingFuture()
+            future.set_result(method)
+            return future
+
+    monkeypatch.setattr(resume_routes, 'get_scheduler', RecordingScheduler)
+    response = create_app(preload_caches=False).test_client().post('/api/resume/analyze', json={'content': 'cv'})
+    assert response.status_code == 200
+    assert submitted == ['extract_skills', 'analyze_sentiment', 'analyze_candidate']
+    assert queued_at_wait == [3, 3, 3]
@@ -0,0 +1,58 @@
+import pytest
+
+from app import create_app
+from app.utils.bias_detector import BiasDetector
+
+
+def pool(rates, size=50):
+    """``size`` candidates per group with the given share selected"""
+    groups, scores = [], []
+    for group, rate in rates.items():
+        chosen = round(size * rate)
+        groups += [group] * size
+        scores += [90.0] * chosen + [50.0] * (size - chosen)
+    return groups, scores
+
+
+def test_adverse_impact_is_detected():
+    groups, scores = pool({'a': 0.6, 'b': 0.2})
+    detection = BiasDetector().analyze(groups, scores, threshold=75)['biasDetection']
+    assert detection['biasType'] == 'adverse_impact'
+    assert detection['confidence'] > 0.95
+
+
+def test_confidence_without_bias_is_in_the_finding():
+    detector = BiasDetector()
+    groups, scores = pool({'a': 0.5, 'b': 0.5})
+    detection = detector.analyze(groups, scores, threshold=75)['biasDetection']
+    assert detection == {'hasBias': False, 'biasType': 'none', 'confidence': 1.0}
+
+    # Below four-fifths but not significant: the finding is weaker
+    groups, scores = pool({'a': 0.5, 'b': 0.35}, size=20)
+    detection = detector.analyze(groups, scores, threshold=75)['biasDetection']
+    assert detection['biasType'] == 'none'
+    assert detector.significance <= detection['confidence'] < 1.0
+
+    # Too few candidates per group to tell
+    groups, scores = pool({'a': 1.0, 'b': 0.0}, size=2)
+    assert detector.analyze(groups, scores, threshold=75)['biasDetection']['confidence'] == 0.0
+
+
+def test_chunks_and_merges_match_a_single_pass():
+    detector = BiasDetector()
+    groups, scores = pool({'a': 0.6, 'b': 0.3, 'c': 0.5}, size=30)
+    whole = detector.analyze(groups, scores, threshold=75)
+    chunks = [(groups[i:i + 17], scores[i:i + 17]) for i in range(0, len(groups), 17)]
+    assert detector.analyze_stream(chunks, threshold=75) == whole
+
+    left = detector.accumulator().update(groups[:40], scores[:40], threshold=75)
+    right = detector.accumulator().update(groups[40:], scores[40:], threshold=75)
+    assert detector.report(left.merge(right)) == whole
+
+
+@pytest.mark.parametrize('candidates', [['a'], [{'role': 'a', 'matchScore': 80}, 3]])
+def test_candidates_that_are_not_objects_are_400(candidates):
+    client = create_app(preload_caches=False).test_client()
+    response = client.post('/api/detect-bias', json={'candidates': candidates})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Each candidate must be an object'}
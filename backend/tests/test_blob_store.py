@@ -0,0 +1,95 @@
+import hashlib
+import io
+import os
+import sqlite3
+
+from werkzeug.datastructures import FileStorage
+
+from app.utils.blob_store import BlobStore
+from app.utils.file_processor import FileProcessor
+
+
+def used(store, digest, kind):
+    with sqlite3.connect(store.index_path) as conn:
+        return conn.execute('SELECT used FROM derived WHERE digest = ? AND kind = ?', (digest, kind)).fetchone()[0]
+
+
+def test_hits_are_read_only_until_flushed(tmp_path):
+    store = BlobStore(str(tmp_path))
+    blob = store.put(io.BytesIO(b'hello'))
+    store.set_derived(blob.digest, 'text', 'hello')
+    before = used(store, blob.digest, 'text')
+
+    assert store.get_derived(blob.digest, 'text') == 'hello'
+    assert used(store, blob.digest, 'text') == before
+
+    store.flush_recency()
+    assert used(store, blob.digest, 'text') > before
+
+
+def test_pending_recency_is_written_with_the_next_write(tmp_path):
+    store = BlobStore(str(tmp_path))
+    blob = store.put(io.BytesIO(b'hello'))
+    store.set_derived(blob.digest, 'text', 'hello')
+    before = used(store, blob.digest, 'text')
+
+    store.get_derived(blob.digest, 'text')
+    store.set_derived(blob.digest, 'other', 1)
+    assert used(store, blob.digest, 'text') > before
+
+
+def test_references_of_a_dead_process_are_reaped(tmp_path):
+    store = BlobStore(str(tmp_path))
+    kept = store.put(io.BytesIO(b'kept'))
+    leaked = store.path(hashlib.sha256(b'leaked').hexdigest())
+
+    pid = os.fork()
+    if pid == 0:
+        # A worker that crashes while holding references
+        store.put(io.BytesIO(b'leaked'))
+        store.put(io.BytesIO(b'kept'))
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert store.refcount(kept.digest) == 2
+    assert store.reap_dead_holders() == 1
+    assert store.refcount(kept.digest) == 1
+    assert os.path.exists(kept.path)
+    assert not os.path.exists(leaked)
+
+    assert store.release(kept)
+    assert store.reap_dead_holders() == 0
+
+
+def test_identical_reuploads_skip_sniffing(tmp_path, monkeypatch):
+    processor = FileProcessor(str(tmp_path))
+    upload = lambda: FileStorage(io.BytesIO(b'Jane Doe, Python developer\n'), filename='cv.txt')
+
+    ok, blob, error = processor.save_file(upload())
+    assert ok and error is None
+    assert processor.read_file_content(blob)[0]
+
+    def sniff(head):
+        raise AssertionError('known content was sniffed again')
+
+    monkeypatch.setattr(processor, 'check_file_type', sniff)
+    ok, again, error = processor.save_file(upload())
+    assert ok and again.digest == blob.digest
+    assert processor.blob_store.refcount(blob.digest) == 2
+
+
+def test_unknown_content_is_sniffed(tmp_path):
+    processor = FileProcessor(str(tmp_path))
+    ok, stored, error = processor.save_file(FileStorage(io.BytesIO(b'\x00\x01binary\xff' * 64), filename='cv.txt'))
+    assert not ok and stored is None
+    assert error.startswith('Invalid file type')
+
+
+def test_digests_with_derived_skips_the_values(tmp_path):
+    store = BlobStore(str(tmp_path))
+    digests = [store.put(io.BytesIO(b'resume %d' % i)).digest for i in range(3)]
+    store.set_derived(digests[0], 'text', 'resume 0')
+    store.set_derived(digests[1], 'skills:v1', ['Python'])
+
+    assert store.digests_with_derived(digests + ['0' * 64], 'text') == {digests[0]}
+    assert store.digests_with_derived([], 'text') == set()
@@ -0,0 +1,103 @@
+import pytest
+
+from app.utils.candidate_query import CandidateQuery
+from app.utils.candidate_snapshot import CandidateSnapshot
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    roles = ['Developer', 'Designer', 'Manager']
+    return CandidateSnapshot.from_candidates([
+        {
+            'id': f'c{i}',
+            'name': f'Candidate {i}',
+            'email': f'candidate{i}@example.com',
+            'role': roles[i % 3],
+            # Plenty of ties, so the cursor has to break them by row
+            'matchScore': 70 + i % 4,
+            'skills': ['Python'] if i % 2 else ['Figma'],
+            'appliedDate': f'2024-01-{1 + i % 28:02d}'
+        }
+        for i in range(40)
+    ])
+
+
+def ids(rows):
+    return [row['id'] for row in rows]
+
+
+@pytest.mark.parametrize('args', [
+    {},
+    {'sortOrder': 'asc'},
+    {'sortBy': 'appliedDate', 'role': 'developer'},
+    {'sortBy': 'name', 'sortOrder': 'asc', 'search': 'python', 'minScore': '71'},
+])
+def test_resuming_after_any_row_continues_where_it_stopped(snapshot, args):
+    query = CandidateQuery.from_args(args)
+    full = ids(query.iter_matches(snapshot))
+    assert full and len(full) == len(set(full))
+    for i, candidate_id in enumerate(full):
+        start = query.position_after(snapshot, candidate_id)
+        assert ids(query.iter_matches(snapshot, start)) == full[i + 1:]
+
+
+def test_page_matches_the_stream(snapshot):
+    query = CandidateQuery.from_args({'role': 'designer'})
+    total, page = query.page(snapshot, 5, 5)
+    full = ids(query.iter_matches(snapshot))
+    assert total == len(full)
+    assert ids(page) == full[5:10]
+
+
+def test_unknown_cursor_is_none(snapshot):
+    assert CandidateQuery().position_after(snapshot, 'missing') is None
+
+
+def candidates(count=40):
+    roles = ['Developer', 'Designer', 'Manager']
+    return [
+        {
+            'id': f'c{i}',
+            'name': f'Candidate {i % 7}',
+            'email': f'candidate{i}@example.com',
+            'role': roles[i % 3],
+            'matchScore': 70 + i % 4 if i % 9 else None,
+            'skills': ['Python'],
+            'appliedDate': f'2024-01-{1 + i % 28:02d}'
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize('sort_by', ['matchScore', 'appliedDate', 'name'])
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+def test_keyset_resume_without_the_row(sort_by, sort_order):
+    rows = candidates()
+    query = CandidateQuery.from_args({'sortBy': sort_by, 'sortOrder': sort_order})
+    full = list(query.iter_matches(CandidateSnapshot.from_candidates(rows)))
+    for i, last in enumerate(full):
+        # The last candidate received has since been removed
+        remaining = CandidateSnapshot.from_candidates([row for row in rows if row['id'] != last['id']])
+        start = query.position_after(remaining, last['id'], last.get(sort_by))
+        assert ids(query.iter_matches(remaining, start)) == ids(full[i + 1:])
+
+
+def test_keyset_resume_places_changed_rows_by_their_new_value():
+    rows = candidates()
+    query = CandidateQuery.from_args({'sortBy': 'matchScore'})
+    original = list(query.iter_matches(CandidateSnapshot.from_candidates(rows)))
+    full, last = ids(original), original[10]
+    # Already sent, then dropped below the cursor: sent again. Not sent yet, then raised above it: skipped.
+    moved_down, moved_up = full[5], full[30]
+    for row in rows:
+        if row['id'] == moved_down:
+            row['matchScore'] = 0
+        if row['id'] == moved_up:
+            row['matchScore'] = 100
+    changed = CandidateSnapshot.from_candidates(rows)
+    resumed = ids(query.iter_matches(changed, query.position_after(changed, last['id'], last['matchScore'])))
+
+    changed_full = ids(query.iter_matches(changed))
+    assert resumed == changed_full[len(changed_full) - len(resumed):]
+    assert moved_down in resumed and moved_up not in resumed
+    assert [c for c in resumed if c != moved_down] == [c for c in full[11:] if c != moved_up]
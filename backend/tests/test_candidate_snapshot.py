@@ -0,0 +1,40 @@
+import pytest
+
+from app import create_app
+from app.utils.candidate_snapshot import CandidateSnapshot
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    return CandidateSnapshot.from_candidates([
+        {'id': f'c{i}', 'name': f'Candidate {i}', 'email': f'c{i}@example.com', 'role': 'Developer',
+         'matchScore': 80, 'skills': ['Python']}
+        for i in range(10)
+    ])
+
+
+def test_find_by_id(snapshot):
+    assert snapshot.row(snapshot.find('c7'))['id'] == 'c7'
+    assert snapshot.find('c70') is None
+
+
+@pytest.mark.parametrize('candidate_id', [7, None, {'id': 'c7'}, ['c7']])
+def test_find_ignores_ids_that_are_not_strings(snapshot, candidate_id):
+    assert snapshot.find(candidate_id) is None
+
+
+@pytest.fixture(scope='module')
+def client():
+    return create_app(preload_caches=False).test_client()
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/api/candidates/send-email', {'subject': 'Hi', 'message': 'Hello'}),
+    ('/api/detect-bias', {}),
+    ('/api/generate-questions/batch', {}),
+])
+@pytest.mark.parametrize('candidate_ids', [[1], [{'a': 1}], 'c1'])
+def test_malformed_candidate_ids_are_400(client, path, body, candidate_ids):
+    response = client.post(path, json={**body, 'candidateIds': candidate_ids})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'candidateIds must be a list of candidate ids'}
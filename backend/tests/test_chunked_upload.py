@@ -0,0 +1,118 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from app.utils.blob_store import BlobStore
+from app.utils.chunked_upload import ChunkedUploadStore, UploadError
+
+
+def text_validator(head):
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError:
+        return False, 'application/octet-stream', 'Invalid file type: application/octet-stream'
+    return True, 'text/plain', None
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ChunkedUploadStore(str(tmp_path / 'sessions'), BlobStore(str(tmp_path / 'blobs')), text_validator)
+
+
+def send(store, upload_id, offset, data):
+    return store.append(upload_id, offset, io.BytesIO(data), hashlib.sha256(data).hexdigest())
+
+
+def test_chunks_advance_the_offset_and_complete(store):
+    data = 'résumé line\n'.encode('utf-8') * 400
+    session = store.create('cv.txt', len(data), hashlib.sha256(data).hexdigest())
+    upload_id = session['uploadId']
+
+    # Split inside a multi-byte character so text extraction has to carry it over
+    cut = data.index('é'.encode('utf-8')) + 1 + 2400
+    assert send(store, upload_id, 0, data[:cut])['offset'] == cut
+    assert store.status(upload_id)['mimeType'] == 'text/plain'
+    assert send(store, upload_id, cut, data[cut:])['offset'] == len(data)
+
+    blob, digest = store.complete(upload_id)
+    assert digest == hashlib.sha256(data).hexdigest()
+    assert store.blob_store.get_derived(digest, 'text') == data.decode('utf-8')
+    store.blob_store.release(blob)
+    assert store.complete(upload_id) == (None, digest)
+
+
+def test_retransmits_gaps_and_overlaps(store):
+    data = b'a' * 3000
+    upload_id = store.create('cv.txt', len(data))['uploadId']
+    send(store, upload_id, 0, data[:1000])
+
+    # The same chunk again is acknowledged without moving the offset
+    assert send(store, upload_id, 0, data[:1000])['offset'] == 1000
+    with pytest.raises(UploadError) as gap:
+        send(store, upload_id, 2000, data[2000:])
+    assert gap.value.status == 409 and gap.value.details['offset'] == 1000
+    with pytest.raises(UploadError) as overlap:
+        send(store, upload_id, 500, data[500:1500])
+    assert overlap.value.status == 409
+
+
+def test_bad_chunks_leave_the_offset_alone(store):
+    upload_id = store.create('cv.txt', 100)['uploadId']
+    with pytest.raises(UploadError) as mismatch:
+        store.append(upload_id, 0, io.BytesIO(b'x' * 10), '0' * 64)
+    assert mismatch.value.status == 400
+    with pytest.raises(UploadError) as too_large:
+        send(store, upload_id, 0, b'x' * 101)
+    assert too_large.value.status == 413
+    assert store.status(upload_id)['offset'] == 0
+
+
+def test_wrong_type_is_rejected_from_the_first_chunk(store):
+    upload_id = store.create('cv.txt', 5000)['uploadId']
+    with pytest.raises(UploadError):
+        send(store, upload_id, 0, b'\xff\xfe' * 1100)
+    assert store.status(upload_id)['state'] == 'rejected'
+
+
+@pytest.mark.parametrize('sha256', [123, ['a'], 'not-a-digest'])
+def test_create_rejects_malformed_checksums(store, sha256):
+    with pytest.raises(UploadError) as error:
+        store.create('cv.txt', 10, sha256)
+    assert error.value.status == 400
+
+
+def test_sweep_skips_sessions_that_vanish(store, monkeypatch):
+    expired = store.create('old.txt', 10)['uploadId']
+    fresh = store.create('new.txt', 10)['uploadId']
+    past = os.path.getmtime(store._path(expired, 'json')) - store.ttl_seconds - 1
+    os.utime(store._path(expired, 'json'), (past, past))
+
+    # Another worker's sweep removes the expired session between our mtime check and our lock
+    getmtime = os.path.getmtime
+
+    def racing_getmtime(path):
+        mtime = getmtime(path)
+        if path == store._path(expired, 'json'):
+            store.abort(expired)
+        return mtime
+
+    monkeypatch.setattr(os.path, 'getmtime', racing_getmtime)
+    store._last_sweep = 0
+    store._sweep()
+    monkeypatch.undo()
+
+    assert store.status(fresh)['state'] == 'receiving'
+    assert not os.path.exists(store._path(expired, 'lock'))
+
+
+def test_removed_sessions_take_their_lock_files(store):
+    upload_id = store.create('cv.txt', 10)['uploadId']
+    store.status(upload_id)
+    assert os.path.exists(store._path(upload_id, 'lock'))
+    store.abort(upload_id)
+    assert os.listdir(store.directory) == []
+    with pytest.raises(UploadError) as missing:
+        store.status(upload_id)
+    assert missing.value.status == 404
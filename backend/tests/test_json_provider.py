@@ -0,0 +1,35 @@
+import json
+import math
+
+import pytest
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app.utils.json_provider import FastJSONProvider, orjson
+
+pytestmark = pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+
+
+@pytest.fixture
+def providers():
+    app = Flask(__name__)
+    return FastJSONProvider(app), DefaultJSONProvider(app), app
+
+
+@pytest.mark.parametrize('value', [
+    {'score': float('nan'), 'name': None},
+    [1.5, {'nested': (float('inf'), -float('inf'))}],
+])
+def test_non_finite_floats_match_the_stdlib(providers, value):
+    fast, stdlib, app = providers
+    assert fast.dumps(value) == stdlib.dumps(value)
+    with app.app_context():
+        assert fast.response(value).get_data() == stdlib.response(value).get_data()
+
+
+def test_finite_output_and_round_trip(providers):
+    fast, stdlib, _ = providers
+    value = {'b': None, 'a': [1, 2.5, 'résumé']}
+    assert json.loads(fast.dumps(value)) == json.loads(stdlib.dumps(value))
+    assert fast.dumps(value).index('"a"') < fast.dumps(value).index('"b"')
+    assert math.isnan(fast.loads('{"x": NaN}')['x'])
@@ -0,0 +1,47 @@
+import logging
+import os
+import queue
+
+from app import create_app
+from app.utils.logging_pipeline import (
+    AsyncLogPipeline, BatchingRotatingFileHandler, NonBlockingQueueHandler, DROPPED
+)
+
+
+def make_record(message):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, message, (), None)
+
+
+def test_rollover_measures_encoded_bytes(tmp_path):
+    path = str(tmp_path / 'app.log')
+    handler = BatchingRotatingFileHandler(path, maxBytes=100, backupCount=2, encoding='utf-8', delay=True)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    # 40 characters, 80 bytes each
+    handler.emit_batch([make_record('é' * 40)])
+    handler.emit_batch([make_record('é' * 40)])
+    handler.close()
+
+    assert os.path.exists(path + '.1')
+    assert os.path.getsize(path) <= 100
+    assert os.path.getsize(path + '.1') <= 100
+
+
+def test_dropped_records_are_counted_as_a_metric(tmp_path):
+    handler = BatchingRotatingFileHandler(str(tmp_path / 'app.log'), delay=True)
+    pipeline = AsyncLogPipeline(handler, max_queue=1)
+    pipeline.ensure_started = lambda: None
+    pipeline.queue = queue.Queue(maxsize=1)
+    queue_handler = NonBlockingQueueHandler(pipeline)
+    before = DROPPED.values.get((), 0.0)
+
+    for _ in range(3):
+        queue_handler.emit(make_record('hello'))
+
+    assert pipeline.dropped == 2
+    assert DROPPED.values.get((), 0.0) - before == 2
+
+
+def test_request_threads_only_enqueue():
+    app = create_app(preload_caches=False)
+    assert [type(handler) for handler in app.logger.handlers] == [NonBlockingQueueHandler]
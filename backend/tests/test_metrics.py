@@ -0,0 +1,25 @@
+import os
+
+from app.utils.metrics import MetricsRegistry
+
+
+def test_forked_workers_do_not_recount_the_masters_values(tmp_path):
+    registry = MetricsRegistry(multiproc_dir=str(tmp_path))
+    builds = registry.counter('snapshot_builds_total', 'Snapshot builds')
+    latency = registry.histogram('stage_seconds', 'Stage latency')
+    builds.inc(2)
+    latency.observe(0.1)
+    registry.flush()
+
+    pid = os.fork()
+    if pid == 0:
+        # What gunicorn's post_fork hook does in each worker
+        registry.reset()
+        builds.inc()
+        registry.flush()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    merged = registry.collect()
+    assert merged['snapshot_builds_total']['values'] == {(): 3.0}
+    assert merged['stage_seconds']['values'][()][-1] == 1
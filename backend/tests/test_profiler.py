@@ -0,0 +1,31 @@
+import threading
+
+from app.utils.profiler import DEFAULT_HZ, SamplingProfiler, ThreadRegistry
+
+
+def test_registry_tracks_helpers_per_owner():
+    registry = ThreadRegistry()
+    registry.add(1)
+    registry.add_helper(10, 1, 'event-loop')
+    registry.add_helper(20, 2, 'event-loop')
+    assert registry.snapshot() == [1]
+    assert registry.helpers(1) == {10: 'event-loop'}
+    assert registry.helpers() == {10: 'event-loop', 20: 'event-loop'}
+    registry.discard_helper(10)
+    assert registry.helpers(1) == {}
+
+
+def test_helper_stacks_are_rooted_at_their_role():
+    stop = threading.Event()
+    helper = threading.Thread(target=stop.wait, daemon=True)
+    helper.start()
+    try:
+        profile = SamplingProfiler(lambda: (), hz=200, helpers=lambda: {helper.ident: 'analysis-batcher'}).run_for(0.05)
+    finally:
+        stop.set()
+    assert profile.samples > 0
+    assert all(stack[0] == '[analysis-batcher]' for stack in profile.stacks)
+
+
+def test_non_finite_rate_falls_back_to_default():
+    assert SamplingProfiler(lambda: (), hz=float('nan')).hz == DEFAULT_HZ
@@ -0,0 +1,69 @@
+import pytest
+
+from app import create_app
+from app.utils.question_bank import QuestionBank
+
+SKILLS = {'programming_languages': ['Python', 'R'], 'soft_skills': ['Leadership']}
+
+
+@pytest.fixture(scope='module')
+def bank():
+    return QuestionBank(SKILLS)
+
+
+def test_canonicalize_normalizes_case_and_duplicates(bank):
+    assert bank.canonicalize(['python', 'PYTHON', 'Leadership', '', 'Rust']) == ('Leadership', 'Python', 'Rust')
+
+
+def test_a_single_skill_string_is_one_skill(bank):
+    assert bank.canonicalize('Python') == ('Python',)
+    assert bank.generate('Python', seed=1) == bank.generate(['Python'], seed=1)
+
+
+def test_packs_are_stable_per_candidate_and_job():
+    bank = QuestionBank(SKILLS)
+    profiles = [{'id': 'c1', 'skills': ['Python', 'Leadership']}, {'id': 'c2', 'skills': ['python', 'leadership']}]
+    first = bank.generate_batch(profiles, job_id='j1')
+    assert first == bank.generate_batch(profiles, job_id='j1')
+    assert first['c1']['behavioral'] and first['c1']['technical']
+    # Both share one skill combination, so one set of merged pools
+    assert bank.cache_info().currsize == 1
+
+
+def test_domain_skills_only_get_domain_experience_questions():
+    bank = QuestionBank({'domain': ['Healthcare'], 'languages': ['Go']})
+    pools = bank._pools(bank.canonicalize(['healthcare', 'Go']), '')
+    assert not any('Healthcare' in question for question in pools['technical'])
+    assert not any('Healthcare' in question and 'production' in question for question in pools['experience'])
+    assert any('Healthcare' in question for question in pools['experience'])
+    assert any('Go language features' in question for question in pools['technical'])
+
+
+@pytest.fixture(scope='module')
+def client():
+    return create_app(preload_caches=False).test_client()
+
+
+@pytest.mark.parametrize('candidates', [
+    'c1',
+    [{'skills': ['Python']}],
+    ['c1'],
+    [{'id': 'c1', 'skills': [1, 2]}],
+    [{'id': 'c1', 'skills': ['Python'], 'role': 3}],
+])
+def test_batch_rejects_malformed_profiles(client, candidates):
+    response = client.post('/api/generate-questions/batch', json={'candidates': candidates})
+    assert response.status_code == 400
+
+
+def test_batch_accepts_a_skills_string(client):
+    response = client.post('/api/generate-questions/batch', json={'candidates': [{'id': 'c1', 'skills': 'Python'}]})
+    assert response.status_code == 200
+    assert set(response.get_json()['questions']) == {'c1'}
+
+
+@pytest.mark.parametrize('candidate_id', [{'id': 'c1'}, ['c1'], 7])
+def test_single_pack_rejects_a_non_string_candidate_id(client, candidate_id):
+    response = client.post('/api/generate-questions', json={'candidateId': candidate_id})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'candidateId must be a string'
@@ -0,0 +1,39 @@
+from app.utils.reanalysis import diff_vocabularies, skill_matcher, skill_surfaces, skill_terms
+
+
+def test_matcher_allows_any_separator_between_words():
+    matcher = skill_matcher(['Machine Learning'])
+    assert matcher.match('Machine\nlearning and more')
+    assert matcher.match('machine -- learning')
+    assert not matcher.match('machine-learning')
+    assert not matcher.match('machinelearning')
+
+
+def test_matcher_follows_the_taxonomy_tokenizer():
+    matcher = skill_matcher(['R', 'C++', 'golang'])
+    assert matcher.match('Statistics in R')
+    assert matcher.match('Modern C++')
+    assert matcher.match('GoLang services')
+    assert not matcher.match('Résumé für Zoë')
+    assert not matcher.match('C and C#')
+
+
+def test_matcher_of_nothing_matchable():
+    assert skill_matcher([]) is None
+    assert skill_matcher(['++']) is None
+
+
+def test_diff_reports_every_kind_of_change():
+    old = {'languages': ['Go', 'Perl'], 'tools': ['Git']}
+    new = {'languages': ['Go', 'Rust', 'Git'], 'tools': []}
+    diff = diff_vocabularies(old, new, {'golang': 'Go'}, {})
+    assert diff['added'] == ['Rust']
+    assert diff['removed'] == ['Perl']
+    assert diff['recategorized'] == ['Git']
+    assert diff['realiased'] == ['Go']
+    assert diff['changed'] == ['Git', 'Go', 'Perl', 'Rust']
+
+
+def test_surfaces_and_terms_cover_aliases():
+    assert skill_surfaces(['Go'], {'golang': 'Go', 'k8s': 'Kubernetes'}) == ['Go', 'golang']
+    assert skill_terms('Node.js') == ['node', 'js']
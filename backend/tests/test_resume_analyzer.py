@@ -0,0 +1,72 @@
+import pytest
+
+from app.utils.resume_analyzer import DISTRIBUTION_CATEGORIES, ResumeAnalyzer
+from app.utils.resume_sections import ResumeSections
+
+RESUME = """Jane Doe
+jane@example.com
+
+Summary
+Python developer with 6 years of experience. Python, Python and more Python.
+
+Experience
+Backend work in Django with Agile and Scrum teams; project management of a Docker migration.
+
+Education
+B.S. in Computer Science, State University
+
+Skills
+Python, Docker, Kubernetes, Google Cloud, React, Leadership
+"""
+
+
+@pytest.fixture(scope='module')
+def analyzer(tmp_path_factory, monkeypatch_module):
+    monkeypatch_module.setenv('SKILL_TAXONOMY_FILE', str(tmp_path_factory.mktemp('taxonomy') / 'taxonomy.bin'))
+    return ResumeAnalyzer()
+
+
+@pytest.fixture(scope='module')
+def monkeypatch_module():
+    with pytest.MonkeyPatch.context() as patch:
+        yield patch
+
+
+@pytest.fixture(scope='module')
+def stats(analyzer):
+    return analyzer.analyze_resume(RESUME)['skills']
+
+
+def test_proficiency_counts_every_mention(stats):
+    assert stats['skillFrequency']['Python'] == 5
+    assert stats['skillProficiency']['Python'] == 'Expert'
+    assert stats['skillProficiency']['Docker'] == 'Intermediate'
+    assert stats['skillProficiency']['React'] == 'Beginner'
+    assert stats['topSkills'][0] == 'Python'
+    assert stats['totalSkills'] == stats['uniqueSkills'] == len(stats['skillFrequency'])
+
+
+def test_single_mentions_stay_at_the_lowest_proficiency(analyzer):
+    stats = analyzer.compute_skill_stats('Skills\nNode.js, React.js, Tailwind CSS, Google Cloud Platform')
+    assert stats['skillFrequency'] == {'Tailwind CSS': 1, 'Node.js': 1, 'React': 1, 'GCP': 1}
+    assert set(stats['skillProficiency'].values()) == {'Beginner'}
+
+
+def test_distribution_keeps_its_original_keys(stats):
+    assert set(stats['skillDistribution']) <= set(DISTRIBUTION_CATEGORIES)
+    assert stats['skillDistribution']['cloud_platforms'] == 3
+    assert stats['skillDistribution']['programming_languages'] == 1
+
+
+def test_process_skills_are_not_soft_skills(stats):
+    groups = stats['categorizedSkills']
+    assert {'Agile', 'Scrum'} <= set(groups['technical'])
+    assert 'Project Management' in groups['domain']
+    assert groups['soft'] == ['Leadership']
+
+
+def test_sections_limit_what_each_extractor_reads(analyzer):
+    analysis = analyzer.analyze_resume(RESUME)
+    assert analysis['yearsOfExperience'] == 6
+    assert any('Computer Science' in entry for entry in analysis['education'])
+    assert ResumeSections(RESUME).view('skills').startswith('\nPython, Docker')
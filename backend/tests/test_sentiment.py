@@ -0,0 +1,49 @@
+import pytest
+
+from app.utils.mock_ai import NEGATION_WINDOW, MockAIModel
+from app.utils.resume_sections import ResumeSections
+
+
+@pytest.fixture(scope='module')
+def model(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv('SKILL_TAXONOMY_FILE', str(tmp_path_factory.mktemp('taxonomy') / 'taxonomy.bin'))
+        yield MockAIModel()
+
+
+def scores(model, text):
+    return model._score_tokens(ResumeSections(text))
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Never failed a release.', (1.0, 0.0)),
+    ('The launch was not successful.', (0.0, 1.0)),
+    ("The migration wasn't successful.", (0.0, 1.0)),
+    ('Delivered without errors.', (0.5, 0.0)),
+])
+def test_negations_flip_the_terms_after_them(model, text, expected):
+    assert scores(model, text) == expected
+
+
+def test_negation_only_reaches_a_few_tokens(model):
+    inside = 'not ' + 'very ' * (NEGATION_WINDOW - 1) + 'successful'
+    outside = 'not ' + 'very ' * NEGATION_WINDOW + 'successful'
+    assert scores(model, inside) == (0.0, 1.0)
+    assert scores(model, outside) == (1.0, 0.0)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Strong problem solving and error handling.', (0.0, 0.0)),
+    ('Fixed a problem.', (0.0, 0.5)),
+    ('Unsuccessful ledger reconciliation.', (0.0, 0.0)),
+])
+def test_neutral_phrases_and_whole_tokens(model, text, expected):
+    assert scores(model, text) == expected
+
+
+def test_labels(model):
+    assert model.analyze_sentiment('Led the team and achieved excellent results.')['label'] == 'positive'
+    assert model.analyze_sentiment('Not successful; the project failed.')['label'] == 'negative'
+    assert model.analyze_sentiment('')['score'] == 0.5
+    texts = ['Never failed.', '', 'Never failed.']
+    assert model.analyze_sentiment_batch(texts) == [model.analyze_sentiment(text) for text in texts]
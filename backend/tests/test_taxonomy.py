@@ -0,0 +1,81 @@
+import pytest
+
+from app.utils.taxonomy import Taxonomy, build_taxonomy_file, compile_taxonomy, load_taxonomy, tokenize
+
+
+@pytest.fixture(scope='module')
+def taxonomy():
+    return Taxonomy.compile()
+
+
+def test_accented_words_stay_whole(taxonomy):
+    assert tokenize('Résumé für Zoë') == ['résumé', 'für', 'zoë']
+    assert taxonomy.match('Résumé of Jane Doe') == []
+    assert taxonomy.match('für') == []
+    assert sorted(taxonomy.match('Naïve Bayes in R and Python')) == ['Python', 'R']
+
+
+def test_symbols_and_joined_names(taxonomy):
+    assert sorted(taxonomy.match('C++, C# and CI/CD with Node.js.')) == ['C#', 'C++', 'CI/CD', 'Node.js']
+    assert taxonomy.match('Javascript') == ['JavaScript']
+    assert taxonomy.match('javas') == []
+
+
+def test_aliases_report_the_canonical_skill(taxonomy):
+    assert sorted(taxonomy.match('k8s, golang and postgres')) == ['Go', 'Kubernetes', 'PostgreSQL']
+
+
+def test_multiword_skills_match_across_any_separator(taxonomy):
+    assert taxonomy.match('machine\nlearning') == ['Machine Learning']
+    assert taxonomy.match('machine, learning') == ['Machine Learning']
+
+
+def test_count_reports_every_mention(taxonomy):
+    assert taxonomy.count('Python, python; k8s and Kubernetes, Résumé') == {'Kubernetes': 2, 'Python': 2}
+
+
+def test_count_takes_the_longest_match_once(taxonomy):
+    text = 'Node.js and React.js with Tailwind CSS on Google Cloud Platform, then CSS and React'
+    assert taxonomy.count(text) == {'React': 2, 'CSS': 1, 'Tailwind CSS': 1, 'Node.js': 1, 'GCP': 1}
+    assert taxonomy.count('google cloud, amazon web services and aws') == {'AWS': 2, 'GCP': 1}
+    assert taxonomy.match('Tailwind CSS') == ['Tailwind CSS']
+
+
+def test_compile_rejects_conflicts():
+    with pytest.raises(ValueError):
+        compile_taxonomy({'a': ['Go'], 'b': ['Go']}, {})
+    with pytest.raises(ValueError):
+        compile_taxonomy({'a': ['Go']}, {'golang': 'Rust'})
+    with pytest.raises(ValueError):
+        compile_taxonomy({'a': ['Go', 'Rust']}, {'go': 'Rust'})
+
+
+def test_artifact_round_trip_and_stale_rebuild(tmp_path):
+    path = str(tmp_path / 'taxonomy.bin')
+    built = build_taxonomy_file(path)
+    opened = Taxonomy.open(path)
+    assert opened.version == built.version
+    assert opened.categories == built.categories
+    assert opened.aliases == built.aliases
+
+    stale = str(tmp_path / 'stale.bin')
+    with open(stale, 'wb') as f:
+        f.write(compile_taxonomy({'a': ['Go']}, {}))
+    assert load_taxonomy(stale).version == built.version
+
+
+@pytest.mark.parametrize('content', [
+    b'SKIL',
+    b'SKILLTAX\x01\x00\x00\x00',
+    b'SKILLTAX\x01\x00\x00\x00\xff\x00\x00\x00{}',
+    b'SKILLTAX\x01\x00\x00\x00\x02\x00\x00\x00{}',
+    b'SKILLTAX\x01\x00\x00\x00\x02\x00\x00\x00[]',
+])
+def test_corrupt_artifact_is_rebuilt(tmp_path, content):
+    path = str(tmp_path / 'corrupt.bin')
+    with open(path, 'wb') as f:
+        f.write(content)
+    with pytest.raises(ValueError):
+        Taxonomy.open(path)
+    assert load_taxonomy(path).version == Taxonomy.compile().version
+    assert Taxonomy.open(path).version == Taxonomy.compile().version